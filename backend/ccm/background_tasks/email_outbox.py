@@ -0,0 +1,168 @@
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django_q.tasks import async_task
+
+from backend.ccm.canvas_api.email_users import build_bulk_emails, build_email
+from backend.ccm.email_pool import EmailSendReport, get_email_pool
+from backend.ccm.models import OutboxEmail
+from backend.ccm.task_queues import INTERACTIVE_QUEUE
+
+logger = logging.getLogger(__name__)
+
+SEND_OUTBOX_TASK = 'backend.ccm.background_tasks.email_outbox.send_outbox_emails'
+# An email claimed by a worker that is still sending after this long was lost with its worker and is due again
+SENDING_TIMEOUT = timedelta(seconds=settings.Q_CLUSTER['timeout'])
+# An outbox task stops claiming emails after this long and queues another task, well within the task timeout
+SEND_OUTBOX_TIME_LIMIT = SENDING_TIMEOUT / 2
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """ Exponential backoff after the `attempts`-th failed send. """
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY))
+
+
+def enqueue_email(to_email: str, subject: str, body: str, attachment: tuple = None) -> OutboxEmail:
+    """ Queue an email to the user in the outbox, see email_users.send_email for the arguments. """
+    filename, content, mimetype = attachment or ('', '', '')
+    email = OutboxEmail.objects.create(
+        to_email=to_email, subject=subject, body=body, attachment_filename=filename,
+        attachment_content=content, attachment_mimetype=mimetype, next_attempt_at=timezone.now(),
+    )
+    _send_outbox_on_commit()
+    return email
+
+
+def enqueue_emails(to_emails: List[str], subject: str, body: str) -> List[OutboxEmail]:
+    """ Queue the same email to each address in the outbox. """
+    now = timezone.now()
+    emails = OutboxEmail.objects.bulk_create([
+        OutboxEmail(to_email=to_email, subject=subject, body=body, next_attempt_at=now) for to_email in to_emails
+    ])
+    _send_outbox_on_commit()
+    return emails
+
+
+def _send_outbox_on_commit() -> None:
+    # The outbox schedule sends anything this misses, e.g. when the broker is down
+    def queue_send():
+        try:
+            async_task(SEND_OUTBOX_TASK, task_name=f'email-outbox-{timezone.now():%Y/%m/%d-%H:%M:%S-%f}', cluster=INTERACTIVE_QUEUE)
+        except Exception as e:
+            logger.error(f"Failed to queue the email outbox task, queued emails wait for the outbox schedule: {e}")
+    transaction.on_commit(queue_send)
+
+
+def _due_emails(now: datetime) -> Q:
+    return Q(next_attempt_at__lte=now) & Q(status__in=[OutboxEmail.Status.PENDING, OutboxEmail.Status.SENDING])
+
+
+def claim_due_emails(limit: Optional[int] = None, now: Optional[datetime] = None) -> List[OutboxEmail]:
+    """
+    Mark up to `limit` due emails as being sent and return them. Locked rows are skipped, so outbox tasks running at
+    the same time send different emails.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(_due_emails(now))
+            .order_by('next_attempt_at', 'id')[:limit or settings.EMAIL_OUTBOX_BATCH_SIZE]
+        )
+        OutboxEmail.objects.filter(id__in=[email.id for email in emails]).update(
+            status=OutboxEmail.Status.SENDING, attempts=F('attempts') + 1,
+            next_attempt_at=now + SENDING_TIMEOUT, updated_at=now,
+        )
+    for email in emails:
+        email.attempts += 1
+    return emails
+
+
+def build_outbox_messages(emails: List[OutboxEmail]) -> List[Tuple[EmailMessage, OutboxEmail]]:
+    """ The messages of the emails, emails with the same subject and body share their encoded content. """
+    messages: List[Tuple[EmailMessage, OutboxEmail]] = []
+    shared: Dict[Tuple[str, str], List[OutboxEmail]] = defaultdict(list)
+    for email in emails:
+        if email.attachment:
+            messages.append((build_email(email.to_email, email.subject, email.body, email.attachment), email))
+        else:
+            shared[(email.subject, email.body)].append(email)
+    for (subject, body), group in shared.items():
+        messages.extend(zip(build_bulk_emails([email.to_email for email in group], subject, body), group))
+    return messages
+
+
+def record_send_results(emails: List[OutboxEmail], errors: Dict[int, str], now: Optional[datetime] = None) -> None:
+    """
+    Mark the emails sent, except those in `errors` (by email id): they are retried after their backoff, or dead
+    once they reached EMAIL_OUTBOX_MAX_ATTEMPTS.
+    """
+    now = now or timezone.now()
+    OutboxEmail.objects.filter(id__in=[email.id for email in emails if email.id not in errors]).update(
+        status=OutboxEmail.Status.SENT, sent_at=now, last_error='', updated_at=now
+    )
+    for email in emails:
+        error = errors.get(email.id)
+        if error is None:
+            continue
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            logger.error(f"Email {email.id} to {email.to_email} is dead after {email.attempts} attempts: {error}")
+            OutboxEmail.objects.filter(id=email.id).update(status=OutboxEmail.Status.DEAD, last_error=error, updated_at=now)
+        else:
+            next_attempt_at = now + retry_delay(email.attempts)
+            logger.warning(f"Email {email.id} to {email.to_email} failed (attempt {email.attempts}), retrying at {next_attempt_at}: {error}")
+            OutboxEmail.objects.filter(id=email.id).update(
+                status=OutboxEmail.Status.PENDING, next_attempt_at=next_attempt_at, last_error=error, updated_at=now
+            )
+
+
+def send_outbox_batch(emails: List[OutboxEmail]) -> EmailSendReport:
+    """ Send the claimed emails and record the results. """
+    messages = build_outbox_messages(emails)
+    by_message = {id(message): email for message, email in messages}
+    report = get_email_pool().send_messages([message for message, _ in messages])
+    errors = {
+        by_message[id(message)].id: error
+        for message, (_, error) in zip(report.failed_messages, report.failed)
+    }
+    record_send_results(emails, errors)
+    return report
+
+
+def send_outbox_emails() -> dict:
+    """
+    Background task sending the due outbox emails over the pooled SMTP connections of the worker, queued when
+    emails are enqueued and run every minute by the outbox schedule for retries. Batches of EMAIL_OUTBOX_BATCH_SIZE
+    emails are sent until none is due; after SEND_OUTBOX_TIME_LIMIT the task queues itself again for the rest,
+    instead of running into the task timeout. The send report is the task result.
+    """
+    deadline = time.monotonic() + SEND_OUTBOX_TIME_LIMIT.total_seconds()
+    report: Optional[EmailSendReport] = None
+    while True:
+        emails = claim_due_emails()
+        if not emails:
+            break
+        batch_report = send_outbox_batch(emails)
+        if report is None:
+            report = batch_report
+        else:
+            report.merge(batch_report)
+            report.seconds += batch_report.seconds
+        if len(emails) < settings.EMAIL_OUTBOX_BATCH_SIZE:
+            break
+        if time.monotonic() >= deadline:
+            logger.info(f"Sent {report.sent} outbox emails in {report.seconds:.0f}s, queuing the outbox task for the rest")
+            _send_outbox_on_commit()
+            break
+    if report is None:
+        return {'sent': 0, 'failed': 0}
+    return report.to_dict()
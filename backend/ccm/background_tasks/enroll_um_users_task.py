@@ -1,26 +1,31 @@
 import logging
 import time
 import asyncio
-import csv
 import io
 from dataclasses import dataclass
-from typing import List
+from typing import Any, Callable, Collection, List
+from urllib.parse import urljoin
 from django.test import RequestFactory
+from django.urls import reverse
+from django.utils.html import escape
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.utils import timezone
 from canvasapi import Canvas
-from canvasapi.exceptions import Unauthorized
 from backend.ccm.canvas_api.canvas_credential_manager import CanvasCredentialManager
+from backend.ccm.canvas_api.canvas_token_cache import delete_canvas_oauth_token
 
-from backend.ccm.canvas_api.email_users import send_email
+from backend.ccm.background_tasks.email_outbox import enqueue_email
+from backend.ccm.background_tasks.enrollment_results import EnrollmentResults
+from backend.ccm.failure_reports import FailureSummary, failure_report_token, store_failure_report, write_failure_csv
 from backend.ccm.canvas_api.enroll_users import enroll_user
-from backend.ccm.canvas_api.constants import INSUFFICIENT_SCOPES_ON_ACCESS_TOKEN
 from django.contrib.auth.models import User
 from rest_framework.request import Request
 from asgiref.sync import async_to_sync
 from datetime import timedelta
-from canvas_oauth.models import CanvasOAuth2Token
 from backend.ccm.canvas_api.constants import MAX_CONCURRENCY
+from backend.ccm.models import EnrollmentJob, EnrollmentJobChunk
+from backend.ccm.background_tasks.enrollment_scheduler import ACTIVE_JOB_STATUSES, schedule_enrollment_chunks
 
 
 logger = logging.getLogger(__name__)
@@ -36,16 +41,32 @@ async def enroll_user_async(canvas_api, section_id, login_id, role):
       # Wrap the sync function in a coroutine for compatibility
       return await asyncio.to_thread(enroll_user, canvas_api, section_id, login_id, role)
 
-async def sem_task(semaphore, canvas_api, enrollment_user: EnrollmentUser):
-    async with semaphore:
-        return await enroll_user_async(canvas_api, enrollment_user.sectionId, enrollment_user.loginId.lower(), enrollment_user.role.lower())
-
 @async_to_sync()
-async def gather_enrollments(enrollment_users, canvas_api):
-    max_concurrent = MAX_CONCURRENCY
-    semaphore = asyncio.Semaphore(max_concurrent)
-    tasks = [sem_task(semaphore, canvas_api, user) for user in enrollment_users]
-    return await asyncio.gather(*tasks, return_exceptions=True)
+async def gather_enrollments(enrollment_users, canvas_api, on_result: Callable[[EnrollmentUser, Any], None]) -> None:
+    """
+    Enroll the users, MAX_CONCURRENCY at a time, passing each user and its result (the enrollment, or the exception
+    raised) to `on_result` as soon as it completes. Results aren't kept, so memory doesn't grow with the rows.
+    """
+    users = iter(enrollment_users)
+
+    async def worker():
+        # The workers share the iterator, each takes the next user once its enrollment completes
+        for user in users:
+            try:
+                result = await enroll_user_async(canvas_api, user.sectionId, user.loginId.lower(), user.role.lower())
+            except Exception as e:
+                result = e
+            on_result(user, result)
+
+    await asyncio.gather(*(worker() for _ in range(MAX_CONCURRENCY)))
+
+def build_task_request(req_user: User, canvas_callback_url: str) -> Request:
+  # Create a request factory and build the request since this is a background task request won't have a user session
+  factory = RequestFactory()
+  request: Request = factory.get('/oauth/oauth-callback')
+  request.user = req_user
+  request.build_absolute_uri = lambda path: canvas_callback_url
+  return request
 
 def enroll_um_users(task):
   logger.debug(f"Enrolling users in section with task data: {task}")
@@ -59,71 +80,126 @@ def enroll_um_users(task):
   req_user_email: str = req_user.email.lower()  # Ensure email is lowercase for consistency
   uniqname: str = req_user.username
 
-  # Create a request factory and build the request since this is a background task request won't have a user session
-  factory = RequestFactory()
-  request: Request = factory.get('/oauth/oauth-callback')
-  request.user = req_user
-  request.build_absolute_uri = lambda path: canvas_callback_url
-  try:
-      # Get the Canvas API instance using the credential manager
-      canvas_api: Canvas = course_manager.get_canvasapi_instance(request)
-  except Exception as e:
-      logger.error(f"Failed to get Canvas API instance for user {uniqname}: {e}")
-      # Create a results list with the same exception for each enrollment param
-      results = [e for _ in enrollment_params]
+  request: Request = build_task_request(req_user, canvas_callback_url)
+  with EnrollmentResults() as results:
+      try:
+          # Get the Canvas API instance using the credential manager
+          canvas_api: Canvas = course_manager.get_canvasapi_instance(request)
+      except Exception as e:
+          logger.error(f"Failed to get Canvas API instance for user {uniqname}: {e}")
+          # Every enrollment fails with the same exception
+          for user in enrollment_params:
+              results.add(user, e)
+          handle_enrollment_results(enrollment_params, results, request, uniqname, req_user_email, course_id)
+          return
+
+      loop_start_time = time.perf_counter()
+      logger.info(f"Starting enrollment for {len(enrollment_params)} users")
+      gather_enrollments(enrollment_params, canvas_api, results.add)
+      loop_elapsed = time.perf_counter() - loop_start_time
+
       handle_enrollment_results(enrollment_params, results, request, uniqname, req_user_email, course_id)
-      return
+  logger.info(f"for adding users to course {course_id} to enroll {len(enrollment_params)} users took {timedelta(seconds=loop_elapsed)}")
+
+def enroll_um_users_chunk(task):
+  """
+  Enroll the rows of one EnrollmentJob chunk. Failures are stored on the chunk, the last chunk of a job sends its
+  summary email, and the scheduler dispatches the next chunk whatever happens to this one.
+  """
+  try:
+      chunk: EnrollmentJobChunk = EnrollmentJobChunk.objects.select_related('job__user').get(pk=task.get('chunk_id'))
+      if chunk.processed_at is None:
+          enroll_job_chunk(chunk)
+      finish_enrollment_job(chunk.job)
+  finally:
+      schedule_enrollment_chunks()
+
+def enroll_job_chunk(chunk: EnrollmentJobChunk) -> None:
+  job: EnrollmentJob = chunk.job
+  uniqname: str = job.user.username
+  request: Request = build_task_request(job.user, job.canvas_callback_url)
+  enrollment_params = [EnrollmentUser(**row) for row in chunk.rows]
 
   loop_start_time = time.perf_counter()
-  logger.info(f"Starting enrollment for {len(enrollment_params)} users")
-  results = gather_enrollments(enrollment_params, canvas_api)
+  with EnrollmentResults() as results:
+      try:
+          canvas_api: Canvas = course_manager.get_canvasapi_instance(request)
+      except Exception as e:
+          logger.error(f"Failed to get Canvas API instance for user {uniqname}: {e}")
+          for user in enrollment_params:
+              results.add(user, e)
+      else:
+          gather_enrollments(enrollment_params, canvas_api, results.add)
+      chunk.failures = list(results.failures)
+      unauthorized_error = results.unauthorized_error
+  chunk.processed_at = timezone.now()
+  chunk.save(update_fields=['failures', 'processed_at'])
+  if unauthorized_error:
+      # The following chunks of the user's jobs fail getting a Canvas API instance until the user authorizes again
+      delete_token_with_insufficient_scopes(request, uniqname)
   loop_elapsed = time.perf_counter() - loop_start_time
+  logger.info(f"Chunk {chunk.index} of enrollment job {job.id} with {len(enrollment_params)} users took {timedelta(seconds=loop_elapsed)}")
 
-  handle_enrollment_results(enrollment_params,results,request,uniqname,req_user_email,course_id)
-  logger.info(f"for adding users to course {course_id} to enroll {len(enrollment_params)} users took {timedelta(seconds=loop_elapsed)}")
+def finish_enrollment_job(job: EnrollmentJob) -> None:
+  """
+  Mark the job finished and email the summary once every chunk is processed. Only the first caller to see the
+  job done sends the email.
+  """
+  if job.chunks.filter(processed_at__isnull=True).exists():
+      return
+  finished = EnrollmentJob.objects.filter(pk=job.pk, status__in=ACTIVE_JOB_STATUSES).update(
+      status=EnrollmentJob.Status.FINISHED, updated_at=timezone.now()
+  )
+  if not finished:
+      return
+  # The failures are read a chunk at a time, one query per chunk as MySQL buffers whole results, and spooled, so a
+  # large job's failures aren't all held in memory
+  with EnrollmentResults() as results:
+      for chunk_id in job.chunks.order_by('index').values_list('id', flat=True):
+          for failure in EnrollmentJobChunk.objects.values_list('failures', flat=True).get(pk=chunk_id):
+              results.add_failure(failure)
+      email_enrollment_summary(
+          req_user_email=job.user.email.lower(),
+          course_id=job.course_id,
+          failed_enrollments=results.failures,
+          failure_summary=results.summary,
+          total_enrollment_count=job.total_rows,
+          report_user=job.user,
+          site_url=job.canvas_callback_url
+      )
+  logger.info(f"Enrollment job {job.id} for course {job.course_id} with {job.total_rows} users finished")
 
-def handle_enrollment_results(enrollment_params, results, request, uniqname, req_user_email, course_id):
-    failed_enrollments = []
-    unauthorized_scope_found = False
-        # asyncio gather preserves the order of enrollment_params, so we can match them with results
-    for enroll_user, enrollment in zip(enrollment_params, results):
-        if isinstance(enrollment, Exception):
-            failed_enrollments.append({
-                'sectionId': enroll_user.sectionId,
-                'loginId': enroll_user.loginId,
-                'role': enroll_user.role,
-                'error': str(enrollment)
-            })
-            # Check for Unauthorized with insufficient scopes
-            if (
-                isinstance(enrollment, Unauthorized) and
-                INSUFFICIENT_SCOPES_ON_ACCESS_TOKEN in str(enrollment).lower()
-            ):
-                unauthorized_scope_found = True
-
-    # Prepare failed list for future user notification (e.g., email)
-    if failed_enrollments:
-        failed_list = [
-            f"{fail['loginId']} (role: {fail['role']}, section: {fail['sectionId']}) - {fail['error']}"
-            for fail in failed_enrollments
-        ]
-        logger.error("Failed enrollments: " + "; ".join(failed_list))
-
-    if unauthorized_scope_found:
-        # This might happen when new scopes are added after the token was issued, but not going to be an issue with Prod release 
-        logger.warning(f"Deleting CanvasOAuth2Token for user {uniqname} due to insufficient scopes on access token.")
-        CanvasOAuth2Token.objects.filter(user=request.user).delete()
+def delete_token_with_insufficient_scopes(request, uniqname):
+    # This might happen when new scopes are added after the token was issued, but not going to be an issue with Prod release 
+    logger.warning(f"Deleting CanvasOAuth2Token for user {uniqname} due to insufficient scopes on access token.")
+    delete_canvas_oauth_token(request.user)
+
+def handle_enrollment_results(enrollment_params, results: EnrollmentResults, request, uniqname, req_user_email, course_id):
+    # The failures themselves go to the summary email's report, the log gets the counts per error category
+    if results.failed:
+        logger.error(f"Enrollments in course {course_id}: {results.describe()}")
+
+    if results.unauthorized_error:
+        delete_token_with_insufficient_scopes(request, uniqname)
     
     email_enrollment_summary(
         req_user_email=req_user_email,
         course_id=course_id,
-        failed_enrollments=failed_enrollments,
-        total_enrollment_count=len(enrollment_params)
+        failed_enrollments=results.failures,
+        failure_summary=results.summary,
+        total_enrollment_count=len(enrollment_params),
+        report_user=request.user if request else None,
+        # The task request's absolute uri is the canvas callback url of the site
+        site_url=request.build_absolute_uri('/') if request else None
     )
 
-def email_enrollment_summary(req_user_email: str, course_id: int, failed_enrollments: List[str], total_enrollment_count: int) -> None:
+def email_enrollment_summary(req_user_email: str, course_id: int, failed_enrollments: Collection[dict], total_enrollment_count: int,
+                             report_user: User = None, site_url: str = None, failure_summary: FailureSummary = None) -> None:
     """
-    Compose and send enrollment result email, with CSV attachment if there are failures.
+    Compose the enrollment result email and queue it in the email outbox. The email lists the failures per error
+    category with a few examples (`failure_summary`, summarized from the failures when not given); the failures
+    themselves are attached as CSV, or, beyond FAILURE_REPORT_ATTACHMENT_MAX_ROWS and given the `report_user` and an
+    absolute `site_url` of this site, stored as a gzipped report the email links to.
     """
     failed = len(failed_enrollments)
     succeeded = total_enrollment_count - failed
@@ -135,26 +211,32 @@ def email_enrollment_summary(req_user_email: str, course_id: int, failed_enrollm
     success_body = (
         f"For Course <a href='{course_canvas_link}'>{course_id}</a> enrolling all users is success"
     )
-    failure_body = (
-        f"For Course <a href='{course_canvas_link}'>{course_id}</a> enrolling users encountered failures. See attachment for error list."
-    )
+    if failed_enrollments:
+        failure_summary = failure_summary or FailureSummary.of(failed_enrollments)
+        failure_body = (
+            f"For Course <a href='{course_canvas_link}'>{course_id}</a> enrolling users encountered failures:"
+            f"{failure_summary_html(failure_summary)}See attachment for error list."
+        )
     body = success_body if succeeded == total_enrollment_count else failure_body
 
     attachment = None
+    if failed_enrollments and failed > settings.FAILURE_REPORT_ATTACHMENT_MAX_ROWS and report_user and site_url:
+        try:
+            report = store_failure_report(report_user, course_id, failed_enrollments)
+            report_path = reverse('enrollmentFailureReport', kwargs={'course_id': course_id, 'token': failure_report_token(report)})
+            report_link = urljoin(site_url, report_path)
+            link_days = settings.FAILURE_REPORT_LINK_MAX_AGE_DAYS
+            body = (
+                f"For Course <a href='{course_canvas_link}'>{course_id}</a> enrolling users encountered failures:"
+                f"{failure_summary_html(failure_summary)}<a href='{report_link}'>Download the error list</a> (link valid for {link_days} days)."
+            )
+            failed_enrollments = []
+        except Exception as e:
+            logger.error(f"Failed to store failure report for course {course_id}, attaching it instead: {e}")
     if failed_enrollments:
         try:
             output = io.StringIO()
-            fieldnames = ['sectionId', 'LoginId', 'role', 'ReasonForFailure']
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            for item in failed_enrollments:
-                row = {
-                    'sectionId': item.get('sectionId', ''),
-                    'LoginId': item.get('loginId', ''),
-                    'role': item.get('role', ''),
-                    'ReasonForFailure': item.get('error', '')
-                }
-                writer.writerow(row)
+            write_failure_csv(output, failed_enrollments)
             csv_content: str = output.getvalue()
             filename: str = f'course_{course_id}_failures.csv'
             mime_type: str = 'text/csv'
@@ -162,11 +244,17 @@ def email_enrollment_summary(req_user_email: str, course_id: int, failed_enrollm
         except (ValueError, Exception) as e:
             logger.error(f"Failed to create CSV attachment for course {course_id}: {e}")
 
-    logger.info(f"Sending enrollment summary email to {req_user_email}: {email_subject}")
-    send_email(
+    logger.info(f"Queueing enrollment summary email to {req_user_email}: {email_subject}")
+    enqueue_email(
         to_email=req_user_email,
         subject=email_subject,
         body=body,
         attachment=attachment,
     )
-    
\ No newline at end of file
+
+def failure_summary_html(failure_summary: FailureSummary) -> str:
+    items = ''.join(
+        f"<li>{count} &times; {escape(label)}, e.g. {escape(', '.join(sample['loginId'] for sample in samples))}</li>"
+        for label, count, samples in failure_summary.categories()
+    )
+    return f"<ul>{items}</ul>"
@@ -0,0 +1,92 @@
+import csv
+import tempfile
+from typing import Iterator, Optional
+
+from canvasapi.exceptions import Unauthorized
+
+from backend.ccm.canvas_api.constants import INSUFFICIENT_SCOPES_ON_ACCESS_TOKEN
+from backend.ccm.canvas_api.exceptions import CanvasErrorHandler
+from backend.ccm.failure_reports import FailureSummary, failure_category
+
+# Failures kept in memory up to this size, then spooled to a temporary file
+FAILURE_SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+class SpooledFailures:
+    """
+    Failed enrollments written as CSV rows to a spooled temporary file. Iterating reads them back as the failure
+    dicts (sectionId, loginId, role, category, error) from the start, and len() is the number of failures.
+    """
+
+    def __init__(self, max_memory: int = FAILURE_SPOOL_MAX_MEMORY):
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_memory, mode='w+', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file)
+        self._count = 0
+
+    def append(self, failure: dict) -> None:
+        self._file.seek(0, 2)
+        self._writer.writerow([failure['sectionId'], failure['loginId'], failure['role'], failure['category'], failure['error']])
+        self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[dict]:
+        self._file.seek(0)
+        for section_id, login_id, role, category, error in csv.reader(self._file):
+            yield {'sectionId': int(section_id), 'loginId': login_id, 'role': role, 'category': category, 'error': error}
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class EnrollmentResults:
+    """
+    Aggregates enrollment results as they complete: successes are only counted, failures are spooled and counted
+    per error category, with a few samples, for the summary. Keeps the Unauthorized error for insufficient scopes,
+    if one was found.
+    """
+
+    def __init__(self, max_memory: int = FAILURE_SPOOL_MAX_MEMORY):
+        self.succeeded = 0
+        self.failures = SpooledFailures(max_memory)
+        self.summary = FailureSummary()
+        self.unauthorized_error: Optional[Unauthorized] = None
+
+    @property
+    def failed(self) -> int:
+        return len(self.failures)
+
+    @property
+    def total(self) -> int:
+        return self.succeeded + self.failed
+
+    def add(self, enroll_user, result) -> None:
+        if not isinstance(result, Exception):
+            self.succeeded += 1
+            return
+        error = str(result)
+        self.add_failure({
+            'sectionId': enroll_user.sectionId, 'loginId': enroll_user.loginId, 'role': enroll_user.role,
+            'category': CanvasErrorHandler.classify_error(result), 'error': error,
+        })
+        if isinstance(result, Unauthorized) and INSUFFICIENT_SCOPES_ON_ACCESS_TOKEN in error.lower():
+            self.unauthorized_error = result
+
+    def add_failure(self, failure: dict) -> None:
+        """ Add a failure dict, e.g. one stored on an enrollment job chunk. """
+        failure = {**failure, 'category': failure_category(failure)}
+        self.failures.append(failure)
+        self.summary.add(failure, failure['category'])
+
+    def describe(self) -> str:
+        return f"{self.failed}/{self.total} enrollments failed" + (f": {self.summary}" if self.failed else "")
+
+    def close(self) -> None:
+        self.failures.close()
+
+    def __enter__(self) -> 'EnrollmentResults':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
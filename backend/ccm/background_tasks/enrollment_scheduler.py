@@ -0,0 +1,187 @@
+import logging
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from django_q.tasks import async_task
+
+from backend.ccm.models import EnrollmentJob, EnrollmentJobChunk
+from backend.ccm.task_queues import BULK_QUEUE
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_JOB_STATUSES = (EnrollmentJob.Status.PENDING, EnrollmentJob.Status.RUNNING)
+# A dispatched chunk that isn't processed after the task timeout was lost with its worker and is dispatched again
+CHUNK_DISPATCH_TIMEOUT = timedelta(seconds=settings.Q_CLUSTER['timeout'])
+
+
+@dataclass
+class QueuedJob:
+    id: int
+    user_id: int
+    course_id: int
+    created_at: datetime
+    last_dispatched_at: Optional[datetime]
+    waiting_chunks: int
+
+
+def _served_key(last_dispatched_at: Optional[datetime], created_at: datetime):
+    # Never served first, then least recently served, then oldest
+    return (last_dispatched_at is not None, last_dispatched_at or created_at, created_at)
+
+
+def fair_chunk_order(jobs: List[QueuedJob], user_slots: Optional[Dict[int, int]] = None) -> List[int]:
+    """
+    Return job ids in the order their waiting chunks should run, one id per chunk. Users take turns, and each user's
+    turns go round their courses, so one user's large uploads don't hold back everyone else's jobs; jobs of the same
+    user and course run oldest first. Whoever was served least recently goes first. With `user_slots`, a user gets
+    at most that many chunks.
+    """
+    by_user: Dict[int, Dict[int, List[QueuedJob]]] = defaultdict(lambda: defaultdict(list))
+    for job in jobs:
+        if job.waiting_chunks > 0:
+            by_user[job.user_id][job.course_id].append(job)
+
+    def last_served(jobs_of: List[QueuedJob]):
+        served = [job.last_dispatched_at for job in jobs_of if job.last_dispatched_at is not None]
+        return _served_key(max(served, default=None), min(job.created_at for job in jobs_of))
+
+    user_queue: Deque[int] = deque(sorted(
+        by_user, key=lambda user_id: last_served([job for course_jobs in by_user[user_id].values() for job in course_jobs])
+    ))
+    course_queues: Dict[int, Deque[Deque[QueuedJob]]] = {
+        user_id: deque(
+            deque(sorted(course_jobs, key=lambda job: job.created_at))
+            for course_jobs in sorted(courses.values(), key=last_served)
+        )
+        for user_id, courses in by_user.items()
+    }
+    remaining = {job.id: job.waiting_chunks for job in jobs}
+    slots = dict(user_slots) if user_slots is not None else None
+
+    order: List[int] = []
+    while user_queue:
+        user_id = user_queue.popleft()
+        if slots is not None and slots.get(user_id, 0) <= 0:
+            continue
+        courses = course_queues[user_id]
+        course_jobs = courses.popleft()
+        job = course_jobs[0]
+        order.append(job.id)
+        remaining[job.id] -= 1
+        if slots is not None:
+            slots[user_id] -= 1
+        if remaining[job.id] == 0:
+            course_jobs.popleft()
+        if course_jobs:
+            courses.append(course_jobs)
+        if courses:
+            user_queue.append(user_id)
+    return order
+
+
+def _waiting_chunks(now: datetime, prefix: str = '') -> Q:
+    return Q(**{f'{prefix}processed_at__isnull': True}) & (
+        Q(**{f'{prefix}dispatched_at__isnull': True}) | Q(**{f'{prefix}dispatched_at__lt': now - CHUNK_DISPATCH_TIMEOUT})
+    )
+
+
+def _running_chunks(now: datetime) -> Q:
+    return Q(processed_at__isnull=True, dispatched_at__gte=now - CHUNK_DISPATCH_TIMEOUT)
+
+
+def get_queued_jobs(now: Optional[datetime] = None) -> List[QueuedJob]:
+    """ Active jobs with the number of their chunks waiting to be dispatched. """
+    now = now or timezone.now()
+    jobs = (
+        EnrollmentJob.objects
+        .filter(status__in=ACTIVE_JOB_STATUSES)
+        .annotate(waiting_chunks=Count('chunks', filter=_waiting_chunks(now, prefix='chunks__')))
+        .values('id', 'user_id', 'course_id', 'created_at', 'last_dispatched_at', 'waiting_chunks')
+    )
+    return [QueuedJob(**job) for job in jobs]
+
+
+def get_running_chunks_by_user(now: Optional[datetime] = None) -> Dict[int, int]:
+    now = now or timezone.now()
+    running = (
+        EnrollmentJobChunk.objects
+        .filter(_running_chunks(now), job__status__in=ACTIVE_JOB_STATUSES)
+        .values('job__user_id')
+        .annotate(count=Count('id'))
+    )
+    return {row['job__user_id']: row['count'] for row in running}
+
+
+def get_queue_position(job: EnrollmentJob) -> Optional[int]:
+    """
+    1-based position of the job's next chunk in the fair order of the chunks waiting for a worker, or None when the
+    job has no chunk waiting.
+    """
+    order = fair_chunk_order(get_queued_jobs())
+    try:
+        return order.index(job.id) + 1
+    except ValueError:
+        return None
+
+
+def schedule_enrollment_chunks() -> int:
+    """
+    Dispatch waiting enrollment chunks to the bulk task queue in fair order, up to ENROLLMENT_MAX_RUNNING_CHUNKS
+    running at once and ENROLLMENT_MAX_RUNNING_CHUNKS_PER_USER per user. Called when a job is created, whenever a
+    chunk finishes, and every minute by the 'schedule-enrollment-chunks' django-q schedule, which dispatches chunks
+    lost with their worker again when nothing else would; from any process, the row locks on the active jobs keep two schedulers from dispatching the
+    same chunk. Returns the number of chunks dispatched.
+    """
+    with transaction.atomic():
+        active_job_ids = list(
+            EnrollmentJob.objects.select_for_update().filter(status__in=ACTIVE_JOB_STATUSES).values_list('id', flat=True)
+        )
+        if not active_job_ids:
+            return 0
+        now = timezone.now()
+        running_by_user = get_running_chunks_by_user(now)
+        capacity = settings.ENROLLMENT_MAX_RUNNING_CHUNKS - sum(running_by_user.values())
+        if capacity <= 0:
+            return 0
+        queued_jobs = get_queued_jobs(now)
+        user_slots = {
+            job.user_id: settings.ENROLLMENT_MAX_RUNNING_CHUNKS_PER_USER - running_by_user.get(job.user_id, 0)
+            for job in queued_jobs
+        }
+        order = fair_chunk_order(queued_jobs, user_slots)[:capacity]
+
+        dispatched: List[EnrollmentJobChunk] = []
+        for job_id in order:
+            chunk = (
+                EnrollmentJobChunk.objects
+                .filter(_waiting_chunks(now), job_id=job_id)
+                .exclude(id__in=[chunk.id for chunk in dispatched])
+                .order_by('index')
+                .only('id', 'job_id', 'index')
+                .first()
+            )
+            if chunk is None:
+                continue
+            chunk.dispatched_at = now
+            chunk.save(update_fields=['dispatched_at'])
+            dispatched.append(chunk)
+        if dispatched:
+            EnrollmentJob.objects.filter(id__in={chunk.job_id for chunk in dispatched}).update(
+                status=EnrollmentJob.Status.RUNNING, last_dispatched_at=now, updated_at=now
+            )
+            transaction.on_commit(lambda: _queue_chunk_tasks(dispatched))
+    return len(dispatched)
+
+
+def _queue_chunk_tasks(chunks: List[EnrollmentJobChunk]) -> None:
+    for chunk in chunks:
+        task_name = f'job{chunk.job_id}-chunk{chunk.index}'
+        task_id = async_task('backend.ccm.background_tasks.enroll_um_users_task.enroll_um_users_chunk',
+                             task={'chunk_id': chunk.id}, task_name=task_name, cluster=BULK_QUEUE)
+        logger.info(f"Dispatched chunk {chunk.index} of enrollment job {chunk.job_id} as task {task_id}")
@@ -0,0 +1,57 @@
+import logging
+from typing import List
+
+from canvasapi.account import Account
+from canvasapi.sis_import import SisImport
+from django.conf import settings
+from django_q.tasks import async_task
+
+from backend.ccm.background_tasks.email_outbox import enqueue_emails
+from backend.ccm.background_tasks.send_email_non_umich_user_task import email_body, external_user_email_subject
+from backend.ccm.canvas_api.canvas_credential_manager import CanvasCredentialManager
+from backend.ccm.canvas_api.constants import CANVAS_ROOT_ACCOUNT_ID
+from backend.ccm.canvas_api.sis_user_import import import_results, is_import_finished, wait_for_import
+from backend.ccm.canvas_api.user_lookup import invalidate_canvas_users
+from backend.ccm.task_queues import BULK_QUEUE
+
+logger = logging.getLogger(__name__)
+
+FINISH_IMPORT_TASK = 'backend.ccm.background_tasks.guest_sis_import_task.finish_guest_sis_import'
+# An import still running after this many tasks of GUEST_SIS_IMPORT_TASK_TIMEOUT seconds is given up on
+MAX_FINISH_ATTEMPTS = 6
+
+
+def queue_finish_guest_sis_import(sis_import_id: int, users: List[dict], attempt: int = 1) -> None:
+    """ Queue the task waiting for the SIS import to finish and inviting the guests it created. """
+    try:
+        async_task(FINISH_IMPORT_TASK, sis_import_id, users, attempt=attempt,
+                   task_name=f'guest-sis-import-{sis_import_id}-{attempt}', cluster=BULK_QUEUE)
+    except Exception as e:
+        logger.error(f"Failed to queue the task finishing SIS import {sis_import_id}, its {len(users)} guests won't be invited: {e}")
+
+
+def finish_guest_sis_import(sis_import_id: int, users: List[dict], attempt: int = 1) -> dict:
+    """
+    Wait up to GUEST_SIS_IMPORT_TASK_TIMEOUT seconds for the SIS import of the users, which the request creating them
+    stopped waiting for, then queue the invitations of the guests it created. An import still running is waited for
+    by another task, up to MAX_FINISH_ATTEMPTS tasks.
+    """
+    canvas_api = CanvasCredentialManager().get_canvasapi_admin_instance()
+    account = Account(canvas_api._Canvas__requester, {'id': CANVAS_ROOT_ACCOUNT_ID})
+    # The state is polled, and errors getting it retried, by wait_for_import
+    sis_import = SisImport(account._requester, {'id': sis_import_id, 'workflow_state': 'created'})
+    sis_import = wait_for_import(account, sis_import, timeout=settings.GUEST_SIS_IMPORT_TASK_TIMEOUT)
+    if not is_import_finished(sis_import):
+        if attempt < MAX_FINISH_ATTEMPTS:
+            logger.info(f"SIS import {sis_import_id} is still {sis_import.workflow_state}, waiting for it again")
+            queue_finish_guest_sis_import(sis_import_id, users, attempt + 1)
+        else:
+            logger.error(f"Gave up on SIS import {sis_import_id}, still {sis_import.workflow_state}; its {len(users)} guests weren't invited")
+        return {'state': sis_import.workflow_state, 'invited': 0}
+
+    created = [result['email'] for result in import_results(users, sis_import) if isinstance(result, dict)]
+    invalidate_canvas_users(user['email'] for user in users)
+    if created:
+        enqueue_emails(created, external_user_email_subject, email_body())
+    logger.info(f"SIS import {sis_import_id} is {sis_import.workflow_state}, queued invitations to {len(created)} of {len(users)} guests")
+    return {'state': sis_import.workflow_state, 'invited': len(created)}
@@ -19,11 +19,12 @@ from backend.ccm.canvas_api.canvas_credential_manager import CanvasCredentialMan
 from backend.ccm.canvas_api.constants import MAX_CONCURRENCY, MAX_SEARCH_COURSES, CANVAS_ROOT_ACCOUNT_ID
 from backend.ccm.canvas_api.exceptions import CanvasErrorHandler, HTTPAPIError
 from backend.ccm.canvas_api.canvasapi_serializer import AdminSectionsQuerySerializer, CanvasObjectROSerializer
+from backend.ccm.canvas_api.sections_streaming import STREAM_QUERY_PARAM, CourseSectionsStreamMixin
 from backend.ccm.utils import timeit
 
 logger = logging.getLogger(__name__)
 
-class CanvasAdminSectionsAPIHandler(LoggingMixin, APIView):
+class CanvasAdminSectionsAPIHandler(CourseSectionsStreamMixin, LoggingMixin, APIView):
     """
     API handler for "merge-able" sections data for users with admin access
     """
@@ -65,6 +66,14 @@ class CanvasAdminSectionsAPIHandler(LoggingMixin, APIView):
                 location=OpenApiParameter.QUERY,
                 required=False,
                 description="Course name to filter courses. Provide either this or instructor_name."
+            ),
+            OpenApiParameter(
+                name=STREAM_QUERY_PARAM,
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                enum=['ndjson'],
+                description="Set to `ndjson` to stream one course per line as soon as its sections are fetched."
             )
         ],
     )
@@ -119,6 +128,8 @@ class CanvasAdminSectionsAPIHandler(LoggingMixin, APIView):
                 return Response(self.canvas_error.to_dict(), status=self.canvas_error.to_dict().get('statusCode'))
             
             #3. Attach sections to course results
+            if self.wants_stream(request):
+                return self.stream_courses_with_sections(request, courses_response, course_instance_map)
             start_time_sections: float = time.perf_counter()
             sections_success, sections_response = self._attach_sections_to_courses(courses_response, course_instance_map)
             logger.info(f"getting sections to courses {len(courses_response)} took {timedelta(seconds=(time.perf_counter() - start_time_sections))} seconds")
@@ -1,7 +1,6 @@
 import logging
 import asyncio
 from http import HTTPStatus
-from datetime import datetime
 from rest_framework.views import APIView
 from rest_framework_tracking.mixins import LoggingMixin
 from rest_framework import authentication, permissions
@@ -12,11 +11,16 @@ from canvasapi import Canvas
 from canvasapi.account import Account
 from asgiref.sync import async_to_sync
 from canvasapi.exceptions import CanvasException
+from django.conf import settings
 from backend.ccm.canvas_api.canvas_credential_manager import CanvasCredentialManager
 from backend.ccm.canvas_api.canvasapi_serializer import CanvasObjectROSerializer, ExternalUsersRequestSerializer
 from .exceptions import CanvasErrorHandler, HTTPAPIError, ExternalUserCreationAndInvitationErrorHandler
 from backend.ccm.canvas_api.constants import CANVAS_ROOT_ACCOUNT_ID, MAX_CONCURRENCY
-from django_q.tasks import async_task
+from backend.ccm.canvas_api.sis_user_import import PendingGuest, create_users_by_sis_import
+from backend.ccm.canvas_api.user_lookup import invalidate_canvas_users
+from backend.ccm.background_tasks.email_outbox import enqueue_emails
+from backend.ccm.background_tasks.guest_sis_import_task import queue_finish_guest_sis_import
+from backend.ccm.background_tasks.send_email_non_umich_user_task import email_body, external_user_email_subject
 from backend.ccm.utils import timeit
 
 
@@ -82,7 +86,8 @@ class CanvasCreateUserHandler(LoggingMixin, APIView):
     def process_user_creation_outcomes(self, users: list[ExternalUserDict], results: list[object]) -> tuple[list[dict], list[str]]:
         """
         Processes the results of user creation attempts and returns:
-        - external_user_data: list of dicts with user creation status
+        - external_user_data: list of dicts with user creation status, 'pending' for the users of a SIS import still
+          running, who are invited once it's done
         - new_user_email_invitation_list: list of emails for successfully created users
         """
         external_user_data = []
@@ -95,6 +100,11 @@ class CanvasCreateUserHandler(LoggingMixin, APIView):
                     'email': user['email'],
                     'userCreated': True
                 })
+            elif isinstance(result, PendingGuest):
+                external_user_data.append({
+                    'email': user['email'],
+                    'userCreated': 'pending'
+                })
             elif isinstance(result, HTTPAPIError):
                 is_user_created = self.canvas_error.is_canvas_user_created(result)
                 # If user already exists, userCreated should be False, and do not include 'invited'
@@ -106,23 +116,41 @@ class CanvasCreateUserHandler(LoggingMixin, APIView):
 
     def is_external_users_invitation_success(self, new_user_email_invitation_list: List[str]) -> bool | Exception:
         """
-        The users who got successfully created is sent out an email invitation. This is run as
-        background task. This can handle bulk sending email based on the request received
+        The users who got successfully created is sent out an email invitation. The invitations are queued in the
+        email outbox, which a background worker sends in bulk.
         """
-        timestamp = datetime.now().strftime('%Y/%m/%d-%H:%M:%S-%f')
-        task_name = f'external-user-email-{len(new_user_email_invitation_list)}-{timestamp}'
         try:
-          email_task_id = async_task('backend.ccm.background_tasks.send_email_non_umich_user_task.sending_emails', 
-                                    task_params=new_user_email_invitation_list, task_name=task_name)
-          logger.info(f"Async task for email sending initiated with task ID: {email_task_id}")
+          emails = enqueue_emails(new_user_email_invitation_list, external_user_email_subject, email_body())
+          logger.info(f"Queued {len(emails)} invitation emails in the email outbox")
           return True
         except Exception as e:
-            logger.error(f"Failed to initiate email sending task: {e}")
+            logger.error(f"Failed to queue invitation emails: {e}")
             return e
 
 
+    def create_users(self, users: List[ExternalUserDict]) -> list[dict | HTTPAPIError]:
+        """
+        Create the users in Canvas, one API call each, or, from GUEST_SIS_IMPORT_MIN_USERS users on, with a single
+        SIS users.csv import on the root account. Users the import couldn't be submitted for are created one by one.
+        When the import is still running, a background task invites its users once it's done.
+        """
+        if len(users) >= settings.GUEST_SIS_IMPORT_MIN_USERS:
+            canvas_api: Canvas = self.credential_manager.get_canvasapi_admin_instance()
+            account = Account(canvas_api._Canvas__requester, {'id': CANVAS_ROOT_ACCOUNT_ID})
+            try:
+                results = create_users_by_sis_import(canvas_api, account, users)
+                invalidate_canvas_users(user['email'] for user, result in zip(users, results) if isinstance(result, dict))
+                pending = [result for result in results if isinstance(result, PendingGuest)]
+                if pending:
+                    pending_emails = {result.email for result in pending}
+                    queue_finish_guest_sis_import(pending[0].sis_import_id, [user for user in users if user['email'] in pending_emails])
+                return results
+            except CanvasException as e:
+                logger.error(f"Failed to submit SIS import of {len(users)} guest users, creating them one by one: {e}")
+        return self.create_users_one_by_one(users)
+
     @async_to_sync
-    async def create_users(self, users: List[ExternalUserDict]):
+    async def create_users_one_by_one(self, users: List[ExternalUserDict]):
         tasks = [self.create_user_concurrent_action(user) for user in users]
         return await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -162,9 +190,11 @@ class CanvasCreateUserHandler(LoggingMixin, APIView):
               },
               force_validations=False
           )
-          append_fields = {'login_id': loginId, 'email': email}
-          serializer = CanvasObjectROSerializer(created_user, allowed_fields=self.allowed_fields, append_fields=append_fields)
-          return serializer.data
         except (CanvasException, Exception) as e:
             raise HTTPAPIError(loginId, e)
+        # A lookup of the guest cached before they were created would still find no user
+        invalidate_canvas_users([email])
+        append_fields = {'login_id': loginId, 'email': email}
+        serializer = CanvasObjectROSerializer(created_user, allowed_fields=self.allowed_fields, append_fields=append_fields)
+        return serializer.data
 
@@ -1,10 +1,10 @@
 import logging
 from django.conf import settings
-from canvas_oauth.oauth import get_oauth_token
 from rest_framework.request import Request
 from canvas_oauth.exceptions import InvalidOAuthReturnError
 
 from canvasapi import Canvas
+from .canvas_token_cache import get_cached_oauth_token
 from .exceptions import CanvasAccessTokenException 
 
 logger = logging.getLogger(__name__)
@@ -17,7 +17,7 @@ class CanvasCredentialManager:
   
   def get_canvasapi_instance(self, request: Request) -> Canvas:
     try:
-      access_token = get_oauth_token(request)
+      access_token = get_cached_oauth_token(request)
     except InvalidOAuthReturnError as e:
       # This issue occurred during non-prod Canvas sync when the API key was deleted, but the token remained in CCM databases. Expired token will trigger the usecase.
       logger.error(f"InvalidOAuthReturnError for user: {request.user}. Remove invalid refresh_token and prompt for reauthentication.")
@@ -0,0 +1,83 @@
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from canvas_oauth.models import CanvasOAuth2Token
+from canvas_oauth.oauth import get_oauth_token
+
+from .constants import OAUTH_TOKEN_LOCK_POLL_INTERVAL, OAUTH_TOKEN_LOCK_TIMEOUT, OAUTH_TOKEN_LOCK_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+def _token_cache_key(user_id) -> str:
+    return f"ccm:canvas_oauth_token:{user_id}"
+
+
+def _refresh_lock_key(user_id) -> str:
+    return f"ccm:canvas_oauth_token_refresh:{user_id}"
+
+
+def _cache_token(request, access_token: str) -> None:
+    """
+    Cache the access token until it enters the expiration buffer, so a cached token never needs a refresh.
+    Only the token stored for the user is cached, since its expiry is what decides the timeout.
+    """
+    try:
+        token = request.user.canvas_oauth2_token
+    except CanvasOAuth2Token.DoesNotExist:
+        return
+    if token.access_token != access_token or token.expires is None:
+        return
+    timeout = (token.expires - timezone.now() - settings.CANVAS_OAUTH_TOKEN_EXPIRATION_BUFFER).total_seconds()
+    if timeout > 0:
+        cache.set(_token_cache_key(request.user.pk), access_token, timeout=int(timeout))
+
+
+def get_cached_oauth_token(request) -> str:
+    """
+    Return the Canvas access token of the request user from the cache, falling back to `get_oauth_token`.
+    Only one request per user runs `get_oauth_token` (and so the refresh) at a time, across processes, under a
+    lock in the cache; the others wait for the token it caches. Exceptions from `get_oauth_token` are raised as is.
+    """
+    user_id = request.user.pk
+    access_token = cache.get(_token_cache_key(user_id))
+    if access_token is not None:
+        return access_token
+
+    lock_key = _refresh_lock_key(user_id)
+    lock_owner = uuid.uuid4().hex
+    deadline = time.monotonic() + OAUTH_TOKEN_LOCK_WAIT
+    while not cache.add(lock_key, lock_owner, timeout=OAUTH_TOKEN_LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            logger.warning(f"Timed out waiting for the Canvas token refresh of user: {request.user}, getting the token directly.")
+            return get_oauth_token(request)
+        time.sleep(OAUTH_TOKEN_LOCK_POLL_INTERVAL)
+        access_token = cache.get(_token_cache_key(user_id))
+        if access_token is not None:
+            return access_token
+
+    try:
+        # Another request may have cached the token between the first lookup and taking the lock
+        access_token = cache.get(_token_cache_key(user_id))
+        if access_token is None:
+            access_token = get_oauth_token(request)
+            _cache_token(request, access_token)
+        return access_token
+    finally:
+        # Don't release a lock that expired and was taken by another request
+        if cache.get(lock_key) == lock_owner:
+            cache.delete(lock_key)
+
+
+def invalidate_cached_oauth_token(user) -> None:
+    cache.delete(_token_cache_key(user.pk))
+
+
+def delete_canvas_oauth_token(user) -> None:
+    """ Delete the user's Canvas OAuth token along with its cached access token. """
+    CanvasOAuth2Token.objects.filter(user=user).delete()
+    invalidate_cached_oauth_token(user)
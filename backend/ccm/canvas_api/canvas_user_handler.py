@@ -6,9 +6,10 @@ from rest_framework import authentication, permissions
 from rest_framework.request import Request
 from rest_framework.response import Response
 from canvasapi import Canvas
-from canvasapi.exceptions import CanvasException
+from canvasapi.exceptions import CanvasException, ResourceDoesNotExist
 from backend.ccm.canvas_api.canvas_credential_manager import CanvasCredentialManager
-from backend.ccm.canvas_api.canvasapi_serializer import CanvasObjectROSerializer, LoginIdSerializer
+from backend.ccm.canvas_api.canvasapi_serializer import LoginIdSerializer, LoginIdsSerializer
+from backend.ccm.canvas_api.user_lookup import get_cached_canvas_user, lookup_users
 from .exceptions import CanvasErrorHandler, HTTPAPIError
 
 logger = logging.getLogger(__name__)
@@ -17,7 +18,6 @@ class CanvasUserHandler(LoggingMixin, APIView):
     logging_methods = ['GET']
     authentication_classes = [authentication.SessionAuthentication]
     permission_classes = [permissions.IsAuthenticated]
-    user_allowed_fields = ['name']   
     serializer_class = LoginIdSerializer
 
     def __init__(self, credential_manager=None):
@@ -33,14 +33,47 @@ class CanvasUserHandler(LoggingMixin, APIView):
             return Response(self.canvas_error.to_dict(), status=self.canvas_error.to_dict().get('statusCode'))
         
         canvas_admin_api: Canvas = self.credential_manager.get_canvasapi_admin_instance()
-        safe_login_id: str = login_id.replace('@', '+')
         try:
-            user_info = canvas_admin_api.get_user(safe_login_id, 'sis_login_id')
-            append_fields ={"login_id": login_id}
-            serializer = CanvasObjectROSerializer(user_info, allowed_fields=self.user_allowed_fields, append_fields=append_fields)
-            return Response(serializer.data, status=HTTPStatus.OK)
+            user_info = get_cached_canvas_user(canvas_admin_api, login_id)
+            if user_info is None:
+                raise ResourceDoesNotExist('Not Found')
+            return Response(user_info, status=HTTPStatus.OK)
         except (CanvasException, Exception) as e:
             self.canvas_error.handle_canvas_api_exceptions(HTTPAPIError(str(login_id), e), True)
             return Response(self.canvas_error.to_dict(), status=self.canvas_error.to_dict().get('statusCode'))
-      
 
+
+class CanvasUsersLookupHandler(LoggingMixin, APIView):
+    """
+    Looks up the Canvas users of many login ids in one request, returning the user (None when there is none) per
+    login id.
+    """
+    logging_methods = ['POST']
+    authentication_classes = [authentication.SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = LoginIdsSerializer
+
+    def __init__(self, credential_manager=None):
+        self.credential_manager = credential_manager or CanvasCredentialManager()
+        self.canvas_error = CanvasErrorHandler()
+        super().__init__()
+
+    def handle_log(self) -> None:
+        # The request is logged without its login ids and the response without its users, thousands of them per row
+        self.log.update({'data': '', 'query_params': '', 'response': ''})
+        super().handle_log()
+
+    def post(self, request: Request) -> Response:
+        serializer = LoginIdsSerializer(data=request.data)
+        if not serializer.is_valid():
+            self.canvas_error.handle_serializer_errors(serializer.errors, str(request.data))
+            return Response(self.canvas_error.to_dict(), status=self.canvas_error.to_dict().get('statusCode'))
+
+        canvas_admin_api: Canvas = self.credential_manager.get_canvasapi_admin_instance()
+        users, errors = lookup_users(canvas_admin_api, serializer.validated_data['login_ids'])
+        if not errors:
+            return Response(users, status=HTTPStatus.OK)
+        # The users that were looked up are returned along with the errors
+        self.canvas_error.handle_canvas_api_exceptions(errors, True)
+        error_response = {**self.canvas_error.to_dict(), 'users': users}
+        return Response(error_response, status=error_response.get('statusCode'))
@@ -1,5 +1,15 @@
+import re
+from collections.abc import Mapping
+
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .constants import ALLOWED_ROLES, MAX_ALLOWED_ENROLLMENTS
+from rest_framework.fields import empty, get_error_detail
+from rest_framework.settings import api_settings
+from rest_framework.utils import html
+from .constants import ALLOWED_ROLES, MAX_ALLOWED_ENROLLMENTS, MAX_USER_LOOKUP_LOGIN_IDS
+
+# A uniqname/login ID, or an email address for non-UMich users (see enroll_users.process_login_id)
+LOGIN_ID_RE = re.compile(r'^[^\s@]+(@[^\s@]+\.[^\s@]+)?$')
 
 class CourseSerializer(serializers.Serializer):
     # Define the fields you want to update. Adjust fields according to the Canvas API.
@@ -19,34 +29,115 @@ class SectionUsersSerializer(serializers.Serializer):
     loginId = serializers.CharField(required=True)
     role = serializers.CharField(required=True)
 
-class RoleValidationMixin:
+class EnrollmentRowsField(serializers.ListField):
+    """
+    List of enrollment rows validated against the fields of `row_serializer` in a single loop, instead of running
+    a nested `row_serializer(many=True)` per row. Plain string and integer values are accepted as is, anything else
+    goes through the row serializer's own field, so the errors are the same as the nested serializer reports.
+    The row serializer must only declare fields (no `validate*` hooks), those would not be run here.
+    """
+    default_error_messages = serializers.ListSerializer.default_error_messages
+
+    def __init__(self, row_serializer, **kwargs):
+        kwargs['child'] = row_serializer()
+        super().__init__(**kwargs)
+
+    @staticmethod
+    def _fast_type(field):
+        if type(field) is serializers.CharField and field.max_length is None and field.min_length is None:
+            return str
+        if type(field) is serializers.IntegerField and field.max_value is None and field.min_value is None:
+            return int
+        return None
+
+    @staticmethod
+    def _is_plain_value(value, fast_type) -> bool:
+        if fast_type is str:
+            # CharField would strip, and prohibits NUL and surrogate characters
+            return bool(value) and value.isascii() and '\x00' not in value and not value[0].isspace() and not value[-1].isspace()
+        return -2**63 <= value < 2**63
+
+    def to_internal_value(self, data):
+        if html.is_html_input(data):
+            data = html.parse_html_list(data, default=[])
+        if not isinstance(data, list):
+            message = self.error_messages['not_a_list'].format(input_type=type(data).__name__)
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]}, code='not_a_list')
+        if not self.allow_empty and len(data) == 0:
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [self.error_messages['empty']]}, code='empty')
+
+        plan = [(name, field, self._fast_type(field)) for name, field in self.child.fields.items()]
+        invalid_row = self.child.error_messages['invalid']
+        validated, errors = [], []
+        for row in data:
+            if not isinstance(row, Mapping):
+                errors.append({api_settings.NON_FIELD_ERRORS_KEY: [invalid_row.format(datatype=type(row).__name__)]})
+                continue
+            values, row_errors = {}, {}
+            for name, field, fast_type in plan:
+                value = row.get(name, empty)
+                if fast_type is not None and type(value) is fast_type and self._is_plain_value(value, fast_type):
+                    values[name] = value
+                    continue
+                try:
+                    values[name] = field.run_validation(value)
+                except serializers.ValidationError as exc:
+                    row_errors[name] = exc.detail
+                except DjangoValidationError as exc:
+                    row_errors[name] = get_error_detail(exc)
+            errors.append(row_errors)
+            if not row_errors:
+                validated.append(values)
+
+        if len(validated) != len(data):
+            raise serializers.ValidationError(errors)
+        return validated
+
+class EnrollmentValidationMixin:
     # Accept all roles from ClientEnrollmentType (case-insensitive)
     ALLOWED_ROLES = set(ALLOWED_ROLES)
 
-    def validate_roles(self, items, item_type='user'):
+    def validate_enrollment_rows(self, items, duplicate_key=('loginId',), seen=None, line_numbers=None):
+        """
+        Check roles, login ID format and duplicate rows in one pass. Login IDs are compared case-insensitively,
+        the same way they are sent to Canvas. Pass `seen` to also catch duplicates across separately validated chunks,
+        and the `line_numbers` of the rows in their file to report the line of each invalid row.
+        """
         errors = []
-        for item in items:
+        seen = set() if seen is None else seen
+        allowed_roles = self.ALLOWED_ROLES
+        for index, item in enumerate(items):
             role = item.get('role')
             login_id = item.get('loginId')
-            if not role or role.lower() not in self.ALLOWED_ROLES:
-                errors.append({
-                    'loginId': login_id,
-                    'role': role,
-                    'error': f"Role '{role}' is not allowed. Allowed roles: {', '.join(sorted(self.ALLOWED_ROLES))}."
-                })
+            if not role or role.lower() not in allowed_roles:
+                error = f"Role '{role}' is not allowed. Allowed roles: {', '.join(sorted(allowed_roles))}."
+            elif not LOGIN_ID_RE.match(login_id):
+                error = f"Login ID '{login_id}' is not a valid uniqname or email address."
+            else:
+                key = tuple(item[field].lower() if field == 'loginId' else item[field] for field in duplicate_key)
+                if key not in seen:
+                    seen.add(key)
+                    continue
+                error = f"Login ID '{login_id}' is listed more than once."
+            line = {'line': line_numbers[index]} if line_numbers is not None else {}
+            errors.append({**line, 'loginId': login_id, 'role': role, 'error': error})
         if errors:
             raise serializers.ValidationError(errors)
 
-class SingleSectionEnrollRequestSerializer(serializers.Serializer, RoleValidationMixin):
-    users = SectionUsersSerializer(many=True)
+class SingleSectionEnrollRequestSerializer(serializers.Serializer, EnrollmentValidationMixin):
+    users = EnrollmentRowsField(SectionUsersSerializer)
 
-    def validate(self, data):
-        users = data.get('users', [])
-        if len(users) > MAX_ALLOWED_ENROLLMENTS:
+    def to_internal_value(self, data):
+        # Reject oversized requests before validating any rows
+        users = data.get('users') if isinstance(data, Mapping) else None
+        if isinstance(users, list) and len(users) > MAX_ALLOWED_ENROLLMENTS:
             raise serializers.ValidationError({
                 'users': f'Cannot enroll more than {MAX_ALLOWED_ENROLLMENTS} users in a single request.'
             })
-        self.validate_roles(users, item_type='user')
+        return super().to_internal_value(data)
+
+    def validate(self, data):
+        self.validate_enrollment_rows(data.get('users', []))
         return data
 
 class MultiSectionEnrollSerializer(serializers.Serializer):
@@ -54,13 +145,19 @@ class MultiSectionEnrollSerializer(serializers.Serializer):
     loginId = serializers.CharField(required=True)
     role = serializers.CharField(required=True)
 
-class MultiSectionEnrollRequestSerializer(serializers.Serializer, RoleValidationMixin):
-    enrollments = MultiSectionEnrollSerializer(many=True)
+class MultiSectionEnrollRequestSerializer(serializers.Serializer, EnrollmentValidationMixin):
+    enrollments = EnrollmentRowsField(MultiSectionEnrollSerializer)
 
     def validate(self, data):
-        self.validate_roles(data.get('enrollments', []), item_type='enrollment')
+        self.validate_enrollment_rows(
+            data.get('enrollments', []), duplicate_key=('sectionId', 'loginId'), seen=self.context.get('seen_enrollments'),
+            line_numbers=self.context.get('line_numbers')
+        )
         return data
     
+class EnrollmentCsvUploadSerializer(serializers.Serializer):
+    file = serializers.FileField(required=True, allow_empty_file=False)
+
 class AdminSectionsQuerySerializer(serializers.Serializer):
     term_id = serializers.CharField(required=True)
     instructor_name = serializers.CharField(required=False, allow_null=True)
@@ -152,6 +249,9 @@ class CanvasObjectROSerializer(serializers.BaseSerializer):
 class LoginIdSerializer(serializers.Serializer):
     login_id = serializers.EmailField()
 
+class LoginIdsSerializer(serializers.Serializer):
+    login_ids = serializers.ListField(child=serializers.EmailField(), allow_empty=False, max_length=MAX_USER_LOOKUP_LOGIN_IDS)
+
 # Serializer for validating external users payload
 class ExternalUserSerializer(serializers.Serializer):
     email = serializers.EmailField(required=True)
@@ -13,8 +13,22 @@ ALLOWED_ROLES = (
 # Maximum number of enrollments allowed in a single section enrollment request
 MAX_ALLOWED_ENROLLMENTS = 5000
 
+# Rows validated and stored together when an enrollment CSV is uploaded, also the unit of work for the enrollment job
+ENROLLMENT_UPLOAD_CHUNK_SIZE = 500
+# Validation errors reported back for an uploaded enrollment CSV, the rest are only counted
+MAX_REPORTED_UPLOAD_ERRORS = 100
+# CSV headers of the multi section enrollment file and the enrollment fields they map to
+ENROLLMENT_CSV_COLUMNS = {
+    'LOGIN_ID': 'loginId',
+    'ROLE': 'role',
+    'SECTION_ID': 'sectionId',
+}
+
 MAX_SEARCH_COURSES = 400
 
+# Maximum number of login ids looked up in a single user lookup request
+MAX_USER_LOOKUP_LOGIN_IDS = 5000
+
 ROLE_TO_ENROLLMENT_TYPE = {
     role: f"{role.capitalize()}Enrollment"
     for role in ALLOWED_ROLES
@@ -24,3 +38,9 @@ ROLE_TO_ENROLLMENT_TYPE = {
 MAX_CONCURRENCY = 10
 CANVAS_ROOT_ACCOUNT_ID = 1
 
+
+# Seconds the per-user Canvas token refresh lock is held at most, in case the holder dies mid-refresh
+OAUTH_TOKEN_LOCK_TIMEOUT = 30
+# Seconds a request waits on another request's token refresh before getting the token itself
+OAUTH_TOKEN_LOCK_WAIT = 10
+OAUTH_TOKEN_LOCK_POLL_INTERVAL = 0.05
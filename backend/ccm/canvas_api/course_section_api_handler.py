@@ -169,46 +169,45 @@ class CanvasMergeSectionsToCourseView(LoggingMixin, APIView):
         logger.info(f"Merging {len(section_ids)} sections into course_id: {course_id}")
         canvas_api: Canvas = self.credential_manager.get_canvasapi_instance(request)
 
-        try:
-            merge_success, merge_response = self._merge_sections(canvas_api, course_id, section_ids)
-
-            if not merge_success:
-                self.canvas_error.handle_canvas_api_exceptions(merge_response)
-                return Response(self.canvas_error.to_dict(), status=self.canvas_error.to_dict().get('statusCode'))
-            logger.info(f"Successfully merged {len(section_ids)} sections into course_id: {course_id}")
+        results = self._merge_sections(canvas_api, course_id, section_ids)
+        failed = sum(isinstance(result, HTTPAPIError) for result in results)
+        logger.info(f"Merged {len(section_ids) - failed}/{len(section_ids)} sections into course_id: {course_id}")
+        return crosslist_response(self.canvas_error, section_ids, results)
 
-            serializer = CanvasObjectROSerializer(merge_response, allowed_fields=CanvasCourseSectionAPIHandler.base_course_section_allwed_fields, many=True)
-            return Response(serializer.data, status=HTTPStatus.OK)
-        
-        except (HTTPAPIError) as e:
-            self.canvas_error.handle_canvas_api_exceptions(e)
-            logger.error(f"Error merging sections into course_id {course_id}: {e}")
-            return Response(self.canvas_error.to_dict(), status=self.canvas_error.to_dict().get('statusCode'))
-    
     @async_to_sync
-    async def _merge_sections(self, canvas_api: Canvas, course_id: int, section_ids: list[int]):
+    async def _merge_sections(self, canvas_api: Canvas, course_id: int, section_ids: list[int]) -> list[Section | HTTPAPIError]:
         """
-        Merge sections to a course via the Canvas crosslist endpoint.
+        Merge sections to a course via the Canvas crosslist endpoint, MAX_CONCURRENCY at a time.
 
-        Uses a semaphore for bounded concurrency. If any task fails, returned
-        errors are collected in task-completion order, which is non-deterministic.
-        Returns a tuple of (success, results_or_errors).
+        Sections already merged into the course are skipped, so retrying a partly failed merge only crosslists
+        the sections that failed. Returns the merged section, or the HTTPAPIError it failed with, of each
+        section in input order.
         """
-        max_concurrent = MAX_CONCURRENCY 
-        semaphore = asyncio.Semaphore(max_concurrent)
-        errors = []
-        tasks = [api_task_with_semaphore(
-            semaphore,
-            errors,
-            self._merge_section_sync,
-            canvas_api,
-            section_id,
-            course_id
-        ) for section_id in section_ids]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        merged_sections = await asyncio.to_thread(self._merged_sections, canvas_api, course_id)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
 
-        success = len(errors) == 0
-        return success, results if success else errors
+        async def merge_section(section_id: int):
+            if section_id in merged_sections:
+                logger.debug(f"Section {section_id} is already merged into course_id: {course_id}")
+                return merged_sections[section_id]
+            return await api_task_with_semaphore(semaphore, self._merge_section_sync, canvas_api, section_id, course_id)
+
+        return await asyncio.gather(*(merge_section(section_id) for section_id in section_ids))
+
+    def _merged_sections(self, canvas_api: Canvas, course_id: int) -> dict[int, Section]:
+        """
+        The sections merged into the course by id, those of its sections with a nonxlist_course_id. None are
+        skipped when the course sections can't be listed, merging them again is harmless.
+        """
+        try:
+            course = Course(canvas_api._Canvas__requester, {'id': course_id})
+            return {
+                section.id: section for section in course.get_sections(per_page=100)
+                if getattr(section, 'nonxlist_course_id', None) is not None
+            }
+        except (CanvasException, Exception) as e:
+            logger.warning(f"Failed to list the sections of course_id {course_id}, merging all sections: {e}")
+            return {}
     
     def _merge_section_sync(self,canvas_api: Canvas, section_id:int, course_id: int):
         """
@@ -251,44 +250,23 @@ class CanvasUnmergeSectionsView(LoggingMixin, APIView):
         logger.info(f"Unmerging {len(section_ids)} section(s)")
         canvas_api: Canvas = self.credential_manager.get_canvasapi_instance(request)
 
-        try:
-            unmerge_success, unmerge_response = self._unmerge_sections(canvas_api, section_ids)
-
-            if not unmerge_success:
-                self.canvas_error.handle_canvas_api_exceptions(unmerge_response)
-                return Response(self.canvas_error.to_dict(), status=self.canvas_error.to_dict().get('statusCode'))
-            logger.info(f"Successfully unmerged {len(section_ids)} section(s)")
+        results = self._unmerge_sections(canvas_api, section_ids)
+        failed = sum(isinstance(result, HTTPAPIError) for result in results)
+        logger.info(f"Unmerged {len(section_ids) - failed}/{len(section_ids)} section(s)")
+        return crosslist_response(self.canvas_error, section_ids, results)
 
-            serializer = CanvasObjectROSerializer(unmerge_response, allowed_fields=CanvasCourseSectionAPIHandler.base_course_section_allwed_fields, many=True)
-            return Response(serializer.data, status=HTTPStatus.OK)
-        except (HTTPAPIError) as e:
-            self.canvas_error.handle_canvas_api_exceptions(e)
-            logger.error(f"Error unmerging section(s): {e}")
-            return Response(self.canvas_error.to_dict(), status=self.canvas_error.to_dict().get('statusCode'))
-        
     @async_to_sync
-    async def _unmerge_sections(self, canvas_api: Canvas, section_ids: list[int]):
+    async def _unmerge_sections(self, canvas_api: Canvas, section_ids: list[int]) -> list[Section | HTTPAPIError]:
         """
-        Unmerge sections via the Canvas un-crosslist endpoint.
+        Unmerge sections via the Canvas un-crosslist endpoint, MAX_CONCURRENCY at a time.
 
-        Uses a semaphore for bounded concurrency. If any task fails, returned
-        errors are collected in task-completion order, which is non-deterministic.
-        Returns a tuple of (success, results_or_errors).
+        Returns the unmerged section, or the HTTPAPIError it failed with, of each section in input order.
         """
-        max_concurrent = MAX_CONCURRENCY 
-        semaphore = asyncio.Semaphore(max_concurrent)
-        errors = []
-        tasks = [api_task_with_semaphore(
-            semaphore,
-            errors,
-            self._unmerge_section_sync,
-            canvas_api,
-            section_id
-        ) for section_id in section_ids]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        success = len(errors) == 0
-        return success, results if success else errors
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+        return await asyncio.gather(*(
+            api_task_with_semaphore(semaphore, self._unmerge_section_sync, canvas_api, section_id)
+            for section_id in section_ids
+        ))
     
     def _unmerge_section_sync(self,canvas_api: Canvas, section_id:int):
         """
@@ -306,16 +284,34 @@ class CanvasUnmergeSectionsView(LoggingMixin, APIView):
     
 async def api_task_with_semaphore(
     semaphore: asyncio.Semaphore, 
-    errors: list, 
     sync_func: callable, 
     *args, 
     **kwargs):
     """ 
     Run a synchronous function within a semaphore to limit concurrency,
-    capturing errors in a separate list.
+    returning the HTTPAPIError it failed with instead of raising it.
     """
     async with semaphore:
         try:
             return await asyncio.to_thread(sync_func, *args, **kwargs)
         except Exception as e:
-            errors.append(e if isinstance(e, HTTPAPIError) else HTTPAPIError(str(args), e))
\ No newline at end of file
+            return e if isinstance(e, HTTPAPIError) else HTTPAPIError(str(args), e)
+
+def crosslist_response(canvas_error: CanvasErrorHandler, section_ids: list[int], results: list[Section | HTTPAPIError]) -> Response:
+    """
+    Response of a merge or unmerge: the sections when all succeeded, otherwise the errors in input order along
+    with the sections that succeeded and the ids of the sections that failed, the ones to retry.
+    """
+    sections = [result for result in results if not isinstance(result, HTTPAPIError)]
+    serializer = CanvasObjectROSerializer(sections, allowed_fields=CanvasCourseSectionAPIHandler.base_course_section_allwed_fields, many=True)
+    errors = [result for result in results if isinstance(result, HTTPAPIError)]
+    if not errors:
+        return Response(serializer.data, status=HTTPStatus.OK)
+
+    canvas_error.handle_canvas_api_exceptions(errors)
+    error_response = {
+        **canvas_error.to_dict(),
+        'sections': serializer.data,
+        'failedSectionIds': [section_id for section_id, result in zip(section_ids, results) if isinstance(result, HTTPAPIError)],
+    }
+    return Response(error_response, status=error_response.get('statusCode'))
\ No newline at end of file
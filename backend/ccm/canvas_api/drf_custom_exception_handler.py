@@ -1,8 +1,8 @@
 import logging
 from rest_framework.views import exception_handler
 from rest_framework.response import Response
-from canvas_oauth.models import CanvasOAuth2Token
 from http import HTTPStatus
+from .canvas_token_cache import delete_canvas_oauth_token
 from .exceptions import CanvasAccessTokenException
 
 logger = logging.getLogger(__name__)
@@ -12,7 +12,7 @@ def custom_exception_handler(exc, context):
     request = context.get('request')
     response = exception_handler(exc, context)
     if isinstance(exc, CanvasAccessTokenException):
-        CanvasOAuth2Token.objects.filter(user=request.user).delete()
+        delete_canvas_oauth_token(request.user)
         logger.error(f"Deleted the Canvas OAuth2 token for user: {request.user} due to invalid canvas access token.")
         data = exc.to_dict()
         return Response(data, status=data.get("statusCode", HTTPStatus.UNAUTHORIZED.value))
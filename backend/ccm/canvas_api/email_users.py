@@ -1,11 +1,127 @@
 import logging
+from email.utils import formatdate, make_msgid
 from smtplib import SMTPException
+from typing import Dict, List
 from django.conf import settings
 from django.core.mail import EmailMessage
 from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import DNS_NAME, forbid_multi_line_headers
 
 logger = logging.getLogger(__name__)
 
+def build_email(
+    to_email: str,
+    subject: str,
+    body: str,
+    attachment: tuple = None,
+    connection: BaseEmailBackend = None
+) -> EmailMessage:
+    """
+    Build the HTML email to the user, see send_email for the arguments.
+    """
+    # Prefix subject if EMAIL_DEBUG is True
+    email_subject = subject
+    if getattr(settings, 'EMAIL_DEBUG', False):
+        email_subject = f"Test Email - {subject}"
+    email = EmailMessage(
+        subject=email_subject,
+        body=body,
+        from_email=settings.EMAIL_FROM,
+        to=[to_email],
+        reply_to=[settings.EMAIL_TO_REPLY],
+        connection=connection
+    )
+    email.content_subtype = "html"
+    if attachment:
+        filename, content, mime_type = attachment
+        email.attach(filename, content, mime_type)
+    return email
+
+# Headers that differ for each recipient of a bulk email, the rest of the message is encoded once
+PER_RECIPIENT_HEADERS = ('To', 'Date', 'Message-ID')
+
+
+class SharedEmailContent:
+    """
+    The headers and body of an email going to many recipients, built and encoded once.
+    """
+
+    def __init__(self, subject: str, body: str):
+        template = build_email('', subject, body)
+        template.to = []
+        self.encoding = template.encoding or settings.DEFAULT_CHARSET
+        self.mime = template.message()
+        for name in PER_RECIPIENT_HEADERS:
+            del self.mime[name]
+        self.subject = template.subject
+        self.body = template.body
+        self._encoded: Dict[str, bytes] = {}
+
+    def as_bytes(self, linesep: str) -> bytes:
+        encoded = self._encoded.get(linesep)
+        if encoded is None:
+            encoded = self._encoded[linesep] = self.mime.as_bytes(linesep=linesep)
+        return encoded
+
+
+class PrebuiltMIMEMessage:
+    """
+    The MIME message of one recipient: its own To, Date and Message-ID headers followed by the shared encoded
+    headers and body. Provides what the email backends use of a MIME message.
+    """
+
+    def __init__(self, shared: SharedEmailContent, to_email: str):
+        self.shared = shared
+        self.headers = {
+            'To': forbid_multi_line_headers('To', to_email, shared.encoding)[1],
+            'Date': formatdate(localtime=settings.EMAIL_USE_LOCALTIME),
+            'Message-ID': make_msgid(domain=DNS_NAME),
+        }
+
+    def __getitem__(self, name: str):
+        for header, value in self.headers.items():
+            if header.lower() == name.lower():
+                return value
+        return self.shared.mime[name]
+
+    def get_charset(self):
+        return self.shared.mime.get_charset()
+
+    def as_bytes(self, unixfrom: bool = False, linesep: str = '\n') -> bytes:
+        headers = ''.join(f'{name}: {value}{linesep}' for name, value in self.headers.items())
+        return headers.encode('ascii') + self.shared.as_bytes(linesep)
+
+    def as_string(self, unixfrom: bool = False, linesep: str = '\n') -> str:
+        return self.as_bytes(unixfrom, linesep).decode(self.shared.encoding)
+
+
+class PrebuiltEmailMessage(EmailMessage):
+    """ An EmailMessage to one recipient whose message is built from SharedEmailContent. """
+
+    def __init__(self, shared: SharedEmailContent, to_email: str, connection: BaseEmailBackend = None):
+        super().__init__(
+            subject=shared.subject,
+            body=shared.body,
+            from_email=settings.EMAIL_FROM,
+            to=[to_email],
+            reply_to=[settings.EMAIL_TO_REPLY],
+            connection=connection
+        )
+        self.content_subtype = "html"
+        self.shared = shared
+
+    def message(self) -> PrebuiltMIMEMessage:
+        return PrebuiltMIMEMessage(self.shared, self.to[0])
+
+
+def build_bulk_emails(to_emails: List[str], subject: str, body: str) -> List[EmailMessage]:
+    """
+    Build the same HTML email (without attachments) for each address. The subject, sender and body are encoded
+    once and shared by all the messages, only the To, Date and Message-ID headers are built per recipient.
+    """
+    shared = SharedEmailContent(subject, body)
+    return [PrebuiltEmailMessage(shared, to_email) for to_email in to_emails]
+
 def send_email(
     to_email: str,
     subject: str,
@@ -20,25 +136,9 @@ def send_email(
     - body: Email body as HTML
     - attachment: tuple (filename, content, mime_type) or None
     - connection: Django email backend connection for SMTP reuse. If not provided, the default connection is used.
-                  For sending bulk emails, it is recommended to pass a single connection explicitly to improve efficiency.
+                  For sending bulk emails, use backend.ccm.email_pool instead, a connection isn't safe to share between threads.
     """
     try:
-        # Prefix subject if EMAIL_DEBUG is True
-        email_subject = subject
-        if getattr(settings, 'EMAIL_DEBUG', False):
-            email_subject = f"Test Email - {subject}"
-        email = EmailMessage(
-            subject=email_subject,
-            body=body,
-            from_email=settings.EMAIL_FROM,
-            to=[to_email],
-            reply_to=[settings.EMAIL_TO_REPLY],
-            connection=connection
-        )
-        email.content_subtype = "html"
-        if attachment:
-            filename, content, mime_type = attachment
-            email.attach(filename, content, mime_type)
-        email.send()
+        build_email(to_email, subject, body, attachment, connection).send()
     except (SMTPException, Exception) as e:
-        logger.error(f"Failed to send enrollment email to {to_email}: {e}")
\ No newline at end of file
+        logger.error(f"Failed to send enrollment email to {to_email}: {e}")
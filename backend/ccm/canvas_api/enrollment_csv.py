@@ -0,0 +1,96 @@
+import csv
+import io
+import logging
+from typing import Iterator
+
+from django.core.files.uploadedfile import UploadedFile
+from rest_framework import serializers
+
+from backend.ccm.canvas_api.canvasapi_serializer import MultiSectionEnrollRequestSerializer
+from backend.ccm.canvas_api.constants import ENROLLMENT_CSV_COLUMNS, ENROLLMENT_UPLOAD_CHUNK_SIZE, MAX_REPORTED_UPLOAD_ERRORS
+from backend.ccm.models import EnrollmentJob, EnrollmentJobChunk
+
+logger = logging.getLogger(__name__)
+
+
+def iter_enrollment_csv_chunks(upload: UploadedFile, chunk_size: int = ENROLLMENT_UPLOAD_CHUNK_SIZE) -> Iterator[tuple[list[int], list[dict]]]:
+    """
+    Read the multi section enrollment CSV (LOGIN_ID, ROLE, SECTION_ID) row by row from the uploaded file, yielding
+    (line numbers, rows) for at most `chunk_size` rows at a time, keyed by the enrollment field names. Blank lines are skipped.
+    Only one chunk of rows is held in memory at a time. The file itself isn't streamed: Django's multipart parser spools
+    a large upload to a temporary file, and the first row is only read once the whole upload was received.
+    """
+    reader = csv.reader(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''))
+    header = next(reader, None)
+    if header is None:
+        raise serializers.ValidationError({'file': 'The CSV file is empty.'})
+    normalized = [column.strip().upper() for column in header]
+    missing = [column for column in ENROLLMENT_CSV_COLUMNS if column not in normalized]
+    if missing:
+        raise serializers.ValidationError({'file': f"The CSV file is missing the column(s): {', '.join(missing)}."})
+    positions = [(normalized.index(column), field) for column, field in ENROLLMENT_CSV_COLUMNS.items()]
+
+    line_numbers, rows = [], []
+    for line in reader:
+        if not any(value.strip() for value in line):
+            continue
+        line_numbers.append(reader.line_num)
+        rows.append({field: line[position] if position < len(line) else None for position, field in positions})
+        if len(rows) == chunk_size:
+            yield line_numbers, rows
+            line_numbers, rows = [], []
+    if rows:
+        yield line_numbers, rows
+
+
+def validate_enrollment_chunk(rows: list[dict], line_numbers: list[int], seen_enrollments: set) -> tuple[list[dict] | None, list[dict]]:
+    """
+    Validate the rows of one chunk, returning the validated enrollments (None when any row is invalid) and the errors
+    of the invalid rows, each with its line. The rows of a chunk with field errors that have none are still checked
+    for their role and login ID, and added to `seen_enrollments` so a later duplicate of them is reported.
+    """
+    serializer = MultiSectionEnrollRequestSerializer(
+        data={'enrollments': rows}, context={'seen_enrollments': seen_enrollments, 'line_numbers': line_numbers}
+    )
+    if serializer.is_valid():
+        return serializer.validated_data['enrollments'], []
+    if 'enrollments' not in serializer.errors:
+        # Role, login ID and duplicate errors carry their line
+        return None, list(serializer.errors.get('non_field_errors', []))
+    # Field errors are per row, the index matches the chunk
+    field_errors = serializer.errors['enrollments']
+    errors = [{'line': line_numbers[offset], **row_error} for offset, row_error in enumerate(field_errors) if row_error]
+    parsed = [offset for offset, row_error in enumerate(field_errors) if not row_error]
+    if parsed:
+        _, row_errors = validate_enrollment_chunk([rows[offset] for offset in parsed], [line_numbers[offset] for offset in parsed], seen_enrollments)
+        errors = sorted(errors + row_errors, key=lambda error: int(error['line']))
+    return None, errors
+
+
+def store_enrollment_csv(job: EnrollmentJob, upload: UploadedFile, chunk_size: int = ENROLLMENT_UPLOAD_CHUNK_SIZE) -> int:
+    """
+    Validate the uploaded CSV chunk by chunk and store each valid chunk as an EnrollmentJobChunk of `job`.
+    Raises a ValidationError listing (up to MAX_REPORTED_UPLOAD_ERRORS) invalid rows; call it inside a transaction
+    so the chunks stored before the error are rolled back. Returns the number of rows stored.
+    """
+    seen_enrollments = set()
+    errors = []
+    error_count = 0
+    total_rows = 0
+    for index, (line_numbers, rows) in enumerate(iter_enrollment_csv_chunks(upload, chunk_size)):
+        enrollments, chunk_errors = validate_enrollment_chunk(rows, line_numbers, seen_enrollments)
+        if chunk_errors:
+            error_count += len(chunk_errors)
+            errors.extend(chunk_errors[:MAX_REPORTED_UPLOAD_ERRORS - len(errors)])
+            continue
+        if error_count:
+            continue
+        EnrollmentJobChunk.objects.create(job=job, index=index, rows=enrollments)
+        total_rows += len(enrollments)
+
+    if error_count:
+        logger.info(f"Enrollment CSV {upload.name} for course {job.course_id} has {error_count} invalid row(s)")
+        raise serializers.ValidationError({'file': errors, 'errorCount': error_count})
+    if not total_rows:
+        raise serializers.ValidationError({'file': 'The CSV file has no enrollment rows.'})
+    return total_rows
@@ -1,5 +1,6 @@
 import logging
 import json
+import re
 from http import HTTPStatus
 from typing import List, Union
 from canvasapi.exceptions import (
@@ -13,6 +14,34 @@ from backend.ccm.canvas_api.constants import INSUFFICIENT_SCOPES_ON_ACCESS_TOKEN
 
 logger = logging.getLogger(__name__)
 
+# Categories bulk failures are grouped by, with the label shown to users
+ERROR_CATEGORY_LABELS = {
+    'not_found': 'User or section not found in Canvas',
+    'invalid_request': 'Rejected by Canvas as invalid',
+    'not_authorized': 'Not authorized in Canvas',
+    'rate_limited': 'Canvas rate limit exceeded',
+    'conflict': 'Conflicts with existing Canvas data',
+    'canvas_unavailable': 'Canvas unavailable or timed out',
+    'other': 'Other error',
+}
+STATUS_ERROR_CATEGORIES = {
+    HTTPStatus.NOT_FOUND.value: 'not_found',
+    HTTPStatus.BAD_REQUEST.value: 'invalid_request',
+    HTTPStatus.UNPROCESSABLE_ENTITY.value: 'invalid_request',
+    HTTPStatus.UNAUTHORIZED.value: 'not_authorized',
+    HTTPStatus.FORBIDDEN.value: 'not_authorized',
+    HTTPStatus.CONFLICT.value: 'conflict',
+}
+# For errors of other types, e.g. read back from a stored failure, the first matching message pattern wins
+ERROR_MESSAGE_CATEGORIES = [
+    (re.compile(r'rate limit', re.IGNORECASE), 'rate_limited'),
+    (re.compile(r'does not exist|not found', re.IGNORECASE), 'not_found'),
+    (re.compile(r'timed? ?out|connection|unavailable|bad gateway|encountered an error', re.IGNORECASE), 'canvas_unavailable'),
+    (re.compile(r'unauthori[sz]ed|access token|scopes|forbidden|not authorized', re.IGNORECASE), 'not_authorized'),
+    (re.compile(r'already|taken|conflict', re.IGNORECASE), 'conflict'),
+    (re.compile(r'invalid|bad request|unprocessable', re.IGNORECASE), 'invalid_request'),
+]
+
 class HTTPAPIError(Exception):
     """Custom exception to capture failed input along with the error details."""
     def __init__(self, failed_input: str, original_exception: Exception):
@@ -23,6 +52,9 @@ class HTTPAPIError(Exception):
         """Returns a dictionary representation of the error."""
         return {"failed_input": self.failed_input, "error": self.original_exception}
 
+class LoginIdTaken(Conflict):
+    """A SIS import reported that another user already has the login id."""
+
 class CanvasErrorHandler():
     """
     Custom exception for HTTP errors originating from Canvas API interactions
@@ -94,15 +126,41 @@ class CanvasErrorHandler():
         }
     
     
+    @classmethod
+    def classify_error(cls, error: Exception) -> str:
+        """
+        The ERROR_CATEGORY_LABELS category of a failed Canvas call: by the status EXCEPTION_STATUS_MAP gives the
+        exception type, and by message for other exceptions.
+        """
+        if isinstance(error, HTTPAPIError):
+            error = error.original_exception
+        if isinstance(error, RateLimitExceeded):
+            return 'rate_limited'
+        for error_type in type(error).__mro__:
+            status = cls.EXCEPTION_STATUS_MAP.get(error_type)
+            if status is not None:
+                return STATUS_ERROR_CATEGORIES.get(status, 'other')
+        return cls.classify_error_message(str(error))
+
+    @staticmethod
+    def classify_error_message(message: str) -> str:
+        for pattern, category in ERROR_MESSAGE_CATEGORIES:
+            if pattern.search(message):
+                return category
+        return 'other'
+
     def is_canvas_user_created(self, error: HTTPAPIError) -> bool:
         """
-        This method checks whether the error message indicates the user is already created.
+        This method checks whether the error message indicates the user is already created, which a SIS import of the
+        users reports as LoginIdTaken.
         Sample json:
         {"errors":{"user":{"pseudonyms":[{"attribute":"pseudonyms","message":"is invalid","type":"invalid"}]},
         "pseudonym":{"unique_id":[{"attribute":"unique_id","message":"ID already in use for this account and authentication provider","type":"taken"}]},
         "observee":{},"pairing_code":{},"recaptcha":null}}
 
         """
+        if isinstance(error.original_exception, LoginIdTaken):
+            return True
         if isinstance(error.original_exception, BadRequest):
             try:
                 error_json_str = str(error.original_exception)
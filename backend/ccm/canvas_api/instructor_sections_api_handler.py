@@ -16,12 +16,13 @@ from backend.ccm.canvas_api.constants import MAX_CONCURRENCY
 
 from backend.ccm.canvas_api.canvas_credential_manager import CanvasCredentialManager
 from backend.ccm.canvas_api.canvasapi_serializer import CanvasObjectROSerializer, InstructorSectionsQuerySerializer
+from backend.ccm.canvas_api.sections_streaming import STREAM_QUERY_PARAM, CourseSectionsStreamMixin
 from backend.ccm.canvas_api.exceptions import CanvasErrorHandler, HTTPAPIError
 from backend.ccm.utils import timeit
 
 logger = logging.getLogger(__name__)
 
-class CanvasInstructorSectionsAPIHandler(LoggingMixin, APIView):
+class CanvasInstructorSectionsAPIHandler(CourseSectionsStreamMixin, LoggingMixin, APIView):
     """
     API handler for "merge-able" sections data for users with instructor-level access
     """
@@ -49,6 +50,14 @@ class CanvasInstructorSectionsAPIHandler(LoggingMixin, APIView):
                 required=True,
                 description="Canvas term ID to filter courses."
             ),
+            OpenApiParameter(
+                name=STREAM_QUERY_PARAM,
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                enum=['ndjson'],
+                description="Set to `ndjson` to stream one course per line as soon as its sections are fetched."
+            ),
         ]
     )
     def get(self, request: Request) -> Response:
@@ -61,6 +70,8 @@ class CanvasInstructorSectionsAPIHandler(LoggingMixin, APIView):
         canvas_api = self.credential_manager.get_canvasapi_instance(request)
         try:
             filtered_courses, course_instance_map = self._get_filtered_teacher_courses(canvas_api, term_id)
+            if self.wants_stream(request):
+                return self.stream_courses_with_sections(request, filtered_courses, course_instance_map)
             success,response_data = self._attach_sections_to_courses(filtered_courses, course_instance_map)
             
             if not success: # Errors occurred during section fetching
@@ -0,0 +1,68 @@
+import codecs
+import io
+import logging
+
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+# orjson writes U+2028/U+2029 as raw UTF-8, DRF escapes them so the output stays a strict JavaScript subset
+LINE_SEPARATOR, LINE_SEPARATOR_ESCAPED = '\u2028'.encode(), b'\\u2028'
+PARAGRAPH_SEPARATOR, PARAGRAPH_SEPARATOR_ESCAPED = '\u2029'.encode(), b'\\u2029'
+# orjson reads integers beyond 64 bits as floats; bodies with 20+ digit runs (even inside strings) use the stdlib parser
+# (checked by mapping every digit to 0 and searching for a run of 20 zeros, much faster than a regex)
+DIGITS_TO_ZERO = bytes.maketrans(b'123456789', b'000000000')
+LONG_DIGIT_RUN = b'0' * 20
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer using orjson for compact (non-indented) output, with the same bytes as DRF's renderer:
+    types orjson doesn't know, and datetimes, go through DRF's JSONEncoder, and \\u2028/\\u2029 are escaped.
+    Falls back to DRF's renderer for indented output, non-default UNICODE_JSON/COMPACT_JSON settings and anything
+    orjson can't encode (e.g. integers over 64 bits). Floats in exponent notation are written without the `+`/leading
+    zero of the exponent (1e16 instead of 1e+16), which parses to the same value. NaN and Infinity are written as
+    null, where DRF's strict renderer raises a ValueError.
+    """
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.ensure_ascii or not self.compact \
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.ORJSON_OPTIONS)
+        except orjson.JSONEncodeError as e:
+            logger.debug(f"orjson could not render the response, using the stdlib renderer: {e}")
+            return super().render(data, accepted_media_type, renderer_context)
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, LINE_SEPARATOR_ESCAPED).replace(PARAGRAPH_SEPARATOR, PARAGRAPH_SEPARATOR_ESCAPED)
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser using orjson for UTF-8 request bodies. Bodies orjson rejects (invalid JSON, lone surrogates) or could
+    read differently (very long integers) are parsed by DRF's parser, so accepted input and error messages stay the same.
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if LONG_DIGIT_RUN in body.translate(DIGITS_TO_ZERO):
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -2,13 +2,16 @@ import logging
 from http import HTTPStatus
 import time
 import asyncio
-from datetime import datetime
+from django.core import signing
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from rest_framework.views import APIView
-from rest_framework import authentication, permissions
+from rest_framework import authentication, permissions, serializers
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.request import Request
-from django_q.tasks import async_task
 from asgiref.sync import async_to_sync
 
 from canvasapi.exceptions import CanvasException
@@ -16,8 +19,14 @@ from canvasapi import Canvas
 from canvasapi.section import Section
 
 from backend.ccm.background_tasks.enroll_um_users_task import EnrollmentUser
-from backend.ccm.canvas_api.canvasapi_serializer import CanvasObjectROSerializer, MultiSectionEnrollRequestSerializer, SingleSectionEnrollRequestSerializer
-from backend.ccm.canvas_api.constants import MAX_CONCURRENCY
+from backend.ccm.background_tasks.enrollment_scheduler import get_queue_position, schedule_enrollment_chunks
+from backend.ccm.canvas_api.canvasapi_serializer import (
+    CanvasObjectROSerializer, EnrollmentCsvUploadSerializer, MultiSectionEnrollRequestSerializer, SingleSectionEnrollRequestSerializer
+)
+from backend.ccm.canvas_api.enrollment_csv import store_enrollment_csv
+from backend.ccm.failure_reports import aiter_failure_report, failure_report_id_from_token
+from backend.ccm.models import EnrollmentJob, EnrollmentJobChunk, FailureReport
+from backend.ccm.canvas_api.constants import ENROLLMENT_UPLOAD_CHUNK_SIZE, MAX_CONCURRENCY
 
 from .exceptions import CanvasErrorHandler, HTTPAPIError
 from backend.ccm.utils import timeit
@@ -101,29 +110,51 @@ class CanvasSectionEnrollmentsAPIHandler(LoggingMixin, APIView):
 
 # Mixin for shared enrollment task logic
 class EnrollmentTaskMixin:
-    def create_enrollment_task(self, request, course_id, enrollment_params, section_id=None, multi_section=False):
+    def create_enrollment_job(self, request, course_id, enrollment_params):
         """
-        Helper to create async enrollment task and handle errors.
+        Store the validated enrollments as an EnrollmentJob, in chunks of ENROLLMENT_UPLOAD_CHUNK_SIZE rows, and hand
+        it to the enrollment scheduler, so a large request shares the workers fairly with everyone else's jobs.
         Returns a Response object.
         """
-        timestamp = datetime.now().strftime('%Y/%m/%d-%H:%M:%S-%f')
-        if multi_section:
-            task_name = f'c{course_id}-multisections-{len(enrollment_params)}-{timestamp}'
-        else:
-            task_name = f'c{course_id}-s{section_id}-{len(enrollment_params)}-{timestamp}'
-        task_payload = {
-            'enrollment_params': enrollment_params,
-            'course_id': course_id,
-            'user_id': request.user.id,
-            'canvas_callback_url': request.build_absolute_uri(reverse('canvas-oauth-callback')),
-        }
+        with transaction.atomic():
+            job = EnrollmentJob.objects.create(
+                user=request.user,
+                course_id=course_id,
+                total_rows=len(enrollment_params),
+                canvas_callback_url=request.build_absolute_uri(reverse('canvas-oauth-callback')),
+            )
+            EnrollmentJobChunk.objects.bulk_create([
+                EnrollmentJobChunk(job=job, index=index, rows=enrollment_params[start:start + ENROLLMENT_UPLOAD_CHUNK_SIZE])
+                for index, start in enumerate(range(0, len(enrollment_params), ENROLLMENT_UPLOAD_CHUNK_SIZE))
+            ])
+        logger.info(f"Stored {job.total_rows} enrollments for course {course_id} as enrollment job {job.id}")
+        return self.start_enrollment_job(job)
+
+    def start_enrollment_job(self, job: EnrollmentJob):
+        """
+        Hand a stored EnrollmentJob to the enrollment scheduler, which queues its chunks as workers free up.
+        """
         try:
-            task_id = async_task('backend.ccm.background_tasks.enroll_um_users_task.enroll_um_users', task=task_payload, task_name=task_name)
-            return Response({"task_id": task_id}, status=HTTPStatus.OK)
+            schedule_enrollment_chunks()
         except Exception as e:
-            self.canvas_error.django_q_task_error(e, str(request.data))
+            job.status = EnrollmentJob.Status.FAILED
+            job.save(update_fields=['status', 'updated_at'])
+            self.canvas_error.django_q_task_error(e, f'enrollment job {job.id}')
             error_response = self.canvas_error.to_dict()
             return Response(error_response, status=error_response.get('statusCode'))
+        job.refresh_from_db(fields=['status'])
+        return Response(enrollment_job_status(job), status=HTTPStatus.OK)
+
+def enrollment_job_status(job: EnrollmentJob) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "total_rows": job.total_rows,
+        "chunks_total": job.chunks.count(),
+        "chunks_processed": job.chunks.filter(processed_at__isnull=False).count(),
+        # Position of the job's next chunk among the chunks waiting for a worker, None when none is waiting
+        "queue_position": get_queue_position(job),
+    }
 
 class SingleSectionEnrollmentView(EnrollmentTaskMixin, LoggingMixin, APIView):
 
@@ -163,7 +194,7 @@ class SingleSectionEnrollmentView(EnrollmentTaskMixin, LoggingMixin, APIView):
 
         else:
             logger.info(f"Enroll users in course {course_id}, section {section_id}")
-            return self.create_enrollment_task(request, course_id, enrollment_params, section_id=section_id, multi_section=False)
+            return self.create_enrollment_job(request, course_id, enrollment_params)
     
     @async_to_sync()
     async def gather_enrollments(self, enrollment_users, canvas_api):
@@ -207,4 +238,100 @@ class MultiSectionEnrollmentView(EnrollmentTaskMixin, LoggingMixin, APIView):
             return Response(error_response, status=error_response.get('statusCode'))
         
         enrollment_params = serializer.validated_data.get('enrollments', {})
-        return self.create_enrollment_task(request, course_id, enrollment_params, multi_section=True)
+        return self.create_enrollment_job(request, course_id, enrollment_params)
+
+class MultiSectionEnrollmentUploadView(EnrollmentTaskMixin, LoggingMixin, APIView):
+    """
+    Multi section enrollment from an uploaded CSV file (LOGIN_ID, ROLE, SECTION_ID columns). The file is read and
+    validated in chunks that are stored as the work queue of an EnrollmentJob, so the request never holds the whole
+    file or its parsed rows in memory. MultiPartParser writes the whole upload to temporary storage before the view
+    runs, so rows are only read once the upload finished. The client doesn't use this endpoint yet, it sends the rows
+    it parsed to MultiSectionEnrollmentView.
+    """
+    authentication_classes = [authentication.SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    serializer_class = EnrollmentCsvUploadSerializer
+    # Reading request.body for the request log would load the whole file into memory
+    decode_request_body = False
+
+    def __init__(self, credential_manager=None):
+        self.credential_manager = credential_manager or CanvasCredentialManager()
+        self.canvas_error = CanvasErrorHandler()
+        super().__init__()
+
+    @extend_schema(
+        operation_id="multiple_sections_enrollment_upload",
+        summary="Enroll users in multiple sections from a CSV file",
+        request={'multipart/form-data': EnrollmentCsvUploadSerializer},
+        description="Upload a CSV file with LOGIN_ID, ROLE and SECTION_ID columns as `file`. Rows are validated and queued for enrollment in the background.",
+    )
+    @timeit
+    def post(self, request: Request, course_id: int) -> Response:
+        serializer = EnrollmentCsvUploadSerializer(data=request.data)
+        if not serializer.is_valid():
+            self.canvas_error.handle_serializer_errors(serializer.errors, str(request.data))
+            error_response = self.canvas_error.to_dict()
+            return Response(error_response, status=error_response.get('statusCode'))
+
+        upload = serializer.validated_data['file']
+        try:
+            with transaction.atomic():
+                job = EnrollmentJob.objects.create(
+                    user=request.user,
+                    course_id=course_id,
+                    canvas_callback_url=request.build_absolute_uri(reverse('canvas-oauth-callback')),
+                )
+                job.total_rows = store_enrollment_csv(job, upload)
+                job.save(update_fields=['total_rows', 'updated_at'])
+        except serializers.ValidationError as e:
+            self.canvas_error.handle_serializer_errors(e.detail, upload.name)
+            error_response = self.canvas_error.to_dict()
+            return Response(error_response, status=error_response.get('statusCode'))
+
+        logger.info(f"Stored {job.total_rows} enrollments from {upload.name} for course {course_id} as enrollment job {job.id}")
+        return self.start_enrollment_job(job)
+
+
+class EnrollmentJobStatusView(LoggingMixin, APIView):
+    """
+    Progress of an enrollment job of the request user, with its place in the enrollment queue while it waits.
+    """
+    authentication_classes = [authentication.SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        operation_id="enrollment_job_status",
+        summary="Status of an enrollment job",
+        description="Returns the job status, the chunks processed so far and queue_position, the place of the job's next chunk among the chunks waiting for a worker (null when none is waiting).",
+    )
+    def get(self, request: Request, course_id: int, job_id: int) -> Response:
+        job = get_object_or_404(EnrollmentJob, pk=job_id, course_id=course_id, user=request.user)
+        return Response(enrollment_job_status(job), status=HTTPStatus.OK)
+
+
+class EnrollmentFailureReportView(LoggingMixin, APIView):
+    """
+    Streams back the failure report CSV an enrollment summary email links to, to the user who made the enrollment
+    request. The link is signed and expires after FAILURE_REPORT_LINK_MAX_AGE_DAYS.
+    """
+    authentication_classes = [authentication.SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        operation_id="enrollment_failure_report",
+        summary="Download an enrollment failure report",
+        description="Streams the CSV of failed enrollments linked from the enrollment summary email. Returns 410 once the link expired.",
+        responses={(200, 'text/csv'): OpenApiTypes.BINARY},
+    )
+    def get(self, request: Request, course_id: int, token: str) -> StreamingHttpResponse | Response:
+        try:
+            report_id = failure_report_id_from_token(token)
+        except signing.SignatureExpired:
+            return Response({'detail': 'This failure report link has expired.'}, status=HTTPStatus.GONE)
+        except (signing.BadSignature, ValueError):
+            raise Http404
+        report = get_object_or_404(FailureReport, pk=report_id, course_id=course_id, user=request.user)
+        response = StreamingHttpResponse(aiter_failure_report(report), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{report.filename}"'
+        return response
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator
+
+from asgiref.sync import sync_to_async
+from canvasapi.course import Course
+from django.http import StreamingHttpResponse
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from backend.ccm.canvas_api.canvas_token_cache import delete_canvas_oauth_token
+from backend.ccm.canvas_api.constants import MAX_CONCURRENCY
+from backend.ccm.canvas_api.exceptions import CanvasAccessTokenException, HTTPAPIError
+
+logger = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+STREAM_QUERY_PARAM = 'stream'
+
+
+class CourseSectionsStreamMixin:
+    """
+    Optional NDJSON response mode (`?stream=ndjson`) for views listing courses with their sections.
+    Each line is one course with its sections, written as soon as that course's sections arrive (in completion order,
+    not input order). If fetching sections failed for any course, the last line is `{"error": <error response>}`
+    with the same body the non-streaming response would have returned.
+    The lines come from an async iterator, which ASGI servers send as they are yielded; Django reads a sync iterator
+    into a list under ASGI before sending any of it.
+    The view provides `canvas_error` and `_attach_section_sync(course, course_instance)`.
+    """
+
+    def wants_stream(self, request: Request) -> bool:
+        return request.query_params.get(STREAM_QUERY_PARAM) == 'ndjson'
+
+    def stream_courses_with_sections(self, request: Request, courses_data: list[dict], course_instance_map: dict[int, Course]) -> StreamingHttpResponse:
+        response = StreamingHttpResponse(
+            self._iter_course_lines(request.user, courses_data, course_instance_map),
+            content_type=NDJSON_CONTENT_TYPE
+        )
+        # Keep proxies from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def _iter_course_lines(self, user, courses_data: list[dict], course_instance_map: dict[int, Course]) -> AsyncIterator[str]:
+        errors = []
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+        async def attach_sections(course: dict) -> dict:
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(self._attach_section_sync, course, course_instance_map.get(course.get('id')))
+                except Exception as e:
+                    errors.append(e if isinstance(e, HTTPAPIError) else HTTPAPIError(f"course id {course.get('id')}", e))
+                    return None
+            return course
+
+        tasks = [asyncio.ensure_future(attach_sections(course)) for course in courses_data]
+        try:
+            for next_course in asyncio.as_completed(tasks):
+                course = await next_course
+                if course is None:
+                    continue
+                line = json.dumps(course, cls=JSONEncoder) + '\n'
+                # The course has been written, don't keep its sections around until the stream ends
+                course.pop('sections', None)
+                yield line
+        finally:
+            # Stop fetching when the client goes away, fetches already running finish in their threads
+            for task in tasks:
+                task.cancel()
+
+        if errors:
+            error_response = await sync_to_async(self._stream_error_response)(user, errors)
+            yield json.dumps({'error': error_response}, cls=JSONEncoder) + '\n'
+
+    def _stream_error_response(self, user, errors: list[HTTPAPIError]) -> dict:
+        # The response status is already sent, so handle the token error here instead of in custom_exception_handler
+        try:
+            self.canvas_error.handle_canvas_api_exceptions(errors)
+        except CanvasAccessTokenException as exc:
+            delete_canvas_oauth_token(user)
+            logger.error(f"Deleted the Canvas OAuth2 token for user: {user} due to invalid canvas access token.")
+            return exc.to_dict()
+        return self.canvas_error.to_dict()
@@ -0,0 +1,155 @@
+import csv
+import io
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from canvasapi import Canvas
+from canvasapi.account import Account
+from canvasapi.exceptions import CanvasException
+from canvasapi.sis_import import SisImport
+from django.conf import settings
+
+from backend.ccm.canvas_api.exceptions import HTTPAPIError, LoginIdTaken
+from backend.ccm.canvas_api.user_lookup import lookup_users
+
+logger = logging.getLogger(__name__)
+
+USERS_CSV_FIELDS = ['user_id', 'login_id', 'full_name', 'sortable_name', 'email', 'status']
+# Workflow states of a finished SIS import, the users of the failed ones weren't created
+SIS_IMPORT_DONE_STATES = {'imported', 'imported_with_messages'}
+SIS_IMPORT_FAILED_STATES = {'failed', 'failed_with_messages', 'aborted'}
+# Canvas refers to a row of the import by its user id, which is the guest's login id (email with + for @)
+ROW_REFERENCE = re.compile(r"[^\s'\"`,()]+\+[^\s'\"`,()]+")
+LOGIN_TAKEN = re.compile(r'already|taken|claimed', re.IGNORECASE)
+
+
+@dataclass
+class PendingGuest:
+    """ A guest of a SIS import that was still running when the request stopped waiting for it. """
+    login_id: str
+    email: str
+    sis_import_id: int
+
+
+def guest_login_id(email: str) -> str:
+    return email.replace('@', '+')
+
+
+def build_users_csv(users: Iterable[dict]) -> bytes:
+    """
+    The SIS users.csv creating the guests. Canvas requires a SIS user id, the guest's login id is used, which the '+'
+    keeps apart from the SIS ids of U-M users. Canvas adopts the login of an existing user without a SIS id into a row
+    with the same login id, giving it the SIS id and the row's name without any message, so the row would look
+    created: `create_users_by_sis_import` leaves the login ids that already have a user out of the import.
+    """
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=USERS_CSV_FIELDS)
+    writer.writeheader()
+    for user in users:
+        login_id = guest_login_id(user['email'])
+        writer.writerow({
+            'user_id': login_id,
+            'login_id': login_id,
+            'full_name': f'{user["givenName"]} {user["surname"]}',
+            'sortable_name': f'{user["surname"]} {user["givenName"]}',
+            'email': user['email'],
+            'status': 'active',
+        })
+    return output.getvalue().encode('utf-8')
+
+
+def submit_users_import(account: Account, users: List[dict]) -> SisImport:
+    attachment = io.BytesIO(build_users_csv(users))
+    attachment.name = 'users.csv'
+    sis_import = account.create_sis_import(attachment, import_type='instructure_csv', extension='csv')
+    logger.info(f"Submitted SIS import {sis_import.id} creating {len(users)} guest users")
+    return sis_import
+
+
+def wait_for_import(account: Account, sis_import: SisImport, timeout: Optional[float] = None,
+                    poll_interval: Optional[float] = None) -> SisImport:
+    """
+    Poll the SIS import until it's done or failed, returning its last state; it may still be running after `timeout`.
+    Errors getting the state are retried until then, the import was submitted and must not be repeated.
+    """
+    timeout = settings.GUEST_SIS_IMPORT_TIMEOUT if timeout is None else timeout
+    poll_interval = settings.GUEST_SIS_IMPORT_POLL_INTERVAL if poll_interval is None else poll_interval
+    deadline = time.monotonic() + timeout
+    while not is_import_finished(sis_import):
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(poll_interval)
+        try:
+            sis_import = account.get_sis_import(sis_import.id)
+        except CanvasException as e:
+            logger.warning(f"Failed to get the state of SIS import {sis_import.id}, polling again: {e}")
+    return sis_import
+
+
+def import_row_messages(sis_import: SisImport) -> Dict[str, List[str]]:
+    """ The warnings and errors of the SIS import per login id, given as [file, message] pairs by Canvas. """
+    messages: Dict[str, List[str]] = {}
+    for _, message in (getattr(sis_import, 'processing_errors', None) or []) + (getattr(sis_import, 'processing_warnings', None) or []):
+        for login_id in {reference.rstrip('.:;').lower() for reference in ROW_REFERENCE.findall(message)}:
+            messages.setdefault(login_id, []).append(message)
+    return messages
+
+
+def is_import_finished(sis_import: SisImport) -> bool:
+    return sis_import.workflow_state in SIS_IMPORT_DONE_STATES | SIS_IMPORT_FAILED_STATES
+
+
+def import_results(users: List[dict], sis_import: SisImport) -> List[dict | HTTPAPIError | PendingGuest]:
+    """
+    Map the outcome of the SIS import back to its users, in the shape of `CanvasCreateUserHandler.create_users`: the
+    created user, an HTTPAPIError (LoginIdTaken for a user who already has the login id), or a PendingGuest while the
+    import is still running.
+    """
+    state = sis_import.workflow_state
+    messages = import_row_messages(sis_import)
+    import_error = f"SIS import {sis_import.id} {state}" if state in SIS_IMPORT_FAILED_STATES else None
+
+    results = []
+    for user in users:
+        login_id = guest_login_id(user['email'])
+        row_messages = messages.get(login_id.lower(), [])
+        if not is_import_finished(sis_import):
+            results.append(PendingGuest(login_id, user['email'], sis_import.id))
+        elif any(LOGIN_TAKEN.search(message) for message in row_messages):
+            results.append(HTTPAPIError(login_id, LoginIdTaken('; '.join(row_messages))))
+        elif row_messages or import_error:
+            results.append(HTTPAPIError(login_id, CanvasException('; '.join(row_messages) or import_error)))
+        else:
+            results.append({'name': f'{user["givenName"]} {user["surname"]}', 'login_id': login_id, 'email': user['email']})
+    return results
+
+
+def create_users_by_sis_import(canvas_api: Canvas, account: Account, users: List[dict]) -> List[dict | HTTPAPIError | PendingGuest]:
+    """
+    Create the users with a SIS import, raising CanvasException only when it couldn't be submitted. Users whose login
+    id Canvas already has, looked up in Canvas rather than the cache, or couldn't be looked up, aren't imported. The users of an import still running after
+    GUEST_SIS_IMPORT_TIMEOUT are PendingGuests, `finish_guest_sis_import` invites them once it's done.
+    """
+    # Not from the cache: a guest created since a cached "not found" would be imported, and Canvas adopts its login
+    existing, lookup_errors = lookup_users(canvas_api, [user['email'] for user in users], refresh=True)
+    lookup_failures = {error.failed_input: error.original_exception for error in lookup_errors}
+    results: Dict[str, dict | HTTPAPIError | PendingGuest] = {}
+    new_users = []
+    for user in users:
+        login_id = guest_login_id(user['email'])
+        if existing.get(user['email']):
+            results[user['email']] = HTTPAPIError(login_id, LoginIdTaken(f"A Canvas user already has the login id {login_id}"))
+        elif user['email'] in lookup_failures:
+            results[user['email']] = HTTPAPIError(login_id, lookup_failures[user['email']])
+        else:
+            new_users.append(user)
+    logger.info(f"{len(users) - len(new_users)} of {len(users)} guest users already exist or couldn't be looked up")
+
+    if new_users:
+        sis_import = wait_for_import(account, submit_users_import(account, new_users))
+        logger.info(f"SIS import {sis_import.id} of {len(new_users)} guest users is {sis_import.workflow_state}")
+        results.update(zip((user['email'] for user in new_users), import_results(new_users, sis_import)))
+    return [results[user['email']] for user in users]
@@ -1,10 +1,10 @@
 from backend.ccm.canvas_api.admin_sections_api_handler import CanvasAdminSectionsAPIHandler
-from backend.ccm.canvas_api.canvas_user_handler import CanvasUserHandler
+from backend.ccm.canvas_api.canvas_user_handler import CanvasUserHandler, CanvasUsersLookupHandler
 from backend.ccm.canvas_api.course_api_handler import CanvasCourseAPIHandler
 from django.urls import path
 
 from backend.ccm.canvas_api.course_section_api_handler import CanvasMergeSectionsToCourseView, CanvasCourseSectionAPIHandler, CanvasUnmergeSectionsView
-from backend.ccm.canvas_api.section_enrollments_api_handler import CanvasSectionEnrollmentsAPIHandler, SingleSectionEnrollmentView, MultiSectionEnrollmentView
+from backend.ccm.canvas_api.section_enrollments_api_handler import CanvasSectionEnrollmentsAPIHandler, SingleSectionEnrollmentView, MultiSectionEnrollmentView, MultiSectionEnrollmentUploadView, EnrollmentJobStatusView, EnrollmentFailureReportView
 from backend.ccm.canvas_api.instructor_sections_api_handler import CanvasInstructorSectionsAPIHandler
 from backend.ccm.canvas_api.canvas_create_user_handler import CanvasCreateUserHandler
 
@@ -14,9 +14,13 @@ urlpatterns = [
   path('sections/students', CanvasSectionEnrollmentsAPIHandler.as_view() , name='sectionEnrollments'),
   path('course/<int:course_id>/sections/<int:section_id>/enroll', SingleSectionEnrollmentView.as_view(), name='singleSectionEnrollments'),
   path('course/<int:course_id>/sections/enroll', MultiSectionEnrollmentView.as_view(), name='multipleSectionEnrollments'),
+  path('course/<int:course_id>/sections/enroll/upload', MultiSectionEnrollmentUploadView.as_view(), name='multipleSectionEnrollmentsUpload'),
+  path('course/<int:course_id>/sections/enroll/jobs/<int:job_id>', EnrollmentJobStatusView.as_view(), name='enrollmentJobStatus'),
+  path('course/<int:course_id>/sections/enroll/reports/<str:token>', EnrollmentFailureReportView.as_view(), name='enrollmentFailureReport'),
   path('instructor/sections', CanvasInstructorSectionsAPIHandler.as_view(), name='instructorSections'),
   path('admin/sections/', CanvasAdminSectionsAPIHandler.as_view(), name='adminSections'),
   path('admin/user/<str:login_id>', CanvasUserHandler.as_view(), name='checkUser'),
+  path('admin/users/lookup', CanvasUsersLookupHandler.as_view(), name='lookupUsers'),
   path('course/<int:course_id>/sections/merge', CanvasMergeSectionsToCourseView.as_view(), name='mergeSections'),
   path('sections/unmerge', CanvasUnmergeSectionsView.as_view(), name='unmergeSections'),
   path('admin/createExternalUsers', CanvasCreateUserHandler.as_view(), name='createExternalUser'),
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from canvasapi import Canvas
+from canvasapi.exceptions import ResourceDoesNotExist
+from django.conf import settings
+from django.core.cache import cache
+
+from backend.ccm.canvas_api.constants import MAX_CONCURRENCY
+from .exceptions import HTTPAPIError
+
+logger = logging.getLogger(__name__)
+
+# Cached for a login id Canvas has no user for, a cached None can't be told from a cache miss
+USER_NOT_FOUND = 'not_found'
+
+
+def user_lookup_cache_key(login_id: str) -> str:
+    return f'canvas_user_lookup:{login_id.lower()}'
+
+
+def _from_cache(value, login_id: str) -> Optional[dict]:
+    return None if value == USER_NOT_FOUND else {**value, 'login_id': login_id}
+
+
+def cache_canvas_user(login_id: str, user: Optional[dict]) -> None:
+    if user:
+        cache.set(user_lookup_cache_key(login_id), user, timeout=settings.CANVAS_USER_CACHE_TIMEOUT)
+    else:
+        cache.set(user_lookup_cache_key(login_id), USER_NOT_FOUND, timeout=settings.CANVAS_USER_NOT_FOUND_CACHE_TIMEOUT)
+
+
+def invalidate_canvas_users(login_ids: Iterable[str]) -> None:
+    """ Forget the cached lookups of the login ids, e.g. once their users are created. """
+    cache.delete_many([user_lookup_cache_key(login_id) for login_id in login_ids])
+
+
+def get_canvas_user(canvas_api: Canvas, login_id: str) -> Optional[dict]:
+    """
+    The name and login id of the Canvas user with the login id, an email for guests, or None when there is no such
+    user. Other Canvas errors are raised.
+    """
+    try:
+        user = canvas_api.get_user(login_id.replace('@', '+'), 'sis_login_id')
+    except ResourceDoesNotExist:
+        return None
+    return {'name': user.name, 'login_id': login_id}
+
+
+def get_cached_canvas_user(canvas_api: Canvas, login_id: str) -> Optional[dict]:
+    """
+    `get_canvas_user` through the cache, shared by the web and task processes. Users are cached for
+    CANVAS_USER_CACHE_TIMEOUT seconds, login ids without a user for CANVAS_USER_NOT_FOUND_CACHE_TIMEOUT.
+    """
+    value = cache.get(user_lookup_cache_key(login_id))
+    if value is not None:
+        return _from_cache(value, login_id)
+    user = get_canvas_user(canvas_api, login_id)
+    cache_canvas_user(login_id, user)
+    return user
+
+
+@async_to_sync
+async def _get_canvas_users(canvas_api: Canvas, login_ids: List[str]) -> List[Optional[dict] | Exception]:
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+    async def get_user(login_id: str):
+        async with semaphore:
+            return await asyncio.to_thread(get_canvas_user, canvas_api, login_id)
+
+    return await asyncio.gather(*(get_user(login_id) for login_id in login_ids), return_exceptions=True)
+
+
+def lookup_users(canvas_api: Canvas, login_ids: Iterable[str], refresh: bool = False) -> Tuple[Dict[str, Optional[dict]], List[HTTPAPIError]]:
+    """
+    Look up the Canvas users of the login ids, from the cache or MAX_CONCURRENCY at a time from Canvas. Returns the
+    user (None when there is none) per login id, and the errors of the login ids that couldn't be looked up.
+    Found and missing users are cached as by `get_cached_canvas_user`, failed lookups aren't. With `refresh`, every
+    login id is looked up in Canvas, for checks a stale cached lookup must not answer.
+    """
+    login_ids = list(dict.fromkeys(login_ids))
+    cached = {} if refresh else cache.get_many([user_lookup_cache_key(login_id) for login_id in login_ids])
+    users: Dict[str, Optional[dict]] = {}
+    missing = []
+    for login_id in login_ids:
+        value = cached.get(user_lookup_cache_key(login_id))
+        if value is None:
+            missing.append(login_id)
+        else:
+            users[login_id] = _from_cache(value, login_id)
+
+    errors: List[HTTPAPIError] = []
+    found, not_found = {}, {}
+    for login_id, result in zip(missing, _get_canvas_users(canvas_api, missing) if missing else []):
+        if isinstance(result, Exception):
+            errors.append(HTTPAPIError(login_id, result))
+            continue
+        users[login_id] = result
+        if result is None:
+            not_found[user_lookup_cache_key(login_id)] = USER_NOT_FOUND
+        else:
+            found[user_lookup_cache_key(login_id)] = result
+    if found:
+        cache.set_many(found, timeout=settings.CANVAS_USER_CACHE_TIMEOUT)
+    if not_found:
+        cache.set_many(not_found, timeout=settings.CANVAS_USER_NOT_FOUND_CACHE_TIMEOUT)
+    logger.info(f"Looked up {len(login_ids)} Canvas users, {len(login_ids) - len(missing)} from the cache, {len(errors)} failed")
+    return {login_id: users[login_id] for login_id in login_ids if login_id in users}, errors
@@ -1,16 +1,49 @@
 from typing import Any, Dict, Optional, Union
 
 from django.conf import settings
+from django.core.cache import cache
 from django.http import HttpRequest
 
 from .serializer import GlobalsUserSerializer
 from canvas_oauth.models import CanvasOAuth2Token
 
+# Session key of the serialized user globals, dropped on LTI launch so a new launch picks up user changes
+USER_GLOBALS_SESSION_KEY = 'ccm_user_globals'
+
+
+def _has_canvas_token_cache_key(user_id: Any) -> str:
+    return f"ccm:has_canvas_token:{user_id}"
+
+
+def has_canvas_token(user) -> bool:
+    """
+    Whether the user has a Canvas OAuth token, cached until a token of the user is saved or deleted
+    (see backend.ccm.signals). Tokens are deleted outside of the user's requests, so this isn't kept in the session.
+    """
+    key = _has_canvas_token_cache_key(user.pk)
+    has_token: Optional[bool] = cache.get(key)
+    if has_token is None:
+        has_token = CanvasOAuth2Token.objects.filter(user=user).exists()
+        cache.set(key, has_token, timeout=None)
+    return has_token
+
+
+def invalidate_has_canvas_token(user_id: Any) -> None:
+    cache.delete(_has_canvas_token_cache_key(user_id))
+
+
+def get_user_globals(request: HttpRequest) -> Dict[str, Any]:
+    memo: Optional[Dict[str, Any]] = request.session.get(USER_GLOBALS_SESSION_KEY)
+    if memo is None or memo.get('userId') != request.user.pk:
+        memo = {'userId': request.user.pk, 'user': dict(GlobalsUserSerializer(request.user).data)}
+        request.session[USER_GLOBALS_SESSION_KEY] = memo
+    return dict(memo['user'])
+
 
 def ccm_globals(request: HttpRequest) -> Dict[str, Union[str, Dict[str, Any], None]]:
-    user_data: Optional[Dict[str, Any]] = GlobalsUserSerializer(request.user).data if request.user.is_authenticated else None
+    user_data: Optional[Dict[str, Any]] = get_user_globals(request) if request.user.is_authenticated else None
     if user_data:
-        user_data['hasCanvasToken'] = CanvasOAuth2Token.objects.filter(user=request.user).exists()
+        user_data['hasCanvasToken'] = has_canvas_token(request.user)
         userLoginID: Optional[str] = user_data.get('loginId')  # Get the value from user_data['loginId']
     else:
         userLoginID = None
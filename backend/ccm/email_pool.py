@@ -0,0 +1,143 @@
+import logging
+import queue
+import smtplib
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+logger = logging.getLogger(__name__)
+
+# The server closed or lost the connection: open it again and retry the message once
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout)
+# Reply code of a server closing the connection, e.g. at its limit of messages per connection
+SMTP_SERVICE_CLOSING = 421
+
+
+def is_connection_error(error: Exception) -> bool:
+    return isinstance(error, CONNECTION_ERRORS) or (
+        isinstance(error, smtplib.SMTPResponseException) and error.smtp_code == SMTP_SERVICE_CLOSING
+    )
+
+
+@dataclass
+class EmailSendReport:
+    sent: int = 0
+    # (recipients, error) of the messages that couldn't be sent
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    # The messages that couldn't be sent, in the order of `failed`
+    failed_messages: List[EmailMessage] = field(default_factory=list)
+    reconnects: int = 0
+    seconds: float = 0.0
+
+    @property
+    def sends_per_second(self) -> float:
+        return self.sent / self.seconds if self.seconds else 0.0
+
+    def add_failure(self, message: EmailMessage, recipients: str, error: str) -> None:
+        self.failed.append((recipients, error))
+        self.failed_messages.append(message)
+
+    def merge(self, other: 'EmailSendReport') -> None:
+        self.sent += other.sent
+        self.failed.extend(other.failed)
+        self.failed_messages.extend(other.failed_messages)
+        self.reconnects += other.reconnects
+
+    def to_dict(self) -> dict:
+        return {
+            'sent': self.sent,
+            'failed': len(self.failed),
+            'reconnects': self.reconnects,
+            'seconds': round(self.seconds, 3),
+            'sends_per_second': round(self.sends_per_second, 2),
+        }
+
+
+class SMTPConnectionPool:
+    """
+    A fixed number of email backend connections that stay open between sends. Messages are split into batches and
+    each batch is sent by one thread over one connection, so a connection is never used by two threads at once.
+    A connection the server dropped, e.g. after its idle timeout, is opened again and the message retried.
+    """
+
+    def __init__(self, size: Optional[int] = None, batch_size: Optional[int] = None,
+                 connection_factory: Optional[Callable[[], BaseEmailBackend]] = None):
+        self.size = size or settings.EMAIL_POOL_SIZE
+        self.batch_size = batch_size or settings.EMAIL_POOL_BATCH_SIZE
+        connection_factory = connection_factory or (lambda: get_connection(fail_silently=False))
+        self._connections: queue.LifoQueue = queue.LifoQueue()
+        for _ in range(self.size):
+            self._connections.put(connection_factory())
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='ccm-smtp')
+
+    def send_messages(self, messages: Sequence[EmailMessage]) -> EmailSendReport:
+        start = time.perf_counter()
+        batches = [messages[i:i + self.batch_size] for i in range(0, len(messages), self.batch_size)]
+        report = EmailSendReport()
+        for batch_report in self._executor.map(self._send_batch, batches):
+            report.merge(batch_report)
+        report.seconds = time.perf_counter() - start
+        for recipients, error in report.failed:
+            logger.error(f"Failed to send email to {recipients}: {error}")
+        logger.info(f"Sent {report.sent}/{len(messages)} emails in {report.seconds:.2f}s "
+                    f"({report.sends_per_second:.1f}/s, {report.reconnects} reconnects)")
+        return report
+
+    def _send_batch(self, batch: Sequence[EmailMessage]) -> EmailSendReport:
+        report = EmailSendReport()
+        connection = self._connections.get()
+        try:
+            for message in batch:
+                self._send_message(connection, message, report)
+        finally:
+            self._connections.put(connection)
+        return report
+
+    def _send_message(self, connection: BaseEmailBackend, message: EmailMessage, report: EmailSendReport) -> None:
+        # One message per send_messages call on the open connection: when the connection drops, only the message
+        # that failed is sent again, not the messages of the batch the server already accepted
+        recipients = ', '.join(message.recipients())
+        for attempt in range(2):
+            try:
+                connection.open()
+                if connection.send_messages([message]):
+                    report.sent += 1
+                else:
+                    report.add_failure(message, recipients, 'not sent')
+                return
+            except Exception as e:
+                if not is_connection_error(e) or attempt:
+                    report.add_failure(message, recipients, str(e))
+                    return
+                connection.close()
+                report.reconnects += 1
+                logger.warning(f"Email connection dropped ({e}), reconnecting")
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        while not self._connections.empty():
+            connection = self._connections.get()
+            try:
+                connection.close()
+            except Exception as e:
+                logger.warning(f"Failed to close email connection: {e}")
+
+
+_pool: Optional[SMTPConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_email_pool() -> SMTPConnectionPool:
+    """ The pool of the process, its connections are reused by every task the worker runs. """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SMTPConnectionPool()
+        return _pool
@@ -0,0 +1,156 @@
+import asyncio
+import csv
+import gzip
+import io
+import logging
+import tempfile
+import uuid
+from collections import Counter
+from datetime import timedelta
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import Storage, storages
+
+from backend.ccm.canvas_api.exceptions import ERROR_CATEGORY_LABELS, CanvasErrorHandler
+from backend.ccm.models import FailureReport
+
+logger = logging.getLogger(__name__)
+
+FAILURE_CSV_FIELDS = ['sectionId', 'LoginId', 'role', 'ErrorCategory', 'ReasonForFailure']
+FAILURE_REPORT_STORAGE = 'failure_reports'
+_SIGNING_SALT = 'backend.ccm.failure_reports'
+# Size of the decompressed chunks streamed back to the user
+STREAM_CHUNK_SIZE = 64 * 1024
+# Failures of each category shown as examples in the summary
+SAMPLES_PER_CATEGORY = 3
+
+
+def get_failure_report_storage() -> Storage:
+    return storages[FAILURE_REPORT_STORAGE]
+
+
+def failure_category(item: dict) -> str:
+    # Failures stored before they were categorized only have their message
+    return item.get('category') or CanvasErrorHandler.classify_error_message(item.get('error', ''))
+
+
+def failure_csv_row(item: dict) -> dict:
+    return {
+        'sectionId': item.get('sectionId', ''),
+        'LoginId': item.get('loginId', ''),
+        'role': item.get('role', ''),
+        'ErrorCategory': ERROR_CATEGORY_LABELS[failure_category(item)],
+        'ReasonForFailure': item.get('error', ''),
+    }
+
+
+class FailureSummary:
+    """ Failure counts per error category, with the first few failures of each category as samples. """
+
+    def __init__(self, samples_per_category: int = SAMPLES_PER_CATEGORY):
+        self.samples_per_category = samples_per_category
+        self.counts: Counter = Counter()
+        self.samples: Dict[str, List[dict]] = {}
+
+    @classmethod
+    def of(cls, failures: Iterable[dict]) -> 'FailureSummary':
+        summary = cls()
+        for failure in failures:
+            summary.add(failure)
+        return summary
+
+    def add(self, failure: dict, category: Optional[str] = None) -> None:
+        category = category or failure_category(failure)
+        self.counts[category] += 1
+        samples = self.samples.setdefault(category, [])
+        if len(samples) < self.samples_per_category:
+            samples.append(failure)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def categories(self) -> List[tuple]:
+        """ (category label, count, sample failures), most frequent first. """
+        return [
+            (ERROR_CATEGORY_LABELS[category], count, self.samples[category])
+            for category, count in self.counts.most_common()
+        ]
+
+    def __str__(self) -> str:
+        return '; '.join(
+            f"{count} x {label} (e.g. {', '.join(sample['loginId'] for sample in samples)}: {samples[0]['error']})"
+            for label, count, samples in self.categories()
+        )
+
+
+def write_failure_csv(output, failed_enrollments: Iterable[dict]) -> int:
+    """ Write the failures as CSV to the text stream `output`, returning the number of rows written. """
+    writer = csv.DictWriter(output, fieldnames=FAILURE_CSV_FIELDS)
+    writer.writeheader()
+    rows = 0
+    for item in failed_enrollments:
+        writer.writerow(failure_csv_row(item))
+        rows += 1
+    return rows
+
+
+def store_failure_report(user, course_id: int, failed_enrollments: Iterable[dict]) -> FailureReport:
+    """
+    Write the failures as a gzipped CSV to a temporary file, row by row, and save it to the failure report storage.
+    """
+    filename = f'course_{course_id}_failures.csv'
+    storage_name = f'course_{course_id}/{uuid.uuid4().hex}_failures.csv.gz'
+    with tempfile.TemporaryFile() as compressed:
+        with gzip.GzipFile(filename=filename, mode='wb', fileobj=compressed) as gz, \
+                io.TextIOWrapper(gz, encoding='utf-8', newline='') as text:
+            rows = write_failure_csv(text, failed_enrollments)
+        compressed_size = compressed.tell()
+        compressed.seek(0)
+        storage_name = get_failure_report_storage().save(storage_name, File(compressed))
+    report = FailureReport.objects.create(
+        user=user, course_id=course_id, filename=filename, storage_name=storage_name,
+        rows=rows, compressed_size=compressed_size,
+    )
+    logger.info(f"Stored failure report {report.pk} for course {course_id}: {rows} rows, {compressed_size} bytes gzipped")
+    return report
+
+
+def failure_report_token(report: FailureReport) -> str:
+    return signing.TimestampSigner(salt=_SIGNING_SALT).sign(str(report.pk))
+
+
+def failure_report_id_from_token(token: str) -> int:
+    """ The id of the report the token was signed for. Raises signing.BadSignature, or SignatureExpired once too old. """
+    max_age = timedelta(days=settings.FAILURE_REPORT_LINK_MAX_AGE_DAYS)
+    return int(signing.TimestampSigner(salt=_SIGNING_SALT).unsign(token, max_age=max_age))
+
+
+def iter_failure_report(report: FailureReport, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """ The decompressed CSV of the report, read from storage in chunks. """
+    with get_failure_report_storage().open(report.storage_name, 'rb') as stored, \
+            gzip.GzipFile(fileobj=stored, mode='rb') as gz:
+        while chunk := gz.read(chunk_size):
+            yield chunk
+
+
+async def aiter_failure_report(report: FailureReport, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    `iter_failure_report` for an ASGI response: each chunk is read in a thread, so it's sent as soon as it's
+    decompressed without blocking the event loop.
+    """
+    chunks = iter_failure_report(report, chunk_size)
+    try:
+        while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+            yield chunk
+    finally:
+        # Closing the generator closes the stored file, which may block too
+        await asyncio.to_thread(chunks.close)
+
+
+def delete_failure_report(report: FailureReport, storage: Optional[Storage] = None) -> None:
+    (storage or get_failure_report_storage()).delete(report.storage_name)
+    report.delete()
@@ -0,0 +1,64 @@
+import hashlib
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.flatpages.models import FlatPage
+from django.core.cache import cache
+from django.utils.safestring import SafeString, mark_safe
+
+CURRENT_YEAR_TOKEN_RE = re.compile(r"{{\s*current_year\s*}}")
+# Rendered flatpage HTML kept in the process by (flatpage id, content version, year)
+MAX_CACHED_FRAGMENTS = 64
+_rendered_fragments: Dict[Tuple[int, str, Optional[str]], SafeString] = {}
+
+
+def _flatpages_cache_key(site_id: int) -> str:
+    return f"ccm:flatpages:{site_id}"
+
+
+def get_site_flatpages(site_id: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Return the flatpages of the site keyed by url, as {'id', 'content', 'version', 'parts'} dicts, where `version`
+    changes with the content and `parts` is the content split on the `{{ current_year }}` token. All of the site's
+    flatpages are loaded with one query and cached together until a flatpage changes (see backend.ccm.signals).
+    """
+    site_id = site_id or settings.SITE_ID
+    pages: Optional[Dict[str, Dict[str, Any]]] = cache.get(_flatpages_cache_key(site_id))
+    if pages is None:
+        pages = {
+            page['url']: {
+                'id': page['id'],
+                'content': page['content'],
+                'version': hashlib.sha1(page['content'].encode()).hexdigest(),
+                'parts': CURRENT_YEAR_TOKEN_RE.split(page['content']),
+            }
+            for page in FlatPage.objects.filter(sites__id=site_id).values('id', 'url', 'content')
+        }
+        cache.set(_flatpages_cache_key(site_id), pages, timeout=None)
+    return pages
+
+
+def get_cached_flatpage(url: str, site_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    return get_site_flatpages(site_id).get(url)
+
+
+def invalidate_cached_flatpages(site_id: Optional[int] = None) -> None:
+    cache.delete(_flatpages_cache_key(site_id or settings.SITE_ID))
+    _rendered_fragments.clear()
+
+
+def render_flatpage_fragment(page: Dict[str, Any], current_year: Any = None) -> SafeString:
+    """
+    Return the page's content as safe HTML, with `{{ current_year }}` replaced when `current_year` is given.
+    The result is built once per (flatpage id, content version, year).
+    """
+    year = str(current_year) if current_year is not None else None
+    key = (page['id'], page['version'], year)
+    fragment = _rendered_fragments.get(key)
+    if fragment is None:
+        fragment = mark_safe(year.join(page['parts']) if year is not None else page['content'])
+        if len(_rendered_fragments) >= MAX_CACHED_FRAGMENTS:
+            _rendered_fragments.clear()
+        _rendered_fragments[key] = fragment
+    return fragment
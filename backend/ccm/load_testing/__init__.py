@@ -0,0 +1 @@
+# Local load testing helpers: an in-process fake Canvas server and a runner that drives the CCM views against it.
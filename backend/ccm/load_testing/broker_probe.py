@@ -0,0 +1,95 @@
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.db import connection
+from django_q.brokers import Broker
+from django_q.signing import SignedPackage
+
+from backend.ccm.load_testing.runner import QueryCounter
+from backend.ccm.utils import percentile
+
+# Queue the probe uses, so probing never touches the tasks of the cluster
+PROBE_LIST_KEY = 'ccm-broker-probe'
+
+
+@dataclass
+class BrokerProbeResult:
+    broker: str
+    pickup_latencies: list[float] = field(default_factory=list)
+    idle_seconds: float = 0.0
+    idle_db_queries: int = 0
+    busy_seconds: float = 0.0
+    busy_db_queries: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            'broker': self.broker,
+            'samples': len(self.pickup_latencies),
+            'pickup_p50_ms': round(percentile(self.pickup_latencies, 50) * 1000, 2),
+            'pickup_p95_ms': round(percentile(self.pickup_latencies, 95) * 1000, 2),
+            'pickup_max_ms': round(max(self.pickup_latencies, default=0.0) * 1000, 2),
+            'idle_db_queries_per_s': round(self.idle_db_queries / self.idle_seconds, 2) if self.idle_seconds else 0.0,
+            'busy_db_queries_per_s': round(self.busy_db_queries / self.busy_seconds, 2) if self.busy_seconds else 0.0,
+        }
+
+
+class BrokerPusher:
+    """
+    The dequeue loop of a qcluster pusher, in a thread, recording when each task was picked up and counting the
+    database queries it makes.
+    """
+
+    def __init__(self, broker: Broker):
+        self.broker = broker
+        self.picked_up: queue.Queue = queue.Queue()
+        self.query_counter = QueryCounter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='ccm-broker-probe', daemon=True)
+
+    def _run(self) -> None:
+        try:
+            with connection.execute_wrapper(self.query_counter):
+                while not self._stop.is_set():
+                    for ack_id, _ in self.broker.dequeue() or []:
+                        self.picked_up.put(time.perf_counter())
+                        self.broker.acknowledge(ack_id)
+        finally:
+            connection.close()
+
+    def __enter__(self) -> 'BrokerPusher':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def time_pickup(self, timeout: float = 30.0) -> float:
+        """ Enqueue a task and return the seconds until the pusher picked it up. """
+        start = time.perf_counter()
+        self.broker.enqueue(SignedPackage.dumps({'probe': start}))
+        return self.picked_up.get(timeout=timeout) - start
+
+
+def probe_broker(name: str, broker: Broker, samples: int = 20, idle_seconds: float = 2.0, max_spacing: float = 0.25) -> BrokerProbeResult:
+    """
+    Measure task pickup latency (enqueue to dequeue by a waiting pusher) and the database queries per second the
+    pusher makes, while the queue is idle and while tasks come in.
+    """
+    broker.purge_queue()
+    result = BrokerProbeResult(broker=name, idle_seconds=idle_seconds)
+    with BrokerPusher(broker) as pusher:
+        time.sleep(idle_seconds)
+        result.idle_db_queries = pusher.query_counter.count
+        pusher.query_counter.reset()
+        start = time.perf_counter()
+        for _ in range(samples):
+            # Enqueue at random points of a polling broker's sleep, not right after a pickup when it happens to be awake
+            time.sleep(random.uniform(0, max_spacing))
+            result.pickup_latencies.append(pusher.time_pickup())
+        result.busy_seconds = time.perf_counter() - start
+        result.busy_db_queries = pusher.query_counter.count
+    return result
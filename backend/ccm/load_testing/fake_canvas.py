@@ -0,0 +1,480 @@
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FakeCanvasConfig:
+    """
+    Knobs for the fake Canvas server. Defaults give a small, fast and error free instance.
+    """
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    default_per_page: int = 10
+    max_per_page: int = 100
+    # Canvas style leaky bucket: every request costs `rate_limit_cost` units and the bucket refills per second
+    rate_limit_capacity: float = 700.0
+    rate_limit_cost: float = 1.0
+    rate_limit_refill_per_second: float = 700.0
+    # Fraction of requests answered with `error_status`, optionally only for the named routes
+    error_rate: float = 0.0
+    error_status: int = HTTPStatus.INTERNAL_SERVER_ERROR.value
+    error_routes: frozenset = frozenset()
+    seed: int = 1
+    term_id: int = 1
+    subaccounts: int = 2
+    courses_per_account: int = 5
+    sections_per_course: int = 3
+    students_per_section: int = 5
+    # Login IDs starting with this prefix do not exist in the fake Canvas
+    missing_login_prefix: str = 'missing'
+    # Cache-Control max-age of the LTI platform keyset (/api/lti/security/jwks)
+    lti_jwks_max_age: int = 300
+
+
+@dataclass
+class FakeCanvasData:
+    accounts: dict = field(default_factory=dict)
+    courses: dict = field(default_factory=dict)
+    sections: dict = field(default_factory=dict)
+    users: dict = field(default_factory=dict)
+    enrollments: list = field(default_factory=list)
+
+    @classmethod
+    def build(cls, config: FakeCanvasConfig) -> 'FakeCanvasData':
+        data = cls()
+        data.accounts[1] = {'id': 1, 'name': 'Root Account', 'parent_account_id': None, 'root_account_id': None}
+        for index in range(config.subaccounts):
+            account_id = 2 + index
+            data.accounts[account_id] = {'id': account_id, 'name': f'Subaccount {account_id}', 'parent_account_id': 1, 'root_account_id': 1}
+
+        course_id = 1000
+        for account_id in data.accounts:
+            for _ in range(config.courses_per_account):
+                course_id += 1
+                data.courses[course_id] = {
+                    'id': course_id,
+                    'name': f'Course {course_id}',
+                    'course_code': f'COURSE {course_id}',
+                    'account_id': account_id,
+                    'enrollment_term_id': config.term_id,
+                    'workflow_state': 'available',
+                }
+                for section_index in range(config.sections_per_course):
+                    section_id = course_id * 100 + section_index
+                    data.sections[section_id] = {
+                        'id': section_id,
+                        'name': f'Section {section_id}',
+                        'course_id': course_id,
+                        'nonxlist_course_id': None,
+                        'total_students': config.students_per_section,
+                    }
+        return data
+
+
+class FakeCanvasServer:
+    """
+    In-process HTTP server that speaks enough of the Canvas REST API for the CCM views and background tasks.
+    It simulates latency, Link header pagination, rate limit headers and injected errors, and counts every call
+    per route so load tests can report Canvas calls per operation.
+
+    Usage:
+        with FakeCanvasServer(FakeCanvasConfig(latency_ms=50)) as server:
+            canvas = Canvas(server.base_url, 'token')
+    """
+
+    def __init__(self, config: Optional[FakeCanvasConfig] = None, host: str = '127.0.0.1', port: int = 0):
+        self.config = config or FakeCanvasConfig()
+        self.data = FakeCanvasData.build(self.config)
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._calls: Counter = Counter()
+        self._bucket = self.config.rate_limit_capacity
+        self._bucket_updated = time.monotonic()
+        self._next_id = 900000
+        self._lti_keys: list[tuple[str, object]] = []
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeCanvasServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-canvas', daemon=True)
+        self._thread.start()
+        logger.info(f"Fake Canvas server listening on {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> 'FakeCanvasServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._calls.clear()
+
+    def stats(self) -> dict[str, int]:
+        """ Calls per route since the last reset, plus a `total` key. """
+        with self._lock:
+            calls = dict(self._calls)
+        calls['total'] = sum(calls.values())
+        return calls
+
+    @property
+    def lti_keyset_url(self) -> str:
+        return f'{self.base_url}/api/lti/security/jwks'
+
+    def rotate_lti_key(self) -> str:
+        """ Add a new LTI signing key, used for the id_tokens signed from now on, and return its kid. """
+        with self._lock:
+            kid = f'fake-canvas-{len(self._lti_keys) + 1}'
+            self._lti_keys.append((kid, rsa.generate_private_key(public_exponent=65537, key_size=2048)))
+            return kid
+
+    def lti_jwks(self) -> dict:
+        if not self._lti_keys:
+            self.rotate_lti_key()
+        keys = []
+        for kid, private_key in self._lti_keys:
+            jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+            keys.append({**jwk, 'kid': kid, 'alg': 'RS256', 'use': 'sig'})
+        return {'keys': keys}
+
+    def sign_lti_id_token(self, claims: dict) -> str:
+        """ Sign an LTI launch id_token like Canvas does, with the newest key. """
+        if not self._lti_keys:
+            self.rotate_lti_key()
+        kid, private_key = self._lti_keys[-1]
+        return jwt.encode(claims, private_key, algorithm='RS256', headers={'kid': kid})
+
+    def _new_id(self) -> int:
+        with self._lock:
+            self._next_id += 1
+            return self._next_id
+
+    def _take_rate_limit(self) -> float:
+        """ Spend one request from the bucket and return what is left, refilling for the time elapsed. """
+        with self._lock:
+            now = time.monotonic()
+            refill = (now - self._bucket_updated) * self.config.rate_limit_refill_per_second
+            self._bucket = min(self.config.rate_limit_capacity, self._bucket + refill)
+            self._bucket_updated = now
+            self._bucket -= self.config.rate_limit_cost
+            return self._bucket
+
+    def _should_inject_error(self, route: str) -> bool:
+        if self.config.error_rate <= 0:
+            return False
+        if self.config.error_routes and route not in self.config.error_routes:
+            return False
+        with self._lock:
+            return self._random.random() < self.config.error_rate
+
+    def _latency(self) -> float:
+        jitter = 0.0
+        if self.config.jitter_ms:
+            with self._lock:
+                jitter = self._random.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+        return max(0.0, self.config.latency_ms + jitter) / 1000
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(FakeCanvasRequestHandler):
+            fake_canvas = server
+
+        return Handler
+
+    def dispatch(self, method: str, path: str) -> Optional[tuple[str, Callable, dict]]:
+        for route_method, pattern, name, handler in ROUTES:
+            if route_method != method:
+                continue
+            match = pattern.fullmatch(path)
+            if match:
+                return name, handler, match.groupdict()
+        return None
+
+
+class FakeCanvasRequestHandler(BaseHTTPRequestHandler):
+    fake_canvas: FakeCanvasServer
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args) -> None:
+        logger.debug(f"fake canvas: {format % args}")
+
+    def do_GET(self) -> None:
+        self._handle('GET')
+
+    def do_POST(self) -> None:
+        self._handle('POST')
+
+    def do_PUT(self) -> None:
+        self._handle('PUT')
+
+    def do_DELETE(self) -> None:
+        self._handle('DELETE')
+
+    def _read_params(self) -> dict[str, list[str]]:
+        url = urlsplit(self.path)
+        params = parse_qs(url.query, keep_blank_values=True)
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length)
+            if self.headers.get('Content-Type', '').startswith('application/x-www-form-urlencoded'):
+                for key, values in parse_qs(body.decode('utf-8'), keep_blank_values=True).items():
+                    params.setdefault(key, []).extend(values)
+        return params
+
+    def _handle(self, method: str) -> None:
+        server = self.fake_canvas
+        path = urlsplit(self.path).path
+        params = self._read_params()
+        route = server.dispatch(method, path)
+        name = route[0] if route else 'unknown'
+        with server._lock:
+            server._calls[name] += 1
+
+        time.sleep(server._latency())
+        remaining = server._take_rate_limit()
+        headers = {
+            'X-Rate-Limit-Remaining': f'{max(remaining, 0):.1f}',
+            'X-Request-Cost': f'{server.config.rate_limit_cost:.1f}',
+        }
+        if remaining < 0:
+            self._send(HTTPStatus.FORBIDDEN, '403 Forbidden (Rate Limit Exceeded)', headers)
+            return
+        if route is None:
+            self._send(HTTPStatus.NOT_FOUND, {'errors': [{'message': 'The specified resource does not exist.'}]}, headers)
+            return
+        if server._should_inject_error(name):
+            self._send(server.config.error_status, {'errors': [{'message': f'Injected error for {name}'}]}, headers)
+            return
+
+        _, handler, path_args = route
+        status, body, extra_headers = handler(server, self, params, **path_args)
+        headers.update(extra_headers or {})
+        self._send(status, body, headers)
+
+    def _send(self, status: int, body, headers: dict) -> None:
+        payload = body.encode('utf-8') if isinstance(body, str) else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain' if isinstance(body, str) else 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def paginate(self, items: list, params: dict) -> tuple[int, list, dict]:
+        """ Slice `items` for the requested page and add a Canvas style Link header when more pages remain. """
+        config = self.fake_canvas.config
+        per_page = min(int(_first(params, 'per_page', config.default_per_page)), config.max_per_page)
+        page = int(_first(params, 'page', 1))
+        start = (page - 1) * per_page
+        page_items = items[start:start + per_page]
+        headers = {}
+        if start + per_page < len(items):
+            query = {key: values for key, values in params.items() if key not in ('page', 'per_page')}
+            query.update({'page': page + 1, 'per_page': per_page})
+            next_url = f"{self.fake_canvas.base_url}{urlsplit(self.path).path}?{urlencode(query, doseq=True)}"
+            headers['Link'] = f'<{next_url}>; rel="next"'
+        return HTTPStatus.OK, page_items, headers
+
+
+def _first(params: dict, key: str, default=None):
+    values = params.get(key)
+    return values[0] if values else default
+
+
+def _not_found() -> tuple[int, dict, dict]:
+    return HTTPStatus.NOT_FOUND, {'errors': [{'message': 'The specified resource does not exist.'}]}, {}
+
+
+def _login_exists(server: FakeCanvasServer, login_id: str) -> bool:
+    return not login_id.startswith(server.config.missing_login_prefix)
+
+
+def list_accounts(server, handler, params):
+    return handler.paginate(list(server.data.accounts.values()), params)
+
+
+def list_account_courses(server, handler, params, account_id):
+    account_id = int(account_id)
+    if account_id not in server.data.accounts:
+        return _not_found()
+    term_id = _first(params, 'enrollment_term_id')
+    search_term = (_first(params, 'search_term') or '').lower()
+    # The root account sees every course, like Canvas does for its subaccounts
+    courses = [
+        course for course in server.data.courses.values()
+        if (account_id == 1 or course['account_id'] == account_id)
+        and (term_id is None or str(course['enrollment_term_id']) == str(term_id))
+        and search_term in course['name'].lower()
+    ]
+    return handler.paginate(courses, params)
+
+
+def list_user_courses(server, handler, params):
+    return handler.paginate(list(server.data.courses.values()), params)
+
+
+def get_course(server, handler, params, course_id):
+    course = server.data.courses.get(int(course_id))
+    return (HTTPStatus.OK, course, {}) if course else _not_found()
+
+
+def update_course(server, handler, params, course_id):
+    course = server.data.courses.get(int(course_id))
+    if not course:
+        return _not_found()
+    course['name'] = _first(params, 'course[name]', course['name'])
+    course['course_code'] = _first(params, 'course[course_code]', course['course_code'])
+    return HTTPStatus.OK, course, {}
+
+
+def list_course_sections(server, handler, params, course_id):
+    course_id = int(course_id)
+    if course_id not in server.data.courses:
+        return _not_found()
+    sections = [section for section in server.data.sections.values() if section['course_id'] == course_id]
+    return handler.paginate(sections, params)
+
+
+def create_course_section(server, handler, params, course_id):
+    course_id = int(course_id)
+    if course_id not in server.data.courses:
+        return _not_found()
+    section_id = server._new_id()
+    section = {
+        'id': section_id,
+        'name': _first(params, 'course_section[name]', f'Section {section_id}'),
+        'course_id': course_id,
+        'nonxlist_course_id': None,
+        'total_students': 0,
+    }
+    server.data.sections[section_id] = section
+    return HTTPStatus.OK, section, {}
+
+
+def list_section_enrollments(server, handler, params, section_id):
+    section = server.data.sections.get(int(section_id))
+    if not section:
+        return _not_found()
+    enrollments = [
+        {
+            'id': section['id'] * 1000 + index,
+            'course_section_id': section['id'],
+            'type': 'StudentEnrollment',
+            'user': {'id': section['id'] * 1000 + index, 'login_id': f"student{section['id']}{index}"},
+        }
+        for index in range(section['total_students'])
+    ]
+    return handler.paginate(enrollments, params)
+
+
+def create_section_enrollment(server, handler, params, section_id):
+    section = server.data.sections.get(int(section_id))
+    if not section:
+        return _not_found()
+    user_ref = _first(params, 'enrollment[user_id]', '')
+    login_id = user_ref.split(':', 1)[1] if ':' in user_ref else user_ref
+    if not _login_exists(server, login_id):
+        return _not_found()
+    enrollment = {
+        'id': server._new_id(),
+        'course_id': section['course_id'],
+        'course_section_id': section['id'],
+        'user_id': abs(hash(login_id)) % 10**8,
+        'type': _first(params, 'enrollment[type]', 'StudentEnrollment'),
+        'enrollment_state': 'active',
+    }
+    with server._lock:
+        server.data.enrollments.append(enrollment['id'])
+    return HTTPStatus.OK, enrollment, {}
+
+
+def crosslist_section(server, handler, params, section_id, course_id):
+    section = server.data.sections.get(int(section_id))
+    if not section or int(course_id) not in server.data.courses:
+        return _not_found()
+    if section['nonxlist_course_id'] is None:
+        section['nonxlist_course_id'] = section['course_id']
+    section['course_id'] = int(course_id)
+    return HTTPStatus.OK, section, {}
+
+
+def decrosslist_section(server, handler, params, section_id):
+    section = server.data.sections.get(int(section_id))
+    if not section:
+        return _not_found()
+    if section['nonxlist_course_id'] is not None:
+        section['course_id'] = section['nonxlist_course_id']
+        section['nonxlist_course_id'] = None
+    return HTTPStatus.OK, section, {}
+
+
+def get_user(server, handler, params, id_type, user_id):
+    if id_type != 'sis_login_id':
+        return _not_found()
+    user_id = unquote(user_id)
+    user = server.data.users.get(user_id)
+    if user is None and _login_exists(server, user_id):
+        user = {'id': abs(hash(user_id)) % 10**8, 'name': f'User {user_id}', 'login_id': user_id}
+    return (HTTPStatus.OK, user, {}) if user else _not_found()
+
+
+def create_user(server, handler, params, account_id):
+    login_id = _first(params, 'pseudonym[unique_id]', '')
+    if login_id in server.data.users:
+        body = {'errors': {'pseudonym': {'unique_id': [{'attribute': 'unique_id', 'message': 'ID already in use for this account and authentication provider', 'type': 'taken'}]}}}
+        return HTTPStatus.BAD_REQUEST, json.dumps(body), {}
+    user = {'id': server._new_id(), 'name': _first(params, 'user[name]', login_id), 'login_id': login_id}
+    server.data.users[login_id] = user
+    return HTTPStatus.OK, user, {}
+
+
+def get_lti_jwks(server, handler, params):
+    return HTTPStatus.OK, server.lti_jwks(), {'Cache-Control': f'max-age={server.config.lti_jwks_max_age}'}
+
+
+ROUTES = [
+    ('GET', re.compile(r'/api/v1/accounts'), 'list_accounts', list_accounts),
+    ('GET', re.compile(r'/api/v1/accounts/(?P<account_id>\d+)/courses'), 'list_account_courses', list_account_courses),
+    ('POST', re.compile(r'/api/v1/accounts/(?P<account_id>\d+)/users'), 'create_user', create_user),
+    ('GET', re.compile(r'/api/v1/courses'), 'list_user_courses', list_user_courses),
+    ('GET', re.compile(r'/api/v1/courses/(?P<course_id>\d+)'), 'get_course', get_course),
+    ('PUT', re.compile(r'/api/v1/courses/(?P<course_id>\d+)'), 'update_course', update_course),
+    ('GET', re.compile(r'/api/v1/courses/(?P<course_id>\d+)/sections'), 'list_course_sections', list_course_sections),
+    ('POST', re.compile(r'/api/v1/courses/(?P<course_id>\d+)/sections'), 'create_course_section', create_course_section),
+    ('GET', re.compile(r'/api/v1/sections/(?P<section_id>\d+)/enrollments'), 'list_section_enrollments', list_section_enrollments),
+    ('POST', re.compile(r'/api/v1/sections/(?P<section_id>\d+)/enrollments'), 'create_section_enrollment', create_section_enrollment),
+    ('POST', re.compile(r'/api/v1/sections/(?P<section_id>\d+)/crosslist/(?P<course_id>\d+)'), 'crosslist_section', crosslist_section),
+    ('DELETE', re.compile(r'/api/v1/sections/(?P<section_id>\d+)/crosslist'), 'decrosslist_section', decrosslist_section),
+    ('GET', re.compile(r'/api/v1/users/(?P<id_type>\w+):(?P<user_id>[^/]+)'), 'get_user', get_user),
+    ('GET', re.compile(r'/api/lti/security/jwks'), 'get_lti_jwks', get_lti_jwks),
+]
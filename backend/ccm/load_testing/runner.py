@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+from unittest.mock import patch
+
+from canvasapi import Canvas
+from django.contrib.auth.models import User
+from django.db import close_old_connections, connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from backend.ccm.canvas_api.canvas_credential_manager import CanvasCredentialManager
+from backend.ccm.load_testing.fake_canvas import FakeCanvasServer
+from backend.ccm.utils import percentile
+
+logger = logging.getLogger(__name__)
+
+LOAD_TEST_USERNAME = 'ccm-load-test'
+
+
+@dataclass
+class LoadTestResult:
+    scenario: str
+    iterations: int
+    concurrency: int
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    wall_time: float = 0.0
+    canvas_calls: dict[str, int] = field(default_factory=dict)
+    db_queries: int = 0
+
+    def to_dict(self) -> dict:
+        total_calls = self.canvas_calls.get('total', 0)
+        return {
+            'scenario': self.scenario,
+            'iterations': self.iterations,
+            'concurrency': self.concurrency,
+            'errors': self.errors,
+            'p50_ms': round(percentile(self.latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(self.latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(self.latencies, 99) * 1000, 2),
+            'max_ms': round(max(self.latencies, default=0.0) * 1000, 2),
+            'throughput_per_s': round(self.iterations / self.wall_time, 2) if self.wall_time else 0.0,
+            'canvas_calls_per_op': round(total_calls / self.iterations, 2) if self.iterations else 0.0,
+            'canvas_calls': self.canvas_calls,
+            'db_queries_per_op': round(self.db_queries / self.iterations, 2) if self.iterations else 0.0,
+            'db_queries_per_s': round(self.db_queries / self.wall_time, 2) if self.wall_time else 0.0,
+        }
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting queries across threads. It only sees the connections it is installed on,
+    the request threads here, not the threads the views hand Canvas calls to.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.count = 0
+
+
+@contextmanager
+def fake_canvas_credentials(server: FakeCanvasServer) -> Iterator[None]:
+    """
+    Point every CanvasCredentialManager, including the one used by the background tasks, at the fake server.
+    """
+    def canvas_for_fake_server(*args, **kwargs) -> Canvas:
+        return Canvas(server.base_url, 'fake-canvas-token')
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='Canvas may respond unexpectedly', category=UserWarning)
+        with patch.object(CanvasCredentialManager, 'get_canvasapi_instance', canvas_for_fake_server), \
+                patch.object(CanvasCredentialManager, 'get_canvasapi_admin_instance', canvas_for_fake_server):
+            yield
+
+
+class LoadTestRunner:
+    """
+    Drives the real CCM views (through URL routing, middleware, session auth and rendering) and background
+    tasks against a FakeCanvasServer, recording latency per operation and Canvas calls per operation.
+    """
+
+    def __init__(self, server: FakeCanvasServer, user: Optional[User] = None, enrollment_rows: int = 100):
+        self.server = server
+        self.user = user or self.get_load_test_user()
+        self.enrollment_rows = enrollment_rows
+        self._local = threading.local()
+        self.query_counter = QueryCounter()
+        self.scenarios: dict[str, Callable[[], bool]] = {
+            'course': self.course,
+            'course_sections': self.course_sections,
+            'instructor_sections': self.instructor_sections,
+            'admin_sections': self.admin_sections,
+            'admin_sections_stream': self.admin_sections_stream,
+            'merge_sections': self.merge_sections,
+            'enroll_task': self.enroll_task,
+        }
+
+    @staticmethod
+    def get_load_test_user() -> User:
+        user, _ = User.objects.get_or_create(
+            username=LOAD_TEST_USERNAME,
+            defaults={'email': f'{LOAD_TEST_USERNAME}@example.edu', 'is_staff': True},
+        )
+        return user
+
+    @property
+    def client(self) -> Client:
+        """ One logged in test client per worker thread, since Client keeps per-session cookies. """
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = Client()
+            client.force_login(self.user)
+            self._local.client = client
+        return client
+
+    def _first_course_id(self) -> int:
+        return next(iter(self.server.data.courses))
+
+    def course(self) -> bool:
+        response = self.client.get(reverse('course', kwargs={'course_id': self._first_course_id()}))
+        return response.status_code == 200
+
+    def course_sections(self) -> bool:
+        response = self.client.get(reverse('courseSection', kwargs={'course_id': self._first_course_id()}))
+        return response.status_code == 200
+
+    def instructor_sections(self) -> bool:
+        response = self.client.get(reverse('instructorSections'), {'term_id': self.server.config.term_id})
+        return response.status_code == 200
+
+    def admin_sections(self) -> bool:
+        response = self.client.get(reverse('adminSections'), {'term_id': self.server.config.term_id, 'course_name': 'Course'})
+        return response.status_code == 200
+
+    def admin_sections_stream(self) -> bool:
+        response = self.client.get(
+            reverse('adminSections'), {'term_id': self.server.config.term_id, 'course_name': 'Course', 'stream': 'ndjson'}
+        )
+        # The stream is an async iterator, which iterating the response consumes here
+        lines = b''.join(response).splitlines() if response.streaming else []
+        return response.status_code == 200 and not (lines and lines[-1].startswith(b'{"error"'))
+
+    def merge_sections(self) -> bool:
+        course_ids = list(self.server.data.courses)
+        target_course_id = course_ids[0]
+        # Sections native to the second course, whether or not an earlier iteration already merged them
+        section_ids = [
+            section_id for section_id, section in self.server.data.sections.items()
+            if (section['nonxlist_course_id'] or section['course_id']) == course_ids[1]
+        ]
+        response = self.client.post(
+            reverse('mergeSections', kwargs={'course_id': target_course_id}),
+            {'sectionIds': section_ids},
+            content_type='application/json',
+        )
+        return response.status_code == 200
+
+    def enroll_task(self) -> bool:
+        from backend.ccm.background_tasks.enroll_um_users_task import enroll_um_users
+
+        section_id = next(iter(self.server.data.sections))
+        enroll_um_users({
+            'enrollment_params': [
+                {'loginId': f'loaduser{index}', 'role': 'student', 'sectionId': section_id}
+                for index in range(self.enrollment_rows)
+            ],
+            'user_id': self.user.id,
+            'course_id': self._first_course_id(),
+            'canvas_callback_url': 'http://testserver/oauth/oauth-callback',
+        })
+        return True
+
+    def _timed(self, operation: Callable[[], bool]) -> tuple[float, bool]:
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self.query_counter):
+                ok = operation()
+        except Exception as e:
+            logger.warning(f"Load test operation failed: {e}")
+            ok = False
+        return time.perf_counter() - start, ok
+
+    def _timed_in_worker(self, operation: Callable[[], bool]) -> tuple[float, bool]:
+        try:
+            return self._timed(operation)
+        finally:
+            # Worker threads hold their own DB connections, release them like a request cycle would
+            close_old_connections()
+
+    def run(self, scenario: str, iterations: int = 20, concurrency: int = 1, warmup: int = 1) -> LoadTestResult:
+        operation = self.scenarios[scenario]
+        result = LoadTestResult(scenario=scenario, iterations=iterations, concurrency=concurrency)
+
+        with fake_canvas_credentials(self.server), \
+                override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            for _ in range(warmup):
+                self._timed(operation)
+            self.server.reset_stats()
+            self.query_counter.reset()
+
+            start = time.perf_counter()
+            if concurrency <= 1:
+                outcomes = [self._timed(operation) for _ in range(iterations)]
+            else:
+                with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ccm-load') as executor:
+                    outcomes = list(executor.map(lambda _: self._timed_in_worker(operation), range(iterations)))
+            result.wall_time = time.perf_counter() - start
+
+        result.latencies = [elapsed for elapsed, _ in outcomes]
+        result.errors = sum(1 for _, ok in outcomes if not ok)
+        result.canvas_calls = self.server.stats()
+        result.db_queries = self.query_counter.count
+        return result
@@ -0,0 +1,143 @@
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from backend.ccm.canvas_api.email_users import build_bulk_emails
+from backend.ccm.email_pool import EmailSendReport, SMTPConnectionPool
+
+
+class LocalSMTPHandler:
+    """
+    aiosmtpd handler counting the messages accepted. With `drop_every`, every n-th message closes the connection
+    instead of being accepted, like a server dropping a connection after its session limit.
+    """
+
+    def __init__(self, drop_every: Optional[int] = None):
+        self.drop_every = drop_every
+        self.accepted = 0
+        self.connections = 0
+        self.dropped = 0
+        self._received = 0
+        self._lock = threading.Lock()
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        with self._lock:
+            self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        with self._lock:
+            self._received += 1
+            drop = self.drop_every and self._received % self.drop_every == 0
+            if drop:
+                self.dropped += 1
+            else:
+                self.accepted += 1
+        if drop:
+            server.transport.close()
+            return '421 Closing connection'
+        return '250 Message accepted for delivery'
+
+
+@dataclass
+class SMTPLoadTestResult:
+    mode: str
+    messages: int
+    report: EmailSendReport
+    server_accepted: int
+    server_connections: int
+    server_dropped: int
+
+    def to_dict(self) -> dict:
+        return {
+            'mode': self.mode,
+            'messages': self.messages,
+            **self.report.to_dict(),
+            'server_accepted': self.server_accepted,
+            'server_connections': self.server_connections,
+            'server_dropped': self.server_dropped,
+        }
+
+
+class LocalSMTPServer:
+    """ A local aiosmtpd server on a free port, as a context manager. """
+
+    def __init__(self, drop_every: Optional[int] = None):
+        # aiosmtpd is only needed to load test, import it when a server is started
+        from aiosmtpd.controller import Controller
+
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        self.handler = LocalSMTPHandler(drop_every=drop_every)
+        self.controller = Controller(self.handler, hostname='127.0.0.1', port=self.port)
+
+    def __enter__(self) -> 'LocalSMTPServer':
+        self.controller.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.controller.stop()
+
+    def connection_factory(self) -> Callable[[], BaseEmailBackend]:
+        return lambda: get_connection(
+            'django.core.mail.backends.smtp.EmailBackend', host='127.0.0.1', port=self.port,
+            username='', password='', use_tls=False, use_ssl=False, timeout=10, fail_silently=False,
+        )
+
+
+def _send_connection_per_message(messages: List, connection_factory: Callable[[], BaseEmailBackend], concurrency: int) -> EmailSendReport:
+    """ What EmailMessage.send() without a connection does: open and close a connection for every message. """
+    report = EmailSendReport()
+    lock = threading.Lock()
+
+    def send(message) -> None:
+        try:
+            sent = connection_factory().send_messages([message])
+        except Exception as e:
+            sent, error = 0, str(e)
+        else:
+            error = 'not sent'
+        with lock:
+            if sent:
+                report.sent += 1
+            else:
+                report.add_failure(message, ', '.join(message.recipients()), error)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, messages))
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def run_smtp_load_test(mode: str = 'pool', messages: int = 500, pool_size: int = 4, batch_size: int = 20,
+                       drop_every: Optional[int] = None) -> SMTPLoadTestResult:
+    """
+    Send `messages` guest invitation sized emails to a local aiosmtpd server, either through an SMTPConnectionPool
+    ('pool') or with a new connection per message from as many threads ('connection_per_message').
+    """
+    from backend.ccm.background_tasks.send_email_non_umich_user_task import email_body, external_user_email_subject
+
+    emails = build_bulk_emails([f'guest{i}@example.com' for i in range(messages)], external_user_email_subject, email_body())
+    with LocalSMTPServer(drop_every=drop_every) as server:
+        if mode == 'pool':
+            pool = SMTPConnectionPool(size=pool_size, batch_size=batch_size, connection_factory=server.connection_factory())
+            try:
+                report = pool.send_messages(emails)
+            finally:
+                pool.close()
+        elif mode == 'connection_per_message':
+            report = _send_connection_per_message(emails, server.connection_factory(), pool_size)
+        else:
+            raise ValueError(f"Unknown SMTP load test mode '{mode}'")
+        handler = server.handler
+        return SMTPLoadTestResult(mode=mode, messages=messages, report=report, server_accepted=handler.accepted,
+                                  server_connections=handler.connections, server_dropped=handler.dropped)
@@ -1,19 +1,34 @@
-import random, logging, string
-from typing import Dict, List, Any
+import logging
+from typing import Dict, List, Any, Optional
 from django.contrib.auth import login as ccm_user_login
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
 from django.conf import settings
+from django.db import connection
 from django.http import HttpResponse, HttpRequest, HttpResponseRedirect
 from django.shortcuts import redirect
 from django.urls import reverse
+from lti_tool.constants import SESSION_KEY
+from lti_tool.types import LtiHttpRequest
+from lti_tool.utils import sync_data_from_launch
 from lti_tool.views import LtiLaunchBaseView, LtiLaunch
 from pylti1p3.exception import LtiException
 from pylti1p3.message_launch import TLaunchData
 from django.contrib.auth.models import User
+from backend.ccm.lti_keyset import get_launch_from_request
 from django.shortcuts import redirect
 
 
 logger = logging.getLogger(__name__)
 
+# Seconds the pk of a launched user is cached, so relaunches read the user by pk instead of upserting it
+LTI_USER_CACHE_TIMEOUT = 60 * 60
+
+
+def lti_user_cache_key(username: str) -> str:
+    return f"ccm:lti_user:{username}"
+
+
 class LTILaunchError(Exception):
     """
     Exception class for errors that occur while processing data from the LTI launch
@@ -38,6 +53,30 @@ class CCMLTILaunchView(LtiLaunchBaseView):
     "Assistant",
     }
     
+    def post(self, request: LtiHttpRequest, *args, **kwargs) -> HttpResponse:
+        """
+        LtiLaunchBaseView.post, with the launch validated against the cached platform keyset (see lti_keyset).
+        django-lti has no hook for creating the launch, so this is a copy of the upstream post, with
+        get_launch_from_request imported from lti_keyset. test_lti_config checks the copy matches the pinned django-lti.
+        """
+        request.session.clear()
+        lti_launch = get_launch_from_request(request)
+        lti1p1_secret = self.get_lti1p1_secret(lti_launch.lti1p1_consumer_key)
+        sync_data_from_launch(lti_launch, lti1p1_secret)
+        self.launch_setup(request, lti_launch)
+        if not lti_launch.deployment.is_active:
+            return self.handle_inactive_deployment(request, lti_launch)
+        request.session[SESSION_KEY] = lti_launch.get_launch_id()
+        request.lti_launch = lti_launch
+        if request.lti_launch.is_resource_launch:
+            return self.handle_resource_launch(request, lti_launch)
+        if request.lti_launch.is_deep_link_launch:
+            return self.handle_deep_linking_launch(request, lti_launch)
+        if request.lti_launch.is_submission_review_launch:
+            return self.handle_submission_review_launch(request, lti_launch)
+        if request.lti_launch.is_data_privacy_launch:
+            return self.handle_data_privacy_launch(request, lti_launch)
+
     def validate_custom_lti_launch_data(self, lti_launch: TLaunchData) -> None:
         if self.LTI_CUSTOM_PARAMS_URL not in lti_launch:
             raise LTILaunchError(
@@ -58,17 +97,32 @@ class CCMLTILaunchView(LtiLaunchBaseView):
         try:
             username: str = login_id
             logger.info(f'User {first_name} {last_name} {email} {username} launched the tool')
-            user_obj: User = User.objects.get(username=username)
-        except User.DoesNotExist:
-            logger.warning(f'user {username} never logged into the app, hence creating the user')
-            password: str = ''.join(random.sample(string.ascii_letters, settings.RANDOM_PASSWORD_DEFAULT_LENGTH))
-            user_obj = User.objects.create_user(username=username, email=email, password=password, first_name=first_name,
-                                                last_name=last_name)
+            user_pk: Optional[int] = cache.get(lti_user_cache_key(username))
+            # Only the pk is cached, so changes to the user, e.g. is_active or is_staff in the admin, apply at relaunch
+            user_obj: Optional[User] = User.objects.filter(pk=user_pk, username=username).first() if user_pk else None
+            if user_obj is None:
+                user_obj = self.upsert_lti_user(username, email, first_name, last_name)
+                cache.set(lti_user_cache_key(username), user_obj.pk, timeout=LTI_USER_CACHE_TIMEOUT)
         except Exception as e:
             raise LTILaunchError(f'Error occured while getting the user info from LTI launch data due to {e}')
         return user_obj
-            
-        
+
+    @staticmethod
+    def upsert_lti_user(username: str, email: str, first_name: str, last_name: str) -> User:
+        """
+        Create the user, or update the email and name of an existing one from the launch, in one INSERT ... ON CONFLICT
+        (ON DUPLICATE KEY UPDATE on MySQL). MySQL doesn't return the pk of the row, so there the user is read back.
+        """
+        # LTI users only log in through a launch, an unusable password saves hashing a random one
+        user = User(username=username, email=email, first_name=first_name, last_name=last_name, password=make_password(None))
+        with_target = connection.features.supports_update_conflicts_with_target
+        User.objects.bulk_create(
+            [user], update_conflicts=True, update_fields=['email', 'first_name', 'last_name'],
+            unique_fields=['username'] if with_target else None
+        )
+        if user.pk is None:
+            user = User.objects.get(username=username)
+        return user
 
     def login_user_store_session(self, request, launch_data, user_obj):
         course_id: str = launch_data[self.LTI_CUSTOM_PARAMS_URL].get('course_id')
@@ -78,7 +132,7 @@ class CCMLTILaunchView(LtiLaunchBaseView):
             ccm_user_login(request, user_obj)
         except (ValueError, TypeError, Exception) as e:
             raise LTILaunchError(f'Logging user after LTI launch failed due to {e}')
-        
+
         if course_id is not None:
             try:
                 course_id_int: int = int(course_id)
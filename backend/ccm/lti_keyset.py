@@ -0,0 +1,172 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import jwt
+import requests
+from django.core.cache import cache
+from django.http import HttpRequest
+from lti_tool.models import LtiLaunch
+from lti_tool.utils import DjangoToolConfig
+from pylti1p3.contrib.django import DjangoCacheDataStorage, DjangoMessageLaunch
+from pylti1p3.exception import LtiException
+
+logger = logging.getLogger(__name__)
+
+# Seconds a platform keyset is cached when the response has no Cache-Control max-age, and the most it is cached for
+JWKS_DEFAULT_MAX_AGE = 60 * 60
+JWKS_MAX_AGE_LIMIT = 24 * 60 * 60
+# A launch signed with a kid missing from the cached keyset refetches it, at most this often (seconds) per keyset,
+# so launches with unknown kids can't make every launch fetch the keyset
+JWKS_MIN_REFRESH_INTERVAL = 60
+JWKS_FETCH_TIMEOUT = 10
+
+MAX_AGE_RE = re.compile(r'^max-age\s*=\s*"?(\d+)"?$', re.IGNORECASE)
+
+
+@dataclass
+class PlatformKeySet:
+    keys: List[Dict[str, Any]]
+    fetched_at: float
+    expires_at: float
+    # Public key objects parsed from `keys` by (kid, alg), so a launch doesn't parse the JWK again
+    parsed: Dict[Tuple[str, str], Any] = field(default_factory=dict)
+
+    def find_key(self, kid: str, alg: str) -> Optional[Any]:
+        key = self.parsed.get((kid, alg))
+        if key is not None:
+            return key
+        for jwk in self.keys:
+            if jwk.get('kid') == kid and jwk.get('alg', 'RS256') == alg:
+                try:
+                    key = jwt.PyJWK(jwk, algorithm=alg).key
+                except (jwt.PyJWKError, ValueError, TypeError) as e:
+                    raise LtiException("Can't convert JWT key to a public key") from e
+                self.parsed[(kid, alg)] = key
+                return key
+        return None
+
+
+# Keysets by url, kept in the process in front of the shared cache
+_keysets: Dict[str, PlatformKeySet] = {}
+_refresh_lock = threading.Lock()
+_requests_session = requests.Session()
+
+
+def _keyset_cache_key(key_set_url: str) -> str:
+    return f"ccm:lti_jwks:{hashlib.sha256(key_set_url.encode()).hexdigest()}"
+
+
+def keyset_max_age(cache_control: str) -> int:
+    """ Seconds a keyset response may be cached for, from its Cache-Control header. """
+    directives = [directive.strip() for directive in cache_control.split(',') if directive.strip()]
+    if any(directive.lower() in ('no-store', 'no-cache') for directive in directives):
+        return 0
+    for directive in directives:
+        match = MAX_AGE_RE.match(directive)
+        if match:
+            return min(int(match.group(1)), JWKS_MAX_AGE_LIMIT)
+    return JWKS_DEFAULT_MAX_AGE
+
+
+def fetch_keyset(key_set_url: str) -> PlatformKeySet:
+    try:
+        response = _requests_session.get(key_set_url, timeout=JWKS_FETCH_TIMEOUT)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        raise LtiException(f"Error during fetch URL {key_set_url}: {e}") from e
+    try:
+        keys = response.json()['keys']
+    except (ValueError, KeyError, TypeError) as e:
+        raise LtiException(f"Invalid response from {key_set_url}. Must be a JSON keyset: {response.text}") from e
+
+    max_age = keyset_max_age(response.headers.get('Cache-Control', ''))
+    now = time.time()
+    keyset = PlatformKeySet(keys=keys, fetched_at=now, expires_at=now + max_age)
+    if max_age > 0:
+        cache.set(_keyset_cache_key(key_set_url),
+                  {'keys': keys, 'fetched_at': keyset.fetched_at, 'expires_at': keyset.expires_at}, timeout=max_age)
+    logger.info(f"Fetched the LTI platform keyset {key_set_url}, cached for {max_age} seconds")
+    return keyset
+
+
+def _shared_keyset(key_set_url: str) -> Optional[PlatformKeySet]:
+    cached = cache.get(_keyset_cache_key(key_set_url))
+    if cached is None or cached['expires_at'] <= time.time():
+        return None
+    return PlatformKeySet(**cached)
+
+
+def get_keyset(key_set_url: str) -> PlatformKeySet:
+    """ The platform keyset from the process, then the shared cache, then the platform. """
+    keyset = _keysets.get(key_set_url)
+    if keyset is not None and keyset.expires_at > time.time():
+        return keyset
+    with _refresh_lock:
+        keyset = _keysets.get(key_set_url)
+        if keyset is None or keyset.expires_at <= time.time():
+            keyset = _shared_keyset(key_set_url) or fetch_keyset(key_set_url)
+            _keysets[key_set_url] = keyset
+    return keyset
+
+
+def refresh_keyset_for_kid(key_set_url: str, stale: PlatformKeySet) -> PlatformKeySet:
+    """
+    Refresh a keyset that doesn't have the kid of a launch, the platform may have rotated its keys.
+    A keyset another process fetched after `stale` is used first.
+    """
+    with _refresh_lock:
+        keyset = _keysets.get(key_set_url, stale)
+        if keyset.fetched_at > stale.fetched_at:
+            return keyset
+        shared = _shared_keyset(key_set_url)
+        if shared is not None and shared.fetched_at > stale.fetched_at:
+            keyset = shared
+        elif time.time() - stale.fetched_at >= JWKS_MIN_REFRESH_INTERVAL:
+            keyset = fetch_keyset(key_set_url)
+        _keysets[key_set_url] = keyset
+    return keyset
+
+
+def get_platform_public_key(key_set_url: str, kid: str, alg: str) -> Any:
+    keyset = get_keyset(key_set_url)
+    key = keyset.find_key(kid, alg)
+    if key is None:
+        key = refresh_keyset_for_kid(key_set_url, keyset).find_key(kid, alg)
+    if key is None:
+        raise LtiException("Unable to find public key")
+    return key
+
+
+class CCMMessageLaunch(DjangoMessageLaunch):
+    """
+    DjangoMessageLaunch that verifies the launch JWT with a cached, already parsed, platform public key instead of
+    fetching the platform keyset and converting the key to PEM on every launch.
+    """
+
+    def get_public_key(self) -> Tuple[Any, str]:
+        assert self._registration is not None, "Registration not yet set"
+        key_set_url = self._registration.get_key_set_url()
+        if self._registration.get_key_set() or not key_set_url:
+            return super().get_public_key()
+        if not key_set_url.startswith(("http://", "https://")):
+            raise LtiException("Invalid URL: " + key_set_url)
+
+        kid = self._jwt.get("header", {}).get("kid", None)
+        alg = self._jwt.get("header", {}).get("alg", None)
+        if not kid:
+            raise LtiException("JWT KID not found")
+        if not alg:
+            raise LtiException("JWT ALG not found")
+        return get_platform_public_key(key_set_url, kid, alg), alg
+
+
+def get_launch_from_request(request: HttpRequest) -> LtiLaunch:
+    """ lti_tool.utils.get_launch_from_request for a new launch, validated with CCMMessageLaunch. """
+    message_launch = CCMMessageLaunch(request, DjangoToolConfig(), launch_data_storage=DjangoCacheDataStorage())
+    message_launch.validate()
+    return LtiLaunch(message_launch)
@@ -0,0 +1,43 @@
+from importlib import import_module
+from typing import Any, Dict
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Copy the unexpired database sessions into the session cache of SESSION_ENGINE, so logged in users keep \
+            their sessions when SESSION_STORE is switched to cache. Also warms the cache for cached_db.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--dry-run', action='store_true', help='Only count the sessions that would be copied')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Sessions read from the database per query')
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        engine = import_module(settings.SESSION_ENGINE)
+        if not hasattr(engine.SessionStore, 'cache_key_prefix'):
+            raise CommandError(f"SESSION_ENGINE {settings.SESSION_ENGINE} doesn't keep sessions in the cache, nothing to migrate.")
+        session_cache = caches[settings.SESSION_CACHE_ALIAS]
+
+        now = timezone.now()
+        copied = skipped = 0
+        sessions = Session.objects.filter(expire_date__gt=now).iterator(chunk_size=options['batch_size'])
+        for session in sessions:
+            data = session.get_decoded()
+            # get_decoded returns {} for a session that doesn't decode, e.g. signed with an old SECRET_KEY
+            if not data:
+                skipped += 1
+                continue
+            if not options['dry_run']:
+                store = engine.SessionStore(session_key=session.session_key)
+                session_cache.set(store.cache_key, data, timeout=int((session.expire_date - now).total_seconds()))
+            copied += 1
+
+        action = 'Would copy' if options['dry_run'] else 'Copied'
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {copied} sessions to the '{settings.SESSION_CACHE_ALIAS}' cache for {settings.SESSION_ENGINE}, "
+            f"skipped {skipped} that could not be decoded."
+        ))
@@ -0,0 +1,36 @@
+from typing import Any, Dict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.ccm.task_brokers import BROKER_TYPES, get_task_broker, move_queued_tasks
+from backend.ccm.task_queues import TASK_QUEUES
+
+
+class Command(BaseCommand):
+    help = 'Move the background tasks waiting in one django-q broker to another, e.g. after switching Q_CLUSTER_BROKER \
+            from orm to redis. ORM tasks locked by a running worker are left in place; run it again once they expire.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--from', dest='source', required=True, choices=BROKER_TYPES, help='Broker to take the queued tasks from')
+        parser.add_argument('--to', dest='target', required=True, choices=BROKER_TYPES, help='Broker to queue the tasks on')
+        parser.add_argument('--redis-url', help='Redis url of the redis broker, defaults to Q_CLUSTER_REDIS')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many tasks are waiting')
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        if options['source'] == options['target']:
+            raise CommandError('--from and --to must be different brokers')
+        if options['dry_run']:
+            for queue in TASK_QUEUES:
+                source = get_task_broker(options['source'], list_key=queue, redis_url=options['redis_url'])
+                self.stdout.write(f"{source.queue_size()} tasks waiting in {queue} on {source.info()}")
+            return
+        try:
+            get_task_broker(options['target'], redis_url=options['redis_url']).ping()
+        except Exception as e:
+            raise CommandError(f"Can't reach the {options['target']} broker: {e}")
+
+        for queue in TASK_QUEUES:
+            source = get_task_broker(options['source'], list_key=queue, redis_url=options['redis_url'])
+            target = get_task_broker(options['target'], list_key=queue, redis_url=options['redis_url'])
+            moved = move_queued_tasks(source, target)
+            self.stdout.write(self.style.SUCCESS(f"Moved {moved} queued tasks of {queue} from {source.info()} to {target.info()}"))
@@ -0,0 +1,35 @@
+import json
+from typing import Any, Dict
+
+from django.core.management.base import BaseCommand
+
+from backend.ccm.load_testing.broker_probe import PROBE_LIST_KEY, probe_broker
+from backend.ccm.task_brokers import BROKER_TYPES, get_task_broker
+
+
+class Command(BaseCommand):
+    help = 'Compare django-q brokers: task pickup latency and the database queries per second of a waiting worker. \
+            Uses its own queue, so it can run next to a live cluster.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--broker', action='append', choices=BROKER_TYPES, help='Broker to probe, repeatable. Defaults to all brokers.')
+        parser.add_argument('--samples', type=int, default=20, help='Tasks enqueued per broker')
+        parser.add_argument('--idle-seconds', type=float, default=5.0, help='Seconds the empty queue is watched for database load')
+        parser.add_argument('--redis-url', help='Redis url of the redis broker, defaults to Q_CLUSTER_REDIS')
+        parser.add_argument('--json', dest='json_path', type=str, help='Write the results as JSON to this path')
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        results = []
+        for name in options['broker'] or BROKER_TYPES:
+            broker = get_task_broker(name, list_key=PROBE_LIST_KEY, redis_url=options['redis_url'])
+            result = probe_broker(name, broker, samples=options['samples'], idle_seconds=options['idle_seconds']).to_dict()
+            results.append(result)
+            self.stdout.write(
+                f"{name:<8} pickup p50={result['pickup_p50_ms']}ms p95={result['pickup_p95_ms']}ms max={result['pickup_max_ms']}ms "
+                f"idle db_qps={result['idle_db_queries_per_s']} busy db_qps={result['busy_db_queries_per_s']}"
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
@@ -0,0 +1,30 @@
+from datetime import timedelta
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from backend.ccm.failure_reports import delete_failure_report, get_failure_report_storage
+from backend.ccm.models import FailureReport
+
+
+class Command(BaseCommand):
+    help = 'Delete the stored enrollment failure reports whose download link expired.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired reports')
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        expired = FailureReport.objects.filter(
+            created_at__lt=timezone.now() - timedelta(days=settings.FAILURE_REPORT_LINK_MAX_AGE_DAYS)
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} expired failure reports")
+            return
+        storage = get_failure_report_storage()
+        deleted = 0
+        for report in expired.iterator():
+            delete_failure_report(report, storage)
+            deleted += 1
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired failure reports"))
@@ -0,0 +1,41 @@
+import json
+from typing import Any, Dict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.ccm.load_testing.smtp_load import run_smtp_load_test
+
+MODES = ['pool', 'connection_per_message']
+
+
+class Command(BaseCommand):
+    help = 'Send guest invitation emails to a local aiosmtpd server and report sends per second, through the SMTP \
+            connection pool or with a connection per message. Requires aiosmtpd; nothing leaves the machine.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--mode', action='append', choices=MODES, help='Sending mode, repeatable. Defaults to all modes.')
+        parser.add_argument('--messages', type=int, default=500, help='Emails sent per mode')
+        parser.add_argument('--pool-size', type=int, default=4, help='Pool connections, also the threads of connection_per_message')
+        parser.add_argument('--batch-size', type=int, default=20, help='Emails sent over a pool connection at a time')
+        parser.add_argument('--drop-every', type=int, help='Have the server drop the connection instead of accepting every n-th email')
+        parser.add_argument('--json', dest='json_path', type=str, help='Write the results as JSON to this path')
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        results = []
+        for mode in options['mode'] or MODES:
+            try:
+                result = run_smtp_load_test(mode=mode, messages=options['messages'], pool_size=options['pool_size'],
+                                            batch_size=options['batch_size'], drop_every=options['drop_every']).to_dict()
+            except ImportError as e:
+                raise CommandError(f"The email load test needs aiosmtpd: {e}")
+            results.append(result)
+            self.stdout.write(
+                f"{mode:<24} sent={result['sent']}/{result['messages']} failed={result['failed']} "
+                f"sends/s={result['sends_per_second']} reconnects={result['reconnects']} "
+                f"server connections={result['server_connections']} dropped={result['server_dropped']}"
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
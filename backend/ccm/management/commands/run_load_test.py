@@ -0,0 +1,59 @@
+import json
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from backend.ccm.load_testing.fake_canvas import FakeCanvasConfig, FakeCanvasServer
+from backend.ccm.load_testing.runner import LoadTestRunner
+
+SCENARIOS = ['course', 'course_sections', 'instructor_sections', 'admin_sections', 'admin_sections_stream', 'merge_sections', 'enroll_task']
+
+
+class Command(BaseCommand):
+    help = 'Run the CCM views and background tasks against an in-process fake Canvas server and report latency \
+            percentiles and Canvas calls per operation. Uses the configured database, so run it against a dev database only.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='Scenario to run, repeatable. Defaults to all scenarios.')
+        parser.add_argument('--iterations', type=int, default=20, help='Operations per scenario')
+        parser.add_argument('--concurrency', type=int, default=1, help='Concurrent workers per scenario')
+        parser.add_argument('--latency-ms', type=float, default=50.0, help='Simulated Canvas latency per request')
+        parser.add_argument('--jitter-ms', type=float, default=10.0, help='Random +/- jitter added to the latency')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of Canvas requests answered with an error')
+        parser.add_argument('--rate-limit', type=float, default=700.0, help='Canvas rate limit bucket size')
+        parser.add_argument('--courses-per-account', type=int, default=20)
+        parser.add_argument('--sections-per-course', type=int, default=5)
+        parser.add_argument('--enrollment-rows', type=int, default=100, help='Rows per enroll_task operation')
+        parser.add_argument('--session-store', choices=list(settings.SESSION_ENGINES),
+                            help='Session storage to run with instead of SESSION_STORE, to compare database load and latency')
+        parser.add_argument('--json', dest='json_path', type=str, help='Write the results as JSON to this path')
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        config = FakeCanvasConfig(
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            rate_limit_capacity=options['rate_limit'],
+            courses_per_account=options['courses_per_account'],
+            sections_per_course=options['sections_per_course'],
+        )
+        results = []
+        session_engine = settings.SESSION_ENGINES[options['session_store'] or settings.SESSION_STORE]
+        with FakeCanvasServer(config) as server, override_settings(SESSION_ENGINE=session_engine):
+            runner = LoadTestRunner(server, enrollment_rows=options['enrollment_rows'])
+            for scenario in options['scenario'] or SCENARIOS:
+                result = runner.run(scenario, iterations=options['iterations'], concurrency=options['concurrency']).to_dict()
+                results.append(result)
+                self.stdout.write(
+                    f"{scenario:<20} p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+                    f"errors={result['errors']}/{result['iterations']} canvas_calls/op={result['canvas_calls_per_op']} "
+                    f"throughput={result['throughput_per_s']}/s db_queries/op={result['db_queries_per_op']} "
+                    f"db_qps={result['db_queries_per_s']}"
+                )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
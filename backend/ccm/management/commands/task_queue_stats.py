@@ -0,0 +1,32 @@
+import json
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.ccm.task_brokers import get_task_broker
+from backend.ccm.task_queues import TASK_QUEUES, get_queue_wait_stats
+
+
+class Command(BaseCommand):
+    help = 'Show, per task queue, how many tasks are waiting and how long recent tasks waited before a worker picked them up.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--json', action='store_true', help='Print the stats as JSON')
+
+    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
+        stats = []
+        for queue in TASK_QUEUES:
+            queue_stats = get_queue_wait_stats(queue)
+            queue_stats['queued'] = get_task_broker(settings.Q_CLUSTER_BROKER, list_key=queue).queue_size()
+            stats.append(queue_stats)
+
+        if options['json']:
+            self.stdout.write(json.dumps(stats, indent=2))
+            return
+        for queue_stats in stats:
+            self.stdout.write(
+                f"{queue_stats['queue']:<16} queued={queue_stats['queued']} samples={queue_stats['samples']} "
+                f"wait p50={queue_stats['wait_p50_s']}s p95={queue_stats['wait_p95_s']}s max={queue_stats['wait_max_s']}s "
+                f"last pickup={queue_stats['last_pickup']}"
+            )
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.15 on 2026-10-19 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ccm', '0002_enrollment_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollmentjob',
+            name='canvas_callback_url',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='enrollmentjob',
+            name='last_dispatched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='enrollmentjobchunk',
+            name='dispatched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.15 on 2026-10-19 15:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+OUTBOX_SCHEDULE_NAME = 'send-email-outbox'
+
+
+def create_outbox_schedule(apps, schema_editor):
+    # Sends the emails due for a retry, and any email whose outbox task couldn't be queued
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.get_or_create(
+        name=OUTBOX_SCHEDULE_NAME,
+        defaults={
+            'func': 'backend.ccm.background_tasks.email_outbox.send_outbox_emails',
+            'schedule_type': 'I',
+            'minutes': 1,
+            'repeats': -1,
+            'cluster': settings.Q_CLUSTER_INTERACTIVE_QUEUE,
+        },
+    )
+
+
+def delete_outbox_schedule(apps, schema_editor):
+    apps.get_model('django_q', 'Schedule').objects.filter(name=OUTBOX_SCHEDULE_NAME).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ccm', '0003_enrollment_job_scheduling'),
+        ('django_q', '0019_alter_task_options_alter_ormq_key_alter_ormq_lock_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('to_email', models.CharField(max_length=254)),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('attachment_filename', models.CharField(blank=True, max_length=255)),
+                ('attachment_content', models.TextField(blank=True)),
+                ('attachment_mimetype', models.CharField(blank=True, max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('dead', 'Dead')], default='pending', max_length=16)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField()),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outbox_email_due_idx')],
+            },
+        ),
+        migrations.RunPython(create_outbox_schedule, delete_outbox_schedule),
+    ]
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import migrations
+
+SCHEDULER_SCHEDULE_NAME = 'schedule-enrollment-chunks'
+
+
+def create_scheduler_schedule(apps, schema_editor):
+    # Dispatches the chunks lost with their worker again when no other job or chunk calls the scheduler
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.get_or_create(
+        name=SCHEDULER_SCHEDULE_NAME,
+        defaults={
+            'func': 'backend.ccm.background_tasks.enrollment_scheduler.schedule_enrollment_chunks',
+            'schedule_type': 'I',
+            'minutes': 1,
+            'repeats': -1,
+            'cluster': settings.Q_CLUSTER_INTERACTIVE_QUEUE,
+        },
+    )
+
+
+def delete_scheduler_schedule(apps, schema_editor):
+    apps.get_model('django_q', 'Schedule').objects.filter(name=SCHEDULER_SCHEDULE_NAME).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ccm', '0005_failure_reports'),
+        ('django_q', '0019_alter_task_options_alter_ormq_key_alter_ormq_lock_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_scheduler_schedule, delete_scheduler_schedule),
+    ]
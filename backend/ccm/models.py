@@ -1,3 +1,103 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class EnrollmentJob(models.Model):
+    """
+    An enrollment request, from the enrollment APIs or an uploaded CSV. The validated rows are stored in chunks,
+    which the enrollment scheduler hands to the task queue one at a time, sharing the workers fairly between users
+    and courses (see background_tasks.enrollment_scheduler).
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        RUNNING = 'running'
+        FINISHED = 'finished'
+        FAILED = 'failed'
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='enrollment_jobs')
+    course_id = models.BigIntegerField()
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    total_rows = models.PositiveIntegerField(default=0)
+    task_id = models.CharField(max_length=64, blank=True)
+    canvas_callback_url = models.CharField(max_length=255, blank=True)
+    # When the scheduler last started a chunk of the job, jobs served least recently go first
+    last_dispatched_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Enrollment job {self.pk} for course {self.course_id} ({self.status})'
+
+
+class EnrollmentJobChunk(models.Model):
+    job = models.ForeignKey(EnrollmentJob, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    rows = models.JSONField()
+    failures = models.JSONField(default=list)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['job', 'index']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'index'], name='unique_enrollment_job_chunk_index'),
+        ]
+
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting to be sent by the email outbox worker (see background_tasks.email_outbox). Failed sends are
+    retried with exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS, then the email is dead and left for an
+    admin to look at and retry.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        SENDING = 'sending'
+        SENT = 'sent'
+        DEAD = 'dead'
+
+    to_email = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    attachment_filename = models.CharField(max_length=255, blank=True)
+    attachment_content = models.TextField(blank=True)
+    attachment_mimetype = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # When a pending email is due, or when the worker sending it is considered lost
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'Email {self.pk} to {self.to_email} ({self.status})'
+
+    @property
+    def attachment(self):
+        if not self.attachment_filename:
+            return None
+        return (self.attachment_filename, self.attachment_content, self.attachment_mimetype)
+
+
+class FailureReport(models.Model):
+    """
+    A gzipped CSV of the failed enrollments of a request, stored in the 'failure_reports' storage and downloaded
+    by its user from the signed link in the enrollment summary email.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='failure_reports')
+    course_id = models.BigIntegerField()
+    filename = models.CharField(max_length=255)
+    storage_name = models.CharField(max_length=255)
+    rows = models.PositiveIntegerField(default=0)
+    compressed_size = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Failure report {self.pk} for course {self.course_id} ({self.rows} rows)'
@@ -0,0 +1,30 @@
+from django.contrib.flatpages.models import FlatPage
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from canvas_oauth.models import CanvasOAuth2Token
+from django_q.conf import Conf
+from django_q.signals import pre_execute
+
+from .canvas_api.canvas_token_cache import invalidate_cached_oauth_token
+from .context_processors import invalidate_has_canvas_token
+from .flatpages_cache import invalidate_cached_flatpages
+from .task_queues import record_task_wait
+
+
+@receiver([post_save, post_delete], sender=FlatPage)
+@receiver(m2m_changed, sender=FlatPage.sites.through)
+def flatpage_changed(sender, **kwargs):
+    invalidate_cached_flatpages()
+
+
+@receiver([post_save, post_delete], sender=CanvasOAuth2Token)
+def canvas_token_changed(sender, instance, **kwargs):
+    # Also covers tokens replaced or deleted outside delete_canvas_oauth_token, e.g. in the admin or by a user cascade
+    invalidate_has_canvas_token(instance.user_id)
+    invalidate_cached_oauth_token(instance.user)
+
+
+@receiver(pre_execute)
+def task_picked_up(sender, task, **kwargs):
+    # Tasks queued without a cluster go to the cluster of the worker running them
+    record_task_wait(task, task.get('cluster') or Conf.CLUSTER_NAME)
@@ -0,0 +1,55 @@
+import logging
+from typing import Optional
+
+import redis
+from django.conf import settings
+from django_q.brokers import Broker
+from django_q.brokers.orm import ORM
+from django_q.brokers.redis_broker import Redis
+from django_q.conf import Conf
+
+logger = logging.getLogger(__name__)
+
+BROKER_TYPES = ('orm', 'redis')
+
+
+class UrlRedis(Redis):
+    """ django-q Redis broker for a given url, usable whatever broker Q_CLUSTER is configured with. """
+
+    def __init__(self, url: str, list_key: Optional[str] = None):
+        self.url = url
+        super().__init__(list_key=list_key)
+
+    def get_connection(self, list_key: Optional[str] = None) -> redis.Redis:
+        return redis.from_url(self.url)
+
+
+def get_task_broker(broker_type: str, list_key: Optional[str] = None, redis_url: Optional[str] = None) -> Broker:
+    """
+    The django-q broker of the given type for the cluster queue (or `list_key`), independent of the Q_CLUSTER broker.
+    The Redis broker defaults to Q_CLUSTER_REDIS.
+    """
+    list_key = list_key or Conf.CLUSTER_NAME
+    if broker_type == 'orm':
+        return ORM(list_key=list_key)
+    if broker_type == 'redis':
+        return UrlRedis(redis_url or settings.Q_CLUSTER_REDIS, list_key=list_key)
+    raise ValueError(f"Unknown task broker '{broker_type}', expected one of {', '.join(BROKER_TYPES)}")
+
+
+def move_queued_tasks(source: Broker, target: Broker) -> int:
+    """
+    Move the tasks waiting in `source` to `target` and return how many were moved. Tasks are moved as the signed
+    payloads django-q queued, so the workers of `target` run them unchanged. ORM tasks are deleted once `target` has
+    them, ORM tasks locked by a running worker aren't waiting and stay where they are.
+    """
+    moved = 0
+    while True:
+        tasks = source.dequeue()
+        if not tasks:
+            return moved
+        for ack_id, payload in tasks:
+            target.enqueue(payload)
+            source.acknowledge(ack_id)
+            moved += 1
+        logger.info(f"Moved {moved} queued tasks from {source.info()} to {target.info()}")
@@ -0,0 +1,57 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from backend.ccm.utils import percentile
+
+logger = logging.getLogger(__name__)
+
+# Queue names are django-q cluster names, passed as `cluster=` to async_task. The bulk queue is the main cluster.
+INTERACTIVE_QUEUE: str = settings.Q_CLUSTER_INTERACTIVE_QUEUE
+BULK_QUEUE: str = settings.Q_CLUSTER['name']
+TASK_QUEUES = (INTERACTIVE_QUEUE, BULK_QUEUE)
+
+# Recent queue wait times kept per queue, shared by the workers of every cluster through the cache
+MAX_WAIT_SAMPLES = 200
+WAIT_SAMPLES_TIMEOUT = 24 * 60 * 60
+
+
+def _wait_samples_cache_key(queue: str) -> str:
+    return f"ccm:task_queue_waits:{queue}"
+
+
+def record_task_wait(task: Dict[str, Any], queue: str, now: Optional[datetime] = None) -> float:
+    """
+    Record how long a task waited in its queue, from async_task queueing it (`started`) to a worker picking it up.
+    Workers of the same queue may overwrite each other's latest sample, which is fine for monitoring.
+    """
+    now = now or timezone.now()
+    wait = max((now - task['started']).total_seconds(), 0.0)
+    logger.info(f"Task {task.get('name')} waited {wait:.3f}s in queue {queue}")
+    key = _wait_samples_cache_key(queue)
+    samples: List[List[float]] = cache.get(key) or []
+    samples.append([now.timestamp(), wait])
+    cache.set(key, samples[-MAX_WAIT_SAMPLES:], timeout=WAIT_SAMPLES_TIMEOUT)
+    return wait
+
+
+def get_queue_wait_stats(queue: str) -> Dict[str, Any]:
+    """ Wait time percentiles, in seconds, of the tasks recently picked up from the queue. """
+    samples = cache.get(_wait_samples_cache_key(queue)) or []
+    waits = [wait for _, wait in samples]
+    return {
+        'queue': queue,
+        'samples': len(waits),
+        'wait_p50_s': round(percentile(waits, 50), 3),
+        'wait_p95_s': round(percentile(waits, 95), 3),
+        'wait_max_s': round(max(waits, default=0.0), 3),
+        'last_pickup': datetime.fromtimestamp(samples[-1][0], tz=timezone.get_current_timezone()).isoformat() if samples else None,
+    }
+
+
+def clear_queue_wait_stats(queue: str) -> None:
+    cache.delete(_wait_samples_cache_key(queue))
@@ -0,0 +1,26 @@
+from django import template
+
+from backend.ccm.flatpages_cache import get_cached_flatpage as get_cached_flatpage_data, render_flatpage_fragment
+
+register = template.Library()
+
+
+@register.simple_tag
+def get_cached_flatpage(url):
+    """
+    Cached replacement for `{% get_flatpages url as pages %}` when a single page is needed, e.g.
+    `{% get_cached_flatpage '/footer/' as footer_page %}`. The page is a dict with `id` and `content`, or None.
+    """
+    return get_cached_flatpage_data(url)
+
+
+@register.simple_tag
+def render_cached_flatpage(url, current_year=None):
+    """
+    Render the flatpage at `url` as HTML, replacing `{{ current_year }}` when a year is given, or '' when there is
+    no such page, e.g. `{% render_cached_flatpage '/footer/' current_year as footer_html %}`.
+    """
+    page = get_cached_flatpage_data(url)
+    if page is None:
+        return ''
+    return render_flatpage_fragment(page, current_year)
@@ -1,4 +1,5 @@
 from functools import wraps
+import math
 import os, logging
 import time
 from typing import List, Optional
@@ -25,6 +26,14 @@ def parse_csp(csp_key: str, extra_csp_sources: Optional[List[str]] = None) -> Li
         else:
             return DEFAULT_CSP_VALUE + csp_value 
 
+def percentile(values: List[float], pct: float) -> float:
+    """ Nearest-rank percentile, `pct` in 0-100. Returns 0.0 for an empty list. """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
 def timeit(func):
     """
     Decorator to measure the execution time of a function.
@@ -154,6 +154,20 @@ CACHES = {
     }
 }
 
+# Session storage: 'cached_db' reads sessions from Redis and writes through to the database, 'cache' keeps them in
+# Redis only (run `manage.py migrate_sessions` when switching to it so logged in users keep their sessions) and
+# 'db' is the Django default
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+}
+SESSION_STORE = os.getenv('SESSION_STORE', 'cached_db')
+if SESSION_STORE not in SESSION_ENGINES:
+    logging.error(f"SESSION_STORE must be one of {', '.join(SESSION_ENGINES)}, got '{SESSION_STORE}'. Using cached_db.")
+    SESSION_STORE = 'cached_db'
+SESSION_ENGINE = SESSION_ENGINES[SESSION_STORE]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -195,6 +209,24 @@ STATICFILES_DIRS = (
 )
 STATIC_ROOT = os.path.join(PROJECT_ROOT, 'static')
 
+# Enrollment failure reports too large to attach to the summary email are stored gzipped in the 'failure_reports'
+# storage and linked from the email. Any Django storage backend works, e.g. django-storages' S3Storage with
+# FAILURE_REPORT_STORAGE_OPTIONS='{"bucket_name": "ccm-reports", "endpoint_url": "https://..."}'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'failure_reports': {
+        'BACKEND': os.getenv('FAILURE_REPORT_STORAGE_BACKEND', 'django.core.files.storage.FileSystemStorage'),
+        'OPTIONS': json.loads(os.getenv('FAILURE_REPORT_STORAGE_OPTIONS', 'null')) or {
+            'location': os.getenv('FAILURE_REPORT_ROOT', os.path.join(PROJECT_ROOT, 'failure_reports')),
+        },
+    },
+}
+# Failures attached to the email as CSV up to this many rows, larger reports are linked
+FAILURE_REPORT_ATTACHMENT_MAX_ROWS = int(os.getenv('FAILURE_REPORT_ATTACHMENT_MAX_ROWS', 500))
+# Days a failure report link stays valid
+FAILURE_REPORT_LINK_MAX_AGE_DAYS = int(os.getenv('FAILURE_REPORT_LINK_MAX_AGE_DAYS', 14))
+
 WEBPACK_LOADER = {
     'DEFAULT': {
         'BUNDLE_DIR_NAME': 'bundles/',
@@ -266,7 +298,6 @@ if CSRF_COOKIE_SECURE:
 
 SESSION_COOKIE_SAMESITE = os.getenv("SESSION_COOKIE_SAMESITE", 'None')
 CSRF_COOKIE_SAMESITE = os.getenv("CSRF_COOKIE_SAMESITE", 'None')
-RANDOM_PASSWORD_DEFAULT_LENGTH = os.getenv('RANDOM_PASSWORD_DEFAULT_LENGTH', 32)
 
 # Google Analytics
 GOOGLE_ANALYTICS_ID = os.getenv('GOOGLE_ANALYTICS_ID', None)
@@ -313,6 +344,16 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
     ],
+    # orjson based, same output as DRF's JSONRenderer/JSONParser
+    'DEFAULT_RENDERER_CLASSES': [
+        'backend.ccm.canvas_api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'backend.ccm.canvas_api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 SPECTACULAR_SETTINGS = {
@@ -332,8 +373,35 @@ Q_CLUSTER = {
     'retry': int(os.getenv('Q_CLUSTER_RETRY', 30 * 60)),      # 30 minutes in seconds
     'bulk': int(os.getenv('Q_CLUSTER_BULK', 5)),
     'max_attempts': int(os.getenv('Q_CLUSTER_MAX_ATTEMPTS', 1)),
-    'orm': 'default'
 }
+# Named task queues, each worked by its own qcluster (`Q_CLUSTER_NAME=<queue> python manage.py qcluster`) so short
+# tasks like guest invitation emails don't wait behind bulk enrollment jobs. The bulk queue is the cluster above.
+Q_CLUSTER_INTERACTIVE_QUEUE = 'CCM_Interactive'
+Q_CLUSTER['ALT_CLUSTERS'] = {
+    Q_CLUSTER_INTERACTIVE_QUEUE: {
+        'workers': int(os.getenv('Q_CLUSTER_INTERACTIVE_WORKERS', 2)),
+        'bulk': 1,
+    },
+}
+# Enrollment job chunks run one task at a time on the bulk queue, taking turns between users and their courses.
+# At most ENROLLMENT_MAX_RUNNING_CHUNKS run at once, and ENROLLMENT_MAX_RUNNING_CHUNKS_PER_USER for any one user,
+# which also shares the Canvas rate limit between users.
+ENROLLMENT_MAX_RUNNING_CHUNKS = int(os.getenv('ENROLLMENT_MAX_RUNNING_CHUNKS', Q_CLUSTER['workers']))
+ENROLLMENT_MAX_RUNNING_CHUNKS_PER_USER = int(os.getenv('ENROLLMENT_MAX_RUNNING_CHUNKS_PER_USER', 1))
+# Task broker: 'orm' has the workers poll the django_q_ormq table every Q_CLUSTER_POLL seconds, 'redis' pushes tasks
+# through a Redis list the workers block on, so tasks start right away without polling the database.
+# The Redis broker has no acknowledgements, so 'retry' doesn't apply to it. Move queued tasks when switching with
+# `manage.py migrate_task_queue`.
+Q_CLUSTER_BROKER = os.getenv('Q_CLUSTER_BROKER', 'orm')
+Q_CLUSTER_REDIS = os.getenv('Q_CLUSTER_REDIS', CACHES['default']['LOCATION'])
+if Q_CLUSTER_BROKER == 'redis':
+    Q_CLUSTER['redis'] = Q_CLUSTER_REDIS
+else:
+    if Q_CLUSTER_BROKER != 'orm':
+        logging.error(f"Q_CLUSTER_BROKER must be orm or redis, got '{Q_CLUSTER_BROKER}'. Using orm.")
+        Q_CLUSTER_BROKER = 'orm'
+    Q_CLUSTER['orm'] = 'default'
+    Q_CLUSTER['poll'] = float(os.getenv('Q_CLUSTER_POLL', 0.2))
 
 # Custom Canvas Roles
 try:
@@ -348,6 +416,17 @@ EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 EMAIL_USE_TLS = True
+# Seconds before a stalled SMTP connection is given up, so the email pool can reconnect
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', 30))
+# SMTP connections each email task worker keeps open, and the emails sent over one connection at a time
+EMAIL_POOL_SIZE = int(os.getenv('EMAIL_POOL_SIZE', 4))
+EMAIL_POOL_BATCH_SIZE = int(os.getenv('EMAIL_POOL_BATCH_SIZE', 20))
+# Emails are queued in the outbox and sent by a worker; a failed email is retried after EMAIL_OUTBOX_RETRY_DELAY
+# seconds, doubling up to EMAIL_OUTBOX_MAX_RETRY_DELAY, until EMAIL_OUTBOX_MAX_ATTEMPTS sends failed
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', 60))
+EMAIL_OUTBOX_MAX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_MAX_RETRY_DELAY', 3600))
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 500))
 
 EMAIL_FROM = os.getenv('EMAIL_FROM', 'canvas-ccm-system@umich.edu')
 EMAIL_TO_REPLY = os.getenv('EMAIL_TO_REPLY', '4help@umich.edu')
@@ -358,3 +437,15 @@ if CANVAS_ADMIN_API_TOKEN is None or CANVAS_ADMIN_API_TOKEN == '':
     logging.error('CANVAS_ADMIN_API_TOKEN is not set in environment variables!')
 
 GUEST_ACCOUNT_CREATION_LINK = os.getenv('GUEST_ACCOUNT_CREATION_LINK', 'https://accounts.it.umich.edu/friend/')
+# Guest lists of at least GUEST_SIS_IMPORT_MIN_USERS are created with one SIS users.csv import on the root account
+# instead of a Canvas API call per guest. The request polls the import every GUEST_SIS_IMPORT_POLL_INTERVAL seconds,
+# for up to GUEST_SIS_IMPORT_TIMEOUT seconds; an import still running is then waited for by bulk queue tasks of
+# GUEST_SIS_IMPORT_TASK_TIMEOUT seconds each (below Q_CLUSTER_TIMEOUT), which invite its guests once it's done.
+GUEST_SIS_IMPORT_MIN_USERS = int(os.getenv('GUEST_SIS_IMPORT_MIN_USERS', 50))
+GUEST_SIS_IMPORT_TIMEOUT = int(os.getenv('GUEST_SIS_IMPORT_TIMEOUT', 120))
+GUEST_SIS_IMPORT_POLL_INTERVAL = float(os.getenv('GUEST_SIS_IMPORT_POLL_INTERVAL', 2))
+GUEST_SIS_IMPORT_TASK_TIMEOUT = int(os.getenv('GUEST_SIS_IMPORT_TASK_TIMEOUT', min(10 * 60, Q_CLUSTER['timeout'] // 2)))
+# Seconds Canvas user lookups by login id are cached, shared by the web and qcluster processes, for found users and
+# for login ids without a user. A guest's lookup is forgotten once CCM creates the guest.
+CANVAS_USER_CACHE_TIMEOUT = int(os.getenv('CANVAS_USER_CACHE_TIMEOUT', 60 * 60))
+CANVAS_USER_NOT_FOUND_CACHE_TIMEOUT = int(os.getenv('CANVAS_USER_NOT_FOUND_CACHE_TIMEOUT', 5 * 60))
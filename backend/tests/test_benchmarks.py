@@ -0,0 +1,44 @@
+from django.test import SimpleTestCase
+
+from benchmarks.core import Benchmark, compare_results, time_benchmark
+
+
+def results(**medians):
+    return {'results': {name.replace('_', '.'): {'median': median} for name, median in medians.items()}}
+
+
+class CompareResultsTests(SimpleTestCase):
+
+    def test_statuses(self):
+        baseline = results(a=1.0, b=1.0, c=1.0, d=1.0)
+        current = results(a=1.05, b=1.25, c=0.5, e=1.0)
+
+        rows = {row['name']: row for row in compare_results(baseline, current, threshold=0.10)}
+
+        self.assertEqual(rows['a']['status'], 'ok')
+        self.assertEqual(rows['b']['status'], 'regression')
+        self.assertAlmostEqual(rows['b']['ratio'], 1.25)
+        self.assertEqual(rows['c']['status'], 'improvement')
+        self.assertEqual(rows['d']['status'], 'missing')
+        self.assertEqual(rows['e']['status'], 'new')
+
+    def test_threshold_is_respected(self):
+        rows = compare_results(results(a=1.0), results(a=1.25), threshold=0.30)
+        self.assertEqual(rows[0]['status'], 'ok')
+
+
+class TimeBenchmarkTests(SimpleTestCase):
+
+    def test_generator_setup_runs_teardown(self):
+        calls = []
+
+        def setup():
+            calls.append('setup')
+            yield lambda: calls.append('call')
+            calls.append('teardown')
+
+        stats = time_benchmark(Benchmark(name='gen', setup=setup, rounds=3, requires_db=False))
+
+        self.assertEqual(stats['rounds'], 3)
+        # one warmup call plus the timed rounds
+        self.assertEqual(calls, ['setup'] + ['call'] * 4 + ['teardown'])
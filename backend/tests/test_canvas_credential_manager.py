@@ -1,9 +1,13 @@
+import threading
+import time
+from django.core.cache import cache
 from django.test import TestCase
 from unittest.mock import patch, MagicMock
 from django.contrib.auth.models import User
-from canvas_oauth.exceptions import InvalidOAuthReturnError
+from canvas_oauth.exceptions import InvalidOAuthReturnError, MissingTokenError
 from canvas_oauth.models import CanvasOAuth2Token
 from backend.ccm.canvas_api.canvas_credential_manager import CanvasCredentialManager
+from backend.ccm.canvas_api.canvas_token_cache import delete_canvas_oauth_token, get_cached_oauth_token
 from django.utils import timezone
 
 from backend.ccm.canvas_api.exceptions import CanvasAccessTokenException
@@ -11,6 +15,7 @@ from backend.ccm.canvas_api.exceptions import CanvasAccessTokenException
 
 class TestCanvasCredentialManager(TestCase):
     def setUp(self):
+        cache.clear()
         self.credential_manager = CanvasCredentialManager()
         self.user = User.objects.create_user(username='testuser', password='testpass')
         self.request = MagicMock()
@@ -43,7 +48,7 @@ class TestCanvasCredentialManager(TestCase):
         mock_canvas.assert_called_once_with(expected_url, 'admin_token_123')
         self.assertEqual(result, mock_canvas_instance)
         
-    @patch('backend.ccm.canvas_api.canvas_credential_manager.get_oauth_token')
+    @patch('backend.ccm.canvas_api.canvas_token_cache.get_oauth_token')
     @patch('backend.ccm.canvas_api.canvas_credential_manager.Canvas')
     def test_token_renewal_before_expiry_buffer(self, mock_canvas, mock_get_oauth_token):
         """
@@ -78,7 +83,7 @@ class TestCanvasCredentialManager(TestCase):
         mock_canvas.assert_called_with(self.credential_manager.canvasURL, 'valid_access_token')
         self.assertEqual(result, mock_canvas_instance)
 
-    @patch('backend.ccm.canvas_api.canvas_credential_manager.get_oauth_token')
+    @patch('backend.ccm.canvas_api.canvas_token_cache.get_oauth_token')
     @patch('backend.ccm.canvas_api.canvas_credential_manager.Canvas')
     def test_get_canvasapi_instance_success(self, mock_canvas, mock_get_oauth_token):
         # Setup
@@ -94,7 +99,7 @@ class TestCanvasCredentialManager(TestCase):
         mock_canvas.assert_called_once_with(self.credential_manager.canvasURL, 'valid_access_token')
         self.assertEqual(result, mock_canvas_instance)
 
-    @patch('backend.ccm.canvas_api.canvas_credential_manager.get_oauth_token')
+    @patch('backend.ccm.canvas_api.canvas_token_cache.get_oauth_token')
     def test_get_canvasapi_instance_invalid_oauth(self, mock_get_oauth_token):
         # Setup
         mock_get_oauth_token.side_effect = InvalidOAuthReturnError("Invalid OAuth")
@@ -105,3 +110,97 @@ class TestCanvasCredentialManager(TestCase):
         # Execute and Assert
         with self.assertRaises(CanvasAccessTokenException):  # Removed parentheses
             self.credential_manager.get_canvasapi_instance(self.request)
+
+
+class TestCanvasTokenCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.request = MagicMock()
+        self.request.user = self.user
+        self.token = CanvasOAuth2Token.objects.create(
+            user=self.user,
+            access_token='test_access_token',
+            refresh_token='test_refresh_token',
+            expires=timezone.now() + timezone.timedelta(days=1)
+        )
+
+    @patch('backend.ccm.canvas_api.canvas_token_cache.get_oauth_token')
+    def test_token_is_cached(self, mock_get_oauth_token):
+        mock_get_oauth_token.return_value = 'test_access_token'
+
+        self.assertEqual(get_cached_oauth_token(self.request), 'test_access_token')
+        self.assertEqual(get_cached_oauth_token(self.request), 'test_access_token')
+
+        mock_get_oauth_token.assert_called_once_with(self.request)
+
+    @patch('backend.ccm.canvas_api.canvas_token_cache.get_oauth_token')
+    def test_token_within_expiration_buffer_is_not_cached(self, mock_get_oauth_token):
+        self.token.expires = timezone.now() + timezone.timedelta(minutes=10)
+        self.token.save()
+        mock_get_oauth_token.return_value = 'test_access_token'
+
+        get_cached_oauth_token(self.request)
+        get_cached_oauth_token(self.request)
+
+        self.assertEqual(mock_get_oauth_token.call_count, 2)
+
+    @patch('backend.ccm.canvas_api.canvas_token_cache.get_oauth_token')
+    def test_concurrent_requests_share_one_refresh(self, mock_get_oauth_token):
+        def slow_refresh(request):
+            time.sleep(0.2)
+            return 'test_access_token'
+        mock_get_oauth_token.side_effect = slow_refresh
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(get_cached_oauth_token(self.request))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['test_access_token'] * 5)
+        mock_get_oauth_token.assert_called_once()
+
+    @patch('backend.ccm.canvas_api.canvas_token_cache.get_oauth_token')
+    def test_lock_released_when_refresh_fails(self, mock_get_oauth_token):
+        mock_get_oauth_token.side_effect = [InvalidOAuthReturnError('Invalid OAuth'), 'test_access_token']
+
+        with self.assertRaises(InvalidOAuthReturnError):
+            get_cached_oauth_token(self.request)
+
+        self.assertEqual(get_cached_oauth_token(self.request), 'test_access_token')
+
+    @patch('backend.ccm.canvas_api.canvas_token_cache.get_oauth_token')
+    def test_deleting_token_invalidates_cache(self, mock_get_oauth_token):
+        mock_get_oauth_token.return_value = 'test_access_token'
+        get_cached_oauth_token(self.request)
+
+        delete_canvas_oauth_token(self.user)
+
+        self.assertFalse(CanvasOAuth2Token.objects.filter(user=self.user).exists())
+        mock_get_oauth_token.side_effect = MissingTokenError()
+        with self.assertRaises(MissingTokenError):
+            get_cached_oauth_token(self.request)
+
+    @patch('backend.ccm.canvas_api.canvas_token_cache.get_oauth_token')
+    def test_deleting_token_through_the_orm_invalidates_cache(self, mock_get_oauth_token):
+        mock_get_oauth_token.return_value = 'test_access_token'
+        get_cached_oauth_token(self.request)
+
+        self.token.delete()
+
+        mock_get_oauth_token.side_effect = MissingTokenError()
+        with self.assertRaises(MissingTokenError):
+            get_cached_oauth_token(self.request)
+
+    @patch('backend.ccm.canvas_api.canvas_token_cache.get_oauth_token')
+    def test_replacing_token_invalidates_cache(self, mock_get_oauth_token):
+        mock_get_oauth_token.return_value = 'test_access_token'
+        get_cached_oauth_token(self.request)
+
+        self.token.access_token = 'new_access_token'
+        self.token.save()
+
+        mock_get_oauth_token.return_value = 'new_access_token'
+        self.assertEqual(get_cached_oauth_token(self.request), 'new_access_token')
@@ -1,27 +1,30 @@
-from django.test import TestCase, RequestFactory
+from django.test import TestCase, RequestFactory, override_settings
 from unittest.mock import patch, MagicMock
+from backend.ccm.canvas_api.canvas_create_user_handler import CanvasCreateUserHandler
 from backend.ccm.canvas_api.canvas_user_handler import CanvasUserHandler
 from backend.ccm.canvas_api.canvasapi_serializer import LoginIdSerializer
 from django.contrib.auth.models import AnonymousUser, User
 from rest_framework.test import APIRequestFactory, force_authenticate
 from rest_framework import status
+from canvasapi.exceptions import Forbidden, ResourceDoesNotExist
+from canvasapi.user import User as CanvasUser
+from django.core.cache import cache
+from django.urls import reverse
+from backend.ccm.canvas_api.user_lookup import lookup_users, user_lookup_cache_key
+from rest_framework_tracking.models import APIRequestLog
 
 class TestCanvasUserHandler(TestCase):
     def setUp(self):
+        cache.clear()
         self.factory = APIRequestFactory()
         self.user = User.objects.create_user(username='testuser', email='testuser@gmail.com', password='testpass')
 
     @patch('backend.ccm.canvas_api.canvas_credential_manager.CanvasCredentialManager.get_canvasapi_admin_instance')
-    @patch('backend.ccm.canvas_api.canvas_user_handler.CanvasObjectROSerializer')
-    def test_get_user_happy_path(self, mock_serializer, mock_get_canvasapi_admin_instance):
+    def test_get_user_happy_path(self, mock_get_canvasapi_admin_instance):
         # Setup mocks
         mock_canvas_api = MagicMock()
         mock_get_canvasapi_admin_instance.return_value = mock_canvas_api
-        mock_user_info = MagicMock()
-        mock_canvas_api.get_user.return_value = mock_user_info
-        mock_serializer_instance = MagicMock()
-        mock_serializer.return_value = mock_serializer_instance
-        mock_serializer_instance.data = {'name': 'Test User', 'login_id': 'testuser@gmail.com'}
+        mock_canvas_api.get_user.return_value = CanvasUser(None, {'id': 1, 'name': 'Test User', 'sortable_name': 'User, Test'})
 
         # Prepare request
         login_id = 'testuser@gmail.com'
@@ -34,15 +37,12 @@ class TestCanvasUserHandler(TestCase):
 
         # Assertions
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['name'], 'Test User')
-        self.assertEqual(response.data['login_id'], 'testuser@gmail.com')
+        self.assertEqual(response.data, {'name': 'Test User', 'login_id': 'testuser@gmail.com'})
         mock_get_canvasapi_admin_instance.assert_called_once()
         mock_canvas_api.get_user.assert_called_once_with('testuser+gmail.com', 'sis_login_id')
-        mock_serializer.assert_called_once_with(mock_user_info, allowed_fields=view.user_allowed_fields, append_fields={'login_id': login_id})
 
     @patch('backend.ccm.canvas_api.canvas_credential_manager.CanvasCredentialManager.get_canvasapi_admin_instance')
-    @patch('backend.ccm.canvas_api.canvas_user_handler.CanvasObjectROSerializer')
-    def test_get_user_exception_path(self, mock_serializer, mock_get_canvasapi_admin_instance):
+    def test_get_user_exception_path(self, mock_get_canvasapi_admin_instance):
         # Setup mocks
         mock_canvas_api = MagicMock()
         mock_get_canvasapi_admin_instance.return_value = mock_canvas_api
@@ -65,8 +65,7 @@ class TestCanvasUserHandler(TestCase):
         self.assertEqual(error['failedInput'], login_id)
         
     @patch('backend.ccm.canvas_api.canvas_credential_manager.CanvasCredentialManager.get_canvasapi_admin_instance')
-    @patch('backend.ccm.canvas_api.canvas_user_handler.CanvasObjectROSerializer')
-    def test_get_user_not_found(self, mock_serializer, mock_get_canvasapi_admin_instance):
+    def test_get_user_not_found(self, mock_get_canvasapi_admin_instance):
         # Setup mocks
         from canvasapi.exceptions import ResourceDoesNotExist
         mock_canvas_api = MagicMock()
@@ -89,3 +88,114 @@ class TestCanvasUserHandler(TestCase):
         self.assertEqual(error['canvasStatusCode'], 404)
         self.assertEqual(error['message'], 'Not Found')
         self.assertEqual(error['failedInput'], login_id)
+
+    @override_settings(CANVAS_USER_CACHE_TIMEOUT=3600, CANVAS_USER_NOT_FOUND_CACHE_TIMEOUT=300)
+    @patch('backend.ccm.canvas_api.canvas_credential_manager.CanvasCredentialManager.get_canvasapi_admin_instance')
+    def test_get_user_cached_until_created(self, mock_get_canvasapi_admin_instance):
+        mock_canvas_api = MagicMock()
+        mock_get_canvasapi_admin_instance.return_value = mock_canvas_api
+        mock_canvas_api.get_user.side_effect = ResourceDoesNotExist('Not Found')
+        view = CanvasUserHandler()
+        request = self.factory.get('/api/admin/user/guest@gmail.com')
+        force_authenticate(request, user=self.user)
+
+        with patch('backend.ccm.canvas_api.user_lookup.cache.set', wraps=cache.set) as mock_cache_set:
+            self.assertEqual(view.get(request, 'guest@gmail.com').status_code, 404)
+            self.assertEqual(mock_cache_set.call_args.kwargs['timeout'], 300)
+        self.assertEqual(view.get(request, 'guest@gmail.com').status_code, 404)
+        self.assertEqual(mock_canvas_api.get_user.call_count, 1)
+
+        mock_account_create_user = MagicMock(return_value=CanvasUser(None, {'id': 5, 'name': 'Guest User'}))
+        with patch('backend.ccm.canvas_api.canvas_create_user_handler.Account.create_user', mock_account_create_user):
+            CanvasCreateUserHandler(credential_manager=MagicMock()).create_user_sync(
+                {'email': 'guest@gmail.com', 'givenName': 'Guest', 'surname': 'User'}
+            )
+        mock_canvas_api.get_user.side_effect = None
+        mock_canvas_api.get_user.return_value = CanvasUser(None, {'id': 5, 'name': 'Guest User'})
+
+        with patch('backend.ccm.canvas_api.user_lookup.cache.set', wraps=cache.set) as mock_cache_set:
+            self.assertEqual(view.get(request, 'guest@gmail.com').data, {'name': 'Guest User', 'login_id': 'guest@gmail.com'})
+            self.assertEqual(mock_cache_set.call_args.kwargs['timeout'], 3600)
+        self.assertEqual(mock_canvas_api.get_user.call_count, 2)
+
+
+class TestCanvasUsersLookupHandler(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='testuser@gmail.com', password='testpass')
+        self.client.force_login(self.user)
+        self.url = reverse('lookupUsers')
+
+    @patch('backend.ccm.canvas_api.canvas_credential_manager.CanvasCredentialManager.get_canvasapi_admin_instance')
+    def test_lookup_users_cached(self, mock_get_canvasapi_admin_instance):
+        mock_canvas_api = MagicMock()
+        mock_get_canvasapi_admin_instance.return_value = mock_canvas_api
+
+        def get_user(login_id, id_type):
+            if login_id.startswith('missing'):
+                raise ResourceDoesNotExist('Not Found')
+            return CanvasUser(None, {'name': login_id.split('+')[0].title()})
+        mock_canvas_api.get_user.side_effect = get_user
+        login_ids = [f'guest{index}@gmail.com' for index in range(20)] + ['missing@gmail.com', 'guest0@gmail.com']
+
+        response = self.client.post(self.url, {'login_ids': login_ids}, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 21)
+        self.assertEqual(response.data['guest3@gmail.com'], {'name': 'Guest3', 'login_id': 'guest3@gmail.com'})
+        self.assertIsNone(response.data['missing@gmail.com'])
+        self.assertEqual(mock_canvas_api.get_user.call_count, 21)
+        mock_canvas_api.get_user.assert_any_call('guest3+gmail.com', 'sis_login_id')
+
+        response = self.client.post(self.url, {'login_ids': ['Guest3@gmail.com', 'missing@gmail.com']}, content_type='application/json')
+
+        self.assertEqual(response.data, {'Guest3@gmail.com': {'name': 'Guest3', 'login_id': 'Guest3@gmail.com'}, 'missing@gmail.com': None})
+        self.assertEqual(mock_canvas_api.get_user.call_count, 21)
+
+    def test_lookup_users_refresh_skips_cached_not_found(self):
+        mock_canvas_api = MagicMock()
+        mock_canvas_api.get_user.side_effect = ResourceDoesNotExist('Not Found')
+        lookup_users(mock_canvas_api, ['guest@gmail.com'])
+        mock_canvas_api.get_user.side_effect = None
+        mock_canvas_api.get_user.return_value = CanvasUser(None, {'name': 'Guest'})
+
+        self.assertEqual(lookup_users(mock_canvas_api, ['guest@gmail.com']), ({'guest@gmail.com': None}, []))
+        users, _ = lookup_users(mock_canvas_api, ['guest@gmail.com'], refresh=True)
+
+        self.assertEqual(users, {'guest@gmail.com': {'name': 'Guest', 'login_id': 'guest@gmail.com'}})
+        self.assertEqual(mock_canvas_api.get_user.call_count, 2)
+        self.assertEqual(cache.get(user_lookup_cache_key('guest@gmail.com')), {'name': 'Guest', 'login_id': 'guest@gmail.com'})
+
+    @patch('backend.ccm.canvas_api.canvas_credential_manager.CanvasCredentialManager.get_canvasapi_admin_instance')
+    def test_lookup_users_with_errors(self, mock_get_canvasapi_admin_instance):
+        mock_canvas_api = MagicMock()
+        mock_get_canvasapi_admin_instance.return_value = mock_canvas_api
+
+        # Lookups run concurrently, so the outcome goes by login id rather than call order
+        def get_user(login_id, id_type):
+            if login_id == 'other+gmail.com':
+                raise Forbidden('Forbidden')
+            return CanvasUser(None, {'name': 'Guest'})
+        mock_canvas_api.get_user.side_effect = get_user
+
+        response = self.client.post(self.url, {'login_ids': ['guest@gmail.com', 'other@gmail.com']}, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['errors'][0]['failedInput'], 'other@gmail.com')
+        self.assertEqual(response.data['users'], {'guest@gmail.com': {'name': 'Guest', 'login_id': 'guest@gmail.com'}})
+        self.assertEqual(cache.get(user_lookup_cache_key('other@gmail.com')), None)
+
+    @patch('backend.ccm.canvas_api.canvas_credential_manager.CanvasCredentialManager.get_canvasapi_admin_instance')
+    def test_lookup_users_request_body_not_logged(self, mock_get_canvasapi_admin_instance):
+        mock_get_canvasapi_admin_instance.return_value.get_user.return_value = CanvasUser(None, {'name': 'Guest'})
+
+        self.client.post(self.url, {'login_ids': ['guest@gmail.com']}, content_type='application/json')
+
+        log = APIRequestLog.objects.get(path=self.url)
+        self.assertEqual((log.status_code, log.username_persistent), (200, 'testuser'))
+        self.assertEqual((log.data, log.query_params, log.response), ('', '', ''))
+
+    def test_lookup_users_invalid_payload(self):
+        response = self.client.post(self.url, {'login_ids': ['not-an-email']}, content_type='application/json')
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('errors', response.data)
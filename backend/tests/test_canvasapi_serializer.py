@@ -177,6 +177,66 @@ class EnrollRequestSerializerTests(SimpleTestCase):
         finally:
             canvasapi_serializer.MAX_ALLOWED_ENROLLMENTS = original_max
 
+    def test_single_section_enroll_invalid_login_id_format(self):
+        payload = {"users": [{"loginId": "user one", "role": "student"}, {"loginId": "guest@", "role": "student"}]}
+        serializer = SingleSectionEnrollRequestSerializer(data=payload)
+        self.assertFalse(serializer.is_valid())
+        errors = serializer.errors["non_field_errors"]
+        self.assertEqual([str(e['loginId']) for e in errors], ["user one", "guest@"])
+        self.assertEqual(str(errors[0]['error']), "Login ID 'user one' is not a valid uniqname or email address.")
+
+    def test_single_section_enroll_duplicate_login_ids(self):
+        payload = {"users": [
+            {"loginId": "user1", "role": "student"},
+            {"loginId": "guest@example.com", "role": "student"},
+            {"loginId": "USER1", "role": "ta"},
+        ]}
+        serializer = SingleSectionEnrollRequestSerializer(data=payload)
+        self.assertFalse(serializer.is_valid())
+        errors = serializer.errors["non_field_errors"]
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(str(errors[0]['loginId']), "USER1")
+        self.assertEqual(str(errors[0]['error']), "Login ID 'USER1' is listed more than once.")
+
+    def test_multi_section_enroll_same_user_in_different_sections(self):
+        payload = {"enrollments": [
+            {"sectionId": 1, "loginId": "user1", "role": "student"},
+            {"sectionId": 2, "loginId": "user1", "role": "student"},
+        ]}
+        serializer = MultiSectionEnrollRequestSerializer(data=payload)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data["enrollments"][1], {"sectionId": 2, "loginId": "user1", "role": "student"})
+
+        payload["enrollments"].append({"sectionId": "2", "loginId": "user1", "role": "teacher"})
+        serializer = MultiSectionEnrollRequestSerializer(data=payload)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(len(serializer.errors["non_field_errors"]), 1)
+
+    def test_enroll_field_errors_match_nested_serializer(self):
+        from rest_framework import serializers
+        from backend.ccm.canvas_api.canvasapi_serializer import MultiSectionEnrollSerializer
+
+        class NestedMultiSectionEnrollRequestSerializer(serializers.Serializer):
+            enrollments = MultiSectionEnrollSerializer(many=True)
+
+        payloads = [
+            {"enrollments": [
+                {"sectionId": "12", "loginId": " user1 ", "role": "student"},
+                {"sectionId": "abc", "loginId": "", "role": None},
+                {"sectionId": True, "loginId": 5, "role": "ta"},
+                "not-a-row",
+            ]},
+            {"enrollments": "not-a-list"},
+            {"enrollments": None},
+            {},
+        ]
+        for payload in payloads:
+            fast = MultiSectionEnrollRequestSerializer(data=payload)
+            nested = NestedMultiSectionEnrollRequestSerializer(data=payload)
+            self.assertFalse(fast.is_valid())
+            self.assertFalse(nested.is_valid())
+            self.assertEqual(fast.errors, nested.errors)
+
     # --- LoginIdSerializer Tests ---
     class LoginIdSerializerTests(SimpleTestCase):
         def test_login_id_serializer_valid_email(self):
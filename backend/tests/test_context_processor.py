@@ -1,11 +1,13 @@
 from django.test import SimpleTestCase, RequestFactory
 from unittest.mock import patch, MagicMock
 from django.conf import settings
+from django.core.cache import cache
 from backend.ccm.context_processors import ccm_globals
 
 class CCMGlobalsTests(SimpleTestCase):
 
     def setUp(self):
+        cache.clear()
         self.factory = RequestFactory()
         self.request = self.factory.get('/')
         self.request.session = {
@@ -40,3 +42,23 @@ class CCMGlobalsTests(SimpleTestCase):
         self.assertEqual(context['ccm_globals']['baseHelpURL'], settings.HELP_URL)
         self.assertEqual(context['ccm_globals']['googleAnalyticsId'], settings.GOOGLE_ANALYTICS_ID)
         self.assertEqual(context['ccm_globals']['umConsentManagerScriptUrl'], settings.UM_CONSENT_MANAGER_SCRIPT_URL)
+
+    @patch('backend.ccm.context_processors.GlobalsUserSerializer')
+    @patch('backend.ccm.context_processors.CanvasOAuth2Token.objects.filter')
+    def test_ccm_globals_user_memoized_in_session(self, mock_canvas_oauth_filter, mock_globals_user_serializer):
+        self.request.user = MagicMock(is_authenticated=True, pk=1)
+        mock_globals_user_serializer.return_value.data = {'loginId': 'jdoe', 'isStaff': False}
+        mock_canvas_oauth_filter.return_value.exists.return_value = False
+
+        ccm_globals(self.request)
+        context = ccm_globals(self.request)
+
+        mock_globals_user_serializer.assert_called_once()
+        self.assertEqual(context['ccm_globals']['user'], {'loginId': 'jdoe', 'isStaff': False, 'hasCanvasToken': False})
+
+        # A different user in the same session is serialized again
+        self.request.user = MagicMock(is_authenticated=True, pk=2)
+        mock_globals_user_serializer.return_value.data = {'loginId': 'asmith', 'isStaff': False}
+        context = ccm_globals(self.request)
+        self.assertEqual(context['ccm_globals']['userLoginID'], 'asmith')
+
@@ -21,6 +21,9 @@ class CanvasCourseMergeSectionsViewTests(APITestCase):
         self.course_id = 1
         self.client.force_authenticate(user=self.user)
         self.url = reverse('mergeSections', kwargs={'course_id': self.course_id})
+        patcher = patch('backend.ccm.canvas_api.course_section_api_handler.Course.get_sections', return_value=[])
+        self.mock_get_sections = patcher.start()
+        self.addCleanup(patcher.stop)
 
     
     @patch('backend.ccm.canvas_api.course_section_api_handler.Section.cross_list_section')
@@ -135,6 +138,40 @@ class CanvasCourseMergeSectionsViewTests(APITestCase):
         self.assertTrue(any('402' in failed_input for failed_input in failed_inputs))
         self.assertTrue(any('403' in failed_input for failed_input in failed_inputs))
 
+    @patch.object(Section, 'cross_list_section', autospec=True)
+    @patch('backend.ccm.canvas_api.course_section_api_handler.CanvasCredentialManager.get_canvasapi_instance')
+    def test_merge_sections_skips_merged_sections_and_keeps_input_order(self, mock_get_canvasapi_instance, mock_cross_list_section):
+        mock_get_canvasapi_instance.return_value = MagicMock()
+        self.mock_get_sections.return_value = [
+            Section(None, {'id': 601, 'name': 'Section 601', 'course_id': self.course_id, 'nonxlist_course_id': 9}),
+            Section(None, {'id': 600, 'name': 'Section 600', 'course_id': self.course_id, 'nonxlist_course_id': None}),
+        ]
+
+        def cross_list_section(section, course_id):
+            if section.id in (602, 604):
+                raise CanvasException("Canvas API error during cross-listing")
+            return Section(None, {'id': section.id, 'name': f'Section {section.id}', 'course_id': course_id, 'nonxlist_course_id': 9})
+        mock_cross_list_section.side_effect = cross_list_section
+
+        response = self.client.post(self.url, data={"sectionIds": [604, 601, 603, 602]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(sorted(call.args[0].id for call in mock_cross_list_section.call_args_list), [602, 603, 604])
+        self.assertEqual([section['id'] for section in response.data['sections']], [601, 603])
+        self.assertEqual(response.data['failedSectionIds'], [604, 602])
+        self.assertEqual(
+            [error['failedInput'] for error in response.data['errors']],
+            ['section_id 604 to course_id 1', 'section_id 602 to course_id 1']
+        )
+
+        # Retrying merges only the sections that failed
+        mock_cross_list_section.reset_mock()
+        mock_cross_list_section.side_effect = lambda section, course_id: Section(None, {'id': section.id, 'name': f'Section {section.id}', 'course_id': course_id})
+        response = self.client.post(self.url, data={"sectionIds": response.data['failedSectionIds']}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([section['id'] for section in response.data], [604, 602])
+
 
 class CanvasCourseUnmergeSectionsViewTests(APITestCase):
     def setUp(self):
@@ -253,3 +290,23 @@ class CanvasCourseUnmergeSectionsViewTests(APITestCase):
         self.assertEqual(response.data['errors'][0]['message'], 'Canvas API error during decross-listing')
         # side_effect could be in any order with async calls
         self.assertIn('section_id ',response.data['errors'][0]['failedInput'])
+        self.assertEqual(len(response.data['sections']), 2)
+
+    @patch.object(Section, 'decross_list_section', autospec=True)
+    @patch('backend.ccm.canvas_api.course_section_api_handler.CanvasCredentialManager.get_canvasapi_instance')
+    def test_unmerge_sections_results_in_input_order(self, mock_get_canvasapi_instance, mock_decross_list_section):
+        mock_get_canvasapi_instance.return_value = MagicMock()
+
+        def decross_list_section(section):
+            if section.id % 2:
+                raise CanvasException("Canvas API error during decross-listing")
+            return Section(None, {'id': section.id, 'name': f'Section {section.id}', 'course_id': section.id})
+        mock_decross_list_section.side_effect = decross_list_section
+        section_ids = list(range(730, 700, -1))
+
+        response = self.client.delete(self.url, data={"sectionIds": section_ids}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual([section['id'] for section in response.data['sections']], list(range(730, 700, -2)))
+        self.assertEqual(response.data['failedSectionIds'], list(range(729, 700, -2)))
+        self.assertEqual([error['failedInput'] for error in response.data['errors']], [f'section_id {section_id}' for section_id in range(729, 700, -2)])
@@ -3,6 +3,7 @@
 from django.test import TestCase
 from unittest.mock import patch
 from backend.ccm.background_tasks import send_email_non_umich_user_task
+from backend.ccm.models import OutboxEmail
 
 class SendEmailNonUmichUserTaskTests(TestCase):
 	def test_send_email_logs_error_on_smtp_exception(self):
@@ -20,17 +21,15 @@ class SendEmailNonUmichUserTaskTests(TestCase):
 				mock_log_error.assert_called()
 				args, kwargs = mock_log_error.call_args
 				assert "SMTP error" in args[0]
-	def test_sending_emails_no_exception(self):
-		emails = ["test1@example.com"]
-		with patch("backend.ccm.background_tasks.send_email_non_umich_user_task.gather_email_send") as mock_gather:
-			mock_gather.return_value = None
-			try:
-				send_email_non_umich_user_task.sending_emails(emails)
-			except Exception as e:
-				self.fail(f"Exception was raised: {e}")
-	def test_sending_emails_happy_path(self):
+	def test_sending_emails_queues_invitations(self):
 		emails = ["test1@example.com", "test2@example.com"]
-		with patch("backend.ccm.background_tasks.send_email_non_umich_user_task.gather_email_send") as mock_gather:
-			mock_gather.return_value = None
-			send_email_non_umich_user_task.sending_emails(emails)
-			mock_gather.assert_called_once_with(emails)
+		result = send_email_non_umich_user_task.sending_emails(emails)
+		queued = OutboxEmail.objects.order_by('id')
+		self.assertEqual(result, {'queued': 2})
+		self.assertEqual([email.to_email for email in queued], emails)
+		self.assertTrue(all(email.body == send_email_non_umich_user_task.email_body() for email in queued))
+	def test_email_body_rendered_from_template(self):
+		body = send_email_non_umich_user_task.email_body()
+		link = send_email_non_umich_user_task.guest_account_creation_link
+		self.assertIn(f'<a href="{link}">{link}</a>', body)
+		self.assertIs(body, send_email_non_umich_user_task.email_body())
@@ -1,8 +1,12 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, SimpleTestCase, override_settings
 from unittest.mock import patch, MagicMock
 from backend.ccm.canvas_api.canvas_create_user_handler import CanvasCreateUserHandler
+from backend.ccm.background_tasks.guest_sis_import_task import MAX_FINISH_ATTEMPTS, finish_guest_sis_import
+from backend.ccm.canvas_api.exceptions import CanvasErrorHandler, HTTPAPIError
+from backend.ccm.canvas_api.sis_user_import import PendingGuest, create_users_by_sis_import
 from rest_framework import status
-from canvasapi.exceptions import BadRequest
+from canvasapi.exceptions import BadRequest, CanvasException
+from canvasapi.sis_import import SisImport
 
 class CreateUserHandlerTests(TestCase):
     
@@ -226,3 +230,143 @@ class CreateUserHandlerTests(TestCase):
         self.assertEqual(response.data, expected)
 
 
+
+
+@override_settings(GUEST_SIS_IMPORT_MIN_USERS=3, GUEST_SIS_IMPORT_TIMEOUT=5, GUEST_SIS_IMPORT_POLL_INTERVAL=0)
+class SisUserImportTests(SimpleTestCase):
+
+    def setUp(self):
+        self.users = [
+            {"email": f"guest{index}@mailinator.com", "givenName": "Guest", "surname": f"Number{index}"}
+            for index in range(4)
+        ]
+        self.account = MagicMock()
+        self.account.create_sis_import.return_value = SisImport(None, {'id': 7, 'workflow_state': 'created'})
+        lookup_patcher = patch('backend.ccm.canvas_api.sis_user_import.lookup_users', return_value=({}, []))
+        self.mock_lookup_users = lookup_patcher.start()
+        self.addCleanup(lookup_patcher.stop)
+
+    def imported_rows(self):
+        return self.account.create_sis_import.call_args.args[0].getvalue().decode().splitlines()[1:]
+
+    def test_row_outcomes_mapped_back_to_users(self):
+        self.account.get_sis_import.side_effect = [
+            SisImport(None, {'id': 7, 'workflow_state': 'importing'}),
+            SisImport(None, {
+                'id': 7, 'workflow_state': 'imported_with_messages',
+                'processing_warnings': [
+                    ['users.csv', "An existing Canvas user with the SIS ID guest1+mailinator.com has already claimed "
+                                  "guest1+mailinator.com's requested login information, skipping"],
+                ],
+                'processing_errors': [['users.csv', 'Invalid email address for user guest2+mailinator.com.']],
+            }),
+        ]
+
+        results = create_users_by_sis_import(MagicMock(), self.account, self.users)
+
+        self.assertEqual(self.imported_rows()[0], 'guest0+mailinator.com,guest0+mailinator.com,Guest Number0,Number0 Guest,guest0@mailinator.com,active')
+        self.assertEqual(results[0], {'name': 'Guest Number0', 'login_id': 'guest0+mailinator.com', 'email': 'guest0@mailinator.com'})
+        self.assertTrue(CanvasErrorHandler().is_canvas_user_created(results[1]))
+        self.assertEqual(str(results[2].original_exception), 'Invalid email address for user guest2+mailinator.com.')
+        self.assertFalse(CanvasErrorHandler().is_canvas_user_created(results[2]))
+        self.assertIsInstance(results[3], dict)
+
+    @patch('backend.ccm.canvas_api.sis_user_import.time.monotonic', side_effect=[0, 1, 6])
+    def test_unfinished_import_leaves_its_users_pending(self, mock_monotonic):
+        self.account.get_sis_import.side_effect = CanvasException('Canvas unavailable')
+
+        results = create_users_by_sis_import(MagicMock(), self.account, self.users)
+
+        self.assertEqual(self.account.get_sis_import.call_count, 1)
+        self.assertEqual(results, [PendingGuest(f'guest{index}+mailinator.com', f'guest{index}@mailinator.com', 7) for index in range(4)])
+
+    def test_existing_logins_not_imported(self):
+        # Canvas would adopt guest0's login, created without a SIS id, into the import and report nothing for it
+        self.mock_lookup_users.return_value = (
+            {'guest0@mailinator.com': {'name': 'Guest Number0', 'login_id': 'guest0@mailinator.com'}, 'guest1@mailinator.com': None},
+            [HTTPAPIError('guest2@mailinator.com', CanvasException('Canvas unavailable'))],
+        )
+        self.account.get_sis_import.return_value = SisImport(None, {'id': 7, 'workflow_state': 'imported'})
+
+        results = create_users_by_sis_import(MagicMock(), self.account, self.users)
+
+        self.assertEqual([row.split(',')[1] for row in self.imported_rows()], ['guest1+mailinator.com', 'guest3+mailinator.com'])
+        # A cached "not found" may predate a guest created since, the existing logins are looked up in Canvas
+        self.assertTrue(self.mock_lookup_users.call_args.kwargs['refresh'])
+        self.assertTrue(CanvasErrorHandler().is_canvas_user_created(results[0]))
+        self.assertIsInstance(results[1], dict)
+        self.assertEqual((results[2].failed_input, str(results[2].original_exception)), ('guest2+mailinator.com', 'Canvas unavailable'))
+        self.assertIsInstance(results[3], dict)
+
+    def test_existing_logins_only_submit_no_import(self):
+        self.mock_lookup_users.return_value = ({user['email']: {'name': 'Guest', 'login_id': user['email']} for user in self.users}, [])
+
+        results = create_users_by_sis_import(MagicMock(), self.account, self.users)
+
+        self.account.create_sis_import.assert_not_called()
+        self.assertTrue(all(CanvasErrorHandler().is_canvas_user_created(result) for result in results))
+
+    def test_handler_uses_sis_import_from_minimum_users(self):
+        handler = CanvasCreateUserHandler(credential_manager=MagicMock())
+        with patch('backend.ccm.canvas_api.canvas_create_user_handler.create_users_by_sis_import', return_value=['imported']) as mock_import, \
+                patch.object(handler, 'create_users_one_by_one', return_value=['created']) as mock_one_by_one:
+            self.assertEqual(handler.create_users(self.users[:2]), ['created'])
+            mock_import.assert_not_called()
+            self.assertEqual(handler.create_users(self.users), ['imported'])
+
+            mock_import.side_effect = CanvasException('Forbidden')
+            self.assertEqual(handler.create_users(self.users), ['created'])
+            mock_one_by_one.assert_called_with(self.users)
+
+    @patch('backend.ccm.canvas_api.canvas_create_user_handler.queue_finish_guest_sis_import')
+    def test_handler_reports_pending_users_and_queues_their_invitations(self, mock_queue_finish):
+        handler = CanvasCreateUserHandler(credential_manager=MagicMock())
+        results = [{'name': 'Guest Number0', 'login_id': 'guest0+mailinator.com', 'email': 'guest0@mailinator.com'}] + [
+            PendingGuest(f'guest{index}+mailinator.com', f'guest{index}@mailinator.com', 7) for index in range(1, 4)
+        ]
+        with patch('backend.ccm.canvas_api.canvas_create_user_handler.create_users_by_sis_import', return_value=results):
+            self.assertEqual(handler.create_users(self.users), results)
+
+        mock_queue_finish.assert_called_once_with(7, self.users[1:])
+        outcomes, invitations = handler.process_user_creation_outcomes(self.users, results)
+        self.assertEqual(invitations, ['guest0@mailinator.com'])
+        self.assertEqual(outcomes[1], {'email': 'guest1@mailinator.com', 'userCreated': 'pending'})
+        self.assertFalse(any(handler.external_user_error.is_creation_invitation_all_success(outcome) for outcome in outcomes))
+
+
+@override_settings(GUEST_SIS_IMPORT_TASK_TIMEOUT=5)
+@patch('backend.ccm.background_tasks.guest_sis_import_task.CanvasCredentialManager')
+@patch('backend.ccm.background_tasks.guest_sis_import_task.enqueue_emails')
+@patch('backend.ccm.background_tasks.guest_sis_import_task.queue_finish_guest_sis_import')
+class GuestSisImportTaskTests(SimpleTestCase):
+
+    def setUp(self):
+        self.users = [
+            {"email": f"guest{index}@mailinator.com", "givenName": "Guest", "surname": f"Number{index}"}
+            for index in range(2)
+        ]
+
+    @patch('backend.ccm.background_tasks.guest_sis_import_task.wait_for_import')
+    def test_finished_import_invites_created_guests(self, mock_wait, mock_queue_finish, mock_enqueue_emails, mock_manager):
+        mock_wait.return_value = SisImport(None, {
+            'id': 7, 'workflow_state': 'imported_with_messages',
+            'processing_errors': [['users.csv', 'Invalid email address for user guest1+mailinator.com.']],
+        })
+
+        self.assertEqual(finish_guest_sis_import(7, self.users), {'state': 'imported_with_messages', 'invited': 1})
+
+        self.assertEqual(mock_wait.call_args.kwargs['timeout'], 5)
+        self.assertEqual(mock_enqueue_emails.call_args.args[0], ['guest0@mailinator.com'])
+        mock_queue_finish.assert_not_called()
+
+    @patch('backend.ccm.background_tasks.guest_sis_import_task.wait_for_import')
+    def test_running_import_waited_for_again(self, mock_wait, mock_queue_finish, mock_enqueue_emails, mock_manager):
+        mock_wait.return_value = SisImport(None, {'id': 7, 'workflow_state': 'importing'})
+
+        self.assertEqual(finish_guest_sis_import(7, self.users), {'state': 'importing', 'invited': 0})
+        mock_queue_finish.assert_called_once_with(7, self.users, 2)
+
+        mock_queue_finish.reset_mock()
+        finish_guest_sis_import(7, self.users, attempt=MAX_FINISH_ATTEMPTS)
+        mock_queue_finish.assert_not_called()
+        mock_enqueue_emails.assert_not_called()
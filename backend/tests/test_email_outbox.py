@@ -0,0 +1,137 @@
+import smtplib
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.admin.sites import AdminSite
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from backend.ccm.admin import OutboxEmailAdmin
+from backend.ccm.background_tasks import email_outbox
+from backend.ccm.email_pool import SMTPConnectionPool
+from backend.ccm.models import OutboxEmail
+from backend.ccm.task_queues import INTERACTIVE_QUEUE
+
+
+class RefusingEmailBackend(LocmemEmailBackend):
+    """ locmem backend refusing the addresses in `refused`. """
+    refused: set = set()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & self.refused:
+                raise smtplib.SMTPRecipientsRefused({address: (550, b'No such user') for address in message.to})
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_RETRY_DELAY=60, EMAIL_OUTBOX_MAX_RETRY_DELAY=3600)
+class EmailOutboxTests(TestCase):
+
+    def setUp(self):
+        RefusingEmailBackend.refused = set()
+        self.pool = SMTPConnectionPool(size=2, batch_size=5, connection_factory=RefusingEmailBackend)
+        patcher = patch('backend.ccm.background_tasks.email_outbox.get_email_pool', return_value=self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.pool.close)
+
+    def test_enqueue_queues_outbox_task_on_commit(self):
+        with patch('backend.ccm.background_tasks.email_outbox.async_task') as mock_async_task:
+            with self.captureOnCommitCallbacks(execute=True):
+                email_outbox.enqueue_email('user@example.com', 'Summary', '<p>Done</p>', ('failures.csv', 'a,b\n', 'text/csv'))
+                mock_async_task.assert_not_called()
+
+        self.assertEqual(mock_async_task.call_args.args[0], email_outbox.SEND_OUTBOX_TASK)
+        self.assertEqual(mock_async_task.call_args.kwargs['cluster'], INTERACTIVE_QUEUE)
+        self.assertEqual(OutboxEmail.objects.get().attachment, ('failures.csv', 'a,b\n', 'text/csv'))
+
+    def test_sends_due_emails(self):
+        email_outbox.enqueue_emails(['one@example.com', 'two@example.com'], 'Invitation', '<p>Hi</p>')
+        email_outbox.enqueue_email('user@example.com', 'Summary', '<p>Done</p>', ('failures.csv', 'a,b\n', 'text/csv'))
+
+        result = email_outbox.send_outbox_emails()
+
+        self.assertEqual(result['sent'], 3)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['one@example.com', 'two@example.com', 'user@example.com'])
+        summary = next(message for message in mail.outbox if message.to == ['user@example.com'])
+        self.assertEqual(summary.attachments[0][0], 'failures.csv')
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.Status.SENT).exists())
+        self.assertEqual(email_outbox.send_outbox_emails(), {'sent': 0, 'failed': 0})
+
+    @override_settings(EMAIL_OUTBOX_BATCH_SIZE=2)
+    def test_sends_due_emails_in_batches_until_none_is_due(self):
+        email_outbox.enqueue_emails([f'user{i}@example.com' for i in range(5)], 'Invitation', '<p>Hi</p>')
+
+        with patch('backend.ccm.background_tasks.email_outbox.async_task') as mock_async_task:
+            result = email_outbox.send_outbox_emails()
+
+        self.assertEqual(result['sent'], 5)
+        self.assertEqual(len(mail.outbox), 5)
+        mock_async_task.assert_not_called()
+
+    @override_settings(EMAIL_OUTBOX_BATCH_SIZE=2)
+    def test_queues_itself_again_after_time_limit(self):
+        email_outbox.enqueue_emails([f'user{i}@example.com' for i in range(5)], 'Invitation', '<p>Hi</p>')
+
+        with patch.object(email_outbox, 'SEND_OUTBOX_TIME_LIMIT', timedelta(0)), \
+                patch('backend.ccm.background_tasks.email_outbox.async_task') as mock_async_task, \
+                self.captureOnCommitCallbacks(execute=True):
+            result = email_outbox.send_outbox_emails()
+
+        self.assertEqual(result['sent'], 2)
+        self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.Status.PENDING).count(), 3)
+        self.assertEqual(mock_async_task.call_args.args[0], email_outbox.SEND_OUTBOX_TASK)
+
+    def test_failed_email_retried_with_backoff_then_dead(self):
+        RefusingEmailBackend.refused = {'bad@example.com'}
+        email_outbox.enqueue_emails(['bad@example.com', 'good@example.com'], 'Invitation', '<p>Hi</p>')
+
+        email_outbox.send_outbox_emails()
+
+        bad = OutboxEmail.objects.get(to_email='bad@example.com')
+        self.assertEqual(bad.status, OutboxEmail.Status.PENDING)
+        self.assertEqual(bad.attempts, 1)
+        self.assertIn('No such user', bad.last_error)
+        self.assertGreater(bad.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        self.assertEqual(OutboxEmail.objects.get(to_email='good@example.com').status, OutboxEmail.Status.SENT)
+
+        for _ in range(2):
+            OutboxEmail.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now())
+            email_outbox.send_outbox_emails()
+
+        bad.refresh_from_db()
+        self.assertEqual(bad.status, OutboxEmail.Status.DEAD)
+        self.assertEqual(bad.attempts, 3)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_claimed_emails_not_sent_twice_until_sending_times_out(self):
+        email_outbox.enqueue_emails(['one@example.com'], 'Invitation', '<p>Hi</p>')
+
+        self.assertEqual(len(email_outbox.claim_due_emails()), 1)
+        self.assertEqual(email_outbox.claim_due_emails(), [])
+
+        later = timezone.now() + email_outbox.SENDING_TIMEOUT + timedelta(seconds=1)
+        reclaimed = email_outbox.claim_due_emails(now=later)
+        self.assertEqual(reclaimed[0].attempts, 2)
+
+    def test_retry_delay_doubles_up_to_maximum(self):
+        self.assertEqual(
+            [email_outbox.retry_delay(attempts).total_seconds() for attempts in (1, 2, 3, 10)],
+            [60, 120, 240, 3600]
+        )
+
+    def test_admin_retries_dead_emails(self):
+        email = OutboxEmail.objects.create(
+            to_email='bad@example.com', subject='Invitation', body='<p>Hi</p>', status=OutboxEmail.Status.DEAD,
+            attempts=3, next_attempt_at=timezone.now() - timedelta(days=1),
+        )
+        model_admin = OutboxEmailAdmin(OutboxEmail, AdminSite())
+
+        with patch.object(model_admin, 'message_user'):
+            model_admin.retry_emails(None, OutboxEmail.objects.all())
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.Status.PENDING, 0))
+        self.assertEqual(email_outbox.send_outbox_emails()['sent'], 1)
@@ -0,0 +1,115 @@
+import smtplib
+import threading
+import time
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.test import SimpleTestCase
+
+from backend.ccm.canvas_api.email_users import build_email
+from backend.ccm.email_pool import SMTPConnectionPool
+
+
+class FlakyEmailBackend(LocmemEmailBackend):
+    """ locmem backend that records how many threads used it at once and drops the connection for the addresses in `drop`. """
+    drop: set = set()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.opened = 0
+        self.is_open = False
+        self.in_use = 0
+        self.max_in_use = 0
+        self._lock = threading.Lock()
+
+    def open(self):
+        if not self.is_open:
+            self.opened += 1
+            self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        with self._lock:
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+        try:
+            time.sleep(0.001)
+            return self._send(messages)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+
+    def _send(self, messages):
+        recipient = messages[0].to[0]
+        if recipient in self.drop:
+            self.drop.discard(recipient)
+            self.is_open = False
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        if recipient.startswith('refused'):
+            raise smtplib.SMTPRecipientsRefused({recipient: (550, b'No such user')})
+        return super().send_messages(messages)
+
+
+class SMTPConnectionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        mail.outbox = []
+        FlakyEmailBackend.drop = set()
+        self.connections = []
+
+    def create_pool(self, size=2, batch_size=5) -> SMTPConnectionPool:
+        def connection_factory():
+            connection = FlakyEmailBackend()
+            self.connections.append(connection)
+            return connection
+        pool = SMTPConnectionPool(size=size, batch_size=batch_size, connection_factory=connection_factory)
+        self.addCleanup(pool.close)
+        return pool
+
+    def emails(self, count, prefix='guest'):
+        return [build_email(f'{prefix}{i}@example.com', 'Invitation', '<p>Hi</p>') for i in range(count)]
+
+    def test_sends_over_persistent_connections(self):
+        pool = self.create_pool()
+
+        report = pool.send_messages(self.emails(23))
+        report = pool.send_messages(self.emails(7))
+
+        self.assertEqual(report.sent, 7)
+        self.assertEqual(len(mail.outbox), 30)
+        self.assertEqual(len(self.connections), 2)
+        self.assertTrue(all(connection.opened <= 1 for connection in self.connections))
+
+    def test_reconnects_when_connection_drops(self):
+        FlakyEmailBackend.drop = {'guest3@example.com'}
+        pool = self.create_pool(size=1)
+
+        report = pool.send_messages(self.emails(6))
+
+        self.assertEqual(report.sent, 6)
+        self.assertEqual(report.reconnects, 1)
+        self.assertEqual(self.connections[0].opened, 2)
+        # Emails sent before the drop aren't sent again
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), sorted(f'guest{i}@example.com' for i in range(6)))
+
+    def test_reports_failed_recipients(self):
+        pool = self.create_pool()
+
+        report = pool.send_messages(self.emails(3) + self.emails(1, prefix='refused'))
+
+        self.assertEqual(report.sent, 3)
+        self.assertEqual(report.reconnects, 0)
+        self.assertEqual([recipients for recipients, _ in report.failed], ['refused0@example.com'])
+        self.assertEqual(report.to_dict()['failed'], 1)
+
+    def test_connection_used_by_one_thread_at_a_time(self):
+        pool = self.create_pool(size=3, batch_size=1)
+
+        report = pool.send_messages(self.emails(60))
+
+        self.assertEqual(report.sent, 60)
+        self.assertGreater(report.sends_per_second, 0)
+        self.assertTrue(all(connection.max_in_use <= 1 for connection in self.connections))
+        self.assertTrue(all(connection.opened <= 1 for connection in self.connections))
@@ -57,4 +57,36 @@ class SendEmailTests(TestCase):
         mock_email_message.return_value = mock_instance
         email_users.send_email('to@example.com', 'Test Subject', 'Test Body')
         self.assertEqual(mock_instance.content_subtype, "html")
-        mock_logger.error.assert_called_once()
\ No newline at end of file
+        mock_logger.error.assert_called_once()
+
+class BuildBulkEmailsTests(TestCase):
+    @override_settings(EMAIL_FROM='from@example.com', EMAIL_TO_REPLY='reply@example.com', EMAIL_DEBUG=False)
+    def test_prebuilt_message_matches_built_email(self):
+        messages = email_users.build_bulk_emails(['one@example.com', 'two@example.com'], 'Invitation', '<p>Hi</p>')
+        single = email_users.build_email('one@example.com', 'Invitation', '<p>Hi</p>').message()
+        prebuilt = messages[0].message()
+        for header in ('To', 'From', 'Reply-To', 'Subject', 'Content-Type', 'Content-Transfer-Encoding'):
+            self.assertEqual(prebuilt[header], single[header])
+        self.assertEqual(prebuilt.as_bytes(linesep='\r\n').split(b'\r\n\r\n', 1)[1],
+                         single.as_bytes(linesep='\r\n').split(b'\r\n\r\n', 1)[1])
+        self.assertEqual(messages[1].message()['To'], 'two@example.com')
+        self.assertNotEqual(prebuilt['Message-ID'], messages[1].message()['Message-ID'])
+
+    def test_messages_share_encoded_content(self):
+        messages = email_users.build_bulk_emails(['one@example.com', 'two@example.com'], 'Invitation', '<p>Hi</p>')
+        self.assertIs(messages[0].shared, messages[1].shared)
+        messages[0].message().as_bytes(linesep='\r\n')
+        with patch.object(messages[1].shared.mime, 'as_bytes') as mock_as_bytes:
+            encoded = messages[1].message().as_bytes(linesep='\r\n')
+        mock_as_bytes.assert_not_called()
+        self.assertTrue(encoded.startswith(b'To: two@example.com\r\n'))
+        self.assertEqual(encoded.count(b'\r\nTo: '), 0)
+
+    def test_prebuilt_messages_sent_by_backends(self):
+        from django.core import mail
+        from django.core.mail import get_connection
+        messages = email_users.build_bulk_emails(['one@example.com', 'two@example.com'], 'Invitation', '<p>Hi</p>')
+        self.assertEqual(get_connection('django.core.mail.backends.locmem.EmailBackend').send_messages(messages), 2)
+        self.assertEqual([message.to for message in mail.outbox], [['one@example.com'], ['two@example.com']])
+        with patch('sys.stdout'):
+            self.assertEqual(get_connection('django.core.mail.backends.console.EmailBackend').send_messages(messages), 2)
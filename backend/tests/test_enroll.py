@@ -11,6 +11,19 @@ from canvasapi.section import Section
 from canvasapi import Canvas
 from backend.ccm.canvas_api.canvas_credential_manager import CanvasCredentialManager
 from backend.ccm.background_tasks import enroll_um_users_task
+from backend.ccm.models import EnrollmentJob
+from backend.ccm.task_queues import BULK_QUEUE
+
+
+def gathered(*batches):
+    """ side_effect for gather_enrollments, passing each call's users and the results of the next batch to on_result. """
+    batches = iter(batches)
+
+    def gather(enrollment_users, canvas_api, on_result):
+        for user, result in zip(enrollment_users, next(batches)):
+            on_result(user, result)
+    return gather
+
 
 class TestEnrollUmUsersBackgroundTask(TestCase):
 
@@ -56,10 +69,10 @@ class TestEnrollUmUsersBackgroundTask(TestCase):
         # Arrange
         mock_canvas_api = MagicMock()
         mock_course_manager.get_canvasapi_instance.return_value = mock_canvas_api
-        mock_gather_enrollments.return_value = [
+        mock_gather_enrollments.side_effect = gathered([
             {'enrollment_state': 'active', 'role': 'student', 'user_id': '1'},
             {'enrollment_state': 'active', 'role': 'teacher', 'user_id': '2'}
-        ]
+        ])
         task = {
             'enrollment_params': [
                 {'loginId': 'student1', 'role': 'student', 'sectionId': 123},
@@ -88,10 +101,10 @@ class TestEnrollUmUsersBackgroundTask(TestCase):
         mock_canvas_api = MagicMock()
         mock_course_manager.get_canvasapi_instance.return_value = mock_canvas_api
         # One success, one failure
-        mock_gather_enrollments.return_value = [
+        mock_gather_enrollments.side_effect = gathered([
             {'enrollment_state': 'active', 'role': 'student', 'user_id': '1'},
             CanvasException('API error')
-        ]
+        ])
         task = {
             'enrollment_params': [
                 {'loginId': 'student1', 'role': 'student', 'sectionId': 123},
@@ -110,7 +123,7 @@ class TestEnrollUmUsersBackgroundTask(TestCase):
             subjects = [args[0] for args, _ in mock_logger_info.call_args_list]
             self.assertTrue(any(expected_email_subject in s for s in subjects))
 class MultiSectionEnrollmentViewTests(APITestCase):
-    @patch('backend.ccm.canvas_api.section_enrollments_api_handler.async_task')
+    @patch('backend.ccm.background_tasks.enrollment_scheduler.async_task')
     @patch('backend.ccm.canvas_api.section_enrollments_api_handler.reverse')
     def test_post_enroll_users_validation_error(self, mock_reverse, mock_async_task):
         """Test validation error when using 'login_id' instead of 'loginId' in enrollments data."""
@@ -144,7 +157,7 @@ class MultiSectionEnrollmentViewTests(APITestCase):
         self.course_id = 123
         self.url = reverse('multipleSectionEnrollments', kwargs={'course_id': self.course_id})
 
-    @patch('backend.ccm.canvas_api.section_enrollments_api_handler.async_task')
+    @patch('backend.ccm.background_tasks.enrollment_scheduler.async_task')
     @patch('backend.ccm.canvas_api.section_enrollments_api_handler.reverse')
     def test_post_enroll_users_success(self, mock_reverse, mock_async_task):
         # Arrange
@@ -165,18 +178,40 @@ class MultiSectionEnrollmentViewTests(APITestCase):
         django_request.data = req_data
         from backend.ccm.canvas_api.section_enrollments_api_handler import MultiSectionEnrollmentView
         view = MultiSectionEnrollmentView()
-        response = view.post(django_request, self.course_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = view.post(django_request, self.course_id)
         self.assertEqual(response.status_code, 200)
-        self.assertIn('task_id', response.data)
-        self.assertEqual(response.data['task_id'], 'mock-task-id')
+        job = EnrollmentJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual((job.course_id, job.total_rows, job.status), (self.course_id, 2, EnrollmentJob.Status.RUNNING))
+        self.assertEqual(job.chunks.get().rows[1], {"loginId": "student2", "role": "student", "sectionId": 789})
         mock_async_task.assert_called_once()
+        self.assertEqual(mock_async_task.call_args.args[0], 'backend.ccm.background_tasks.enroll_um_users_task.enroll_um_users_chunk')
+        self.assertEqual(mock_async_task.call_args.kwargs['cluster'], BULK_QUEUE)
         mock_reverse.assert_called_once()
+
+    @patch('backend.ccm.canvas_api.section_enrollments_api_handler.ENROLLMENT_UPLOAD_CHUNK_SIZE', 2)
+    @patch('backend.ccm.background_tasks.enrollment_scheduler.async_task')
+    def test_large_request_is_chunked_and_capped_per_user(self, mock_async_task):
+        req_data = {"enrollments": [{"loginId": f"student{index}", "role": "student", "sectionId": 456} for index in range(5)]}
+        django_request = self.factory.post(self.url, data=req_data, format='json')
+        django_request.user = self.user
+        django_request.data = req_data
+        from backend.ccm.canvas_api.section_enrollments_api_handler import MultiSectionEnrollmentView
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = MultiSectionEnrollmentView().post(django_request, self.course_id)
+
+        self.assertEqual(response.data['chunks_total'], 3)
+        # One request no longer takes every bulk worker, the user runs ENROLLMENT_MAX_RUNNING_CHUNKS_PER_USER chunks
+        self.assertEqual(mock_async_task.call_count, 1)
+        self.assertEqual(response.data['queue_position'], 1)
+
 class SingleSectionEnrollmentViewTests(APITestCase):
-    @patch('backend.ccm.canvas_api.section_enrollments_api_handler.async_task')
+    @patch('backend.ccm.canvas_api.section_enrollments_api_handler.schedule_enrollment_chunks')
     @patch('backend.ccm.canvas_api.section_enrollments_api_handler.reverse')
-    def test_post_enroll_users_async_task_exception(self, mock_reverse, mock_async_task):
-        """Test error response when async_task raises an exception."""
-        mock_async_task.side_effect = Exception('Async task error!')
+    def test_post_enroll_users_scheduler_exception(self, mock_reverse, mock_schedule):
+        """Test error response when the enrollment scheduler raises an exception."""
+        mock_schedule.side_effect = Exception('Async task error!')
         mock_reverse.return_value = '/mock-callback-url/'
         req_data = {
             "users": [
@@ -192,12 +227,13 @@ class SingleSectionEnrollmentViewTests(APITestCase):
         django_request.user = self.user
         django_request.data = req_data
         view = SingleSectionEnrollmentView()
-        response = view.post(django_request, self.course_id, self.section_id)
+        response = view.post(django_request, self.section_id, self.course_id)
         self.assertEqual(response.status_code, 500)
         self.assertIn('errors', response.data)
         self.assertIn('Async task error!', str(response.data))
+        self.assertEqual(EnrollmentJob.objects.get().status, EnrollmentJob.Status.FAILED)
 
-    @patch('backend.ccm.canvas_api.section_enrollments_api_handler.async_task')
+    @patch('backend.ccm.background_tasks.enrollment_scheduler.async_task')
     @patch('backend.ccm.canvas_api.section_enrollments_api_handler.reverse')
     def test_post_enroll_users_validation_error(self, mock_reverse, mock_async_task):
         """Test validation error when using 'login_id' instead of 'loginId' in request data."""
@@ -231,7 +267,7 @@ class SingleSectionEnrollmentViewTests(APITestCase):
         self.section_id = 456
         self.url = reverse('singleSectionEnrollments', kwargs={'course_id': self.course_id, 'section_id': self.section_id})
 
-    @patch('backend.ccm.canvas_api.section_enrollments_api_handler.async_task')
+    @patch('backend.ccm.background_tasks.enrollment_scheduler.async_task')
     @patch('backend.ccm.canvas_api.section_enrollments_api_handler.reverse')
     def test_post_enroll_users_success(self, mock_reverse, mock_async_task):
         # Arrange
@@ -251,10 +287,11 @@ class SingleSectionEnrollmentViewTests(APITestCase):
         django_request.user = self.user
         django_request.data = req_data
         view = SingleSectionEnrollmentView()
-        response = view.post(django_request, self.course_id, self.section_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = view.post(django_request, self.section_id, self.course_id)
         self.assertEqual(response.status_code, 200)
-        self.assertIn('task_id', response.data)
-        self.assertEqual(response.data['task_id'], 'mock-task-id')
+        job = EnrollmentJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.chunks.get().rows[0], {"loginId": "student1", "role": "student", "sectionId": self.section_id})
         mock_async_task.assert_called_once()
         mock_reverse.assert_called_once()
 class TestEnrollUmUsersTask(TestCase):
@@ -286,10 +323,10 @@ class TestEnrollUmUsersTask(TestCase):
             # Patch the global course_manager to our test instance
             import backend.ccm.background_tasks.enroll_um_users_task as enroll_task_mod
             enroll_task_mod.course_manager = self.credential_manager
-            mock_gather_enrollments.return_value = [
+            mock_gather_enrollments.side_effect = gathered([
                 {'enrollment_state': 'active', 'role': 'student', 'user_id': '1'},
                 {'enrollment_state': 'active', 'role': 'teacher', 'user_id': '2'}
-            ]
+            ])
             task = {
                 'enrollment_params': [
                     {'loginId': 'student1', 'role': 'student', 'sectionId': 123},
@@ -449,7 +486,7 @@ class TestEmailEnrollmentSummary(TestCase):
             {'sectionId': 2, 'loginId': 'user2', 'role': 'teacher', 'error': 'Another error'}
         ]
         self.enrollment_count = 5
-    @patch('backend.ccm.background_tasks.enroll_um_users_task.send_email')
+    @patch('backend.ccm.background_tasks.enroll_um_users_task.enqueue_email')
     def test_email_subject_and_body(self, mock_send_email):
         enroll_um_users_task.email_enrollment_summary(
             req_user_email=self.req_user_email,
@@ -463,7 +500,8 @@ class TestEmailEnrollmentSummary(TestCase):
         body = kwargs['body']
         expected_subject = f"For course {self.course_id}, 3/5 enrollments finished successfully (2 failed)"
         expected_body = (
-            f"For Course <a href='https://{{domain}}/courses/{self.course_id}'>{self.course_id}</a> enrolling users encountered failures. See attachment for error list."
+            f"For Course <a href='https://{{domain}}/courses/{self.course_id}'>{self.course_id}</a> enrolling users encountered failures:"
+            "<ul><li>2 &times; Other error, e.g. user1, user2</li></ul>See attachment for error list."
         )
         # Get domain from the actual body
         import re
@@ -479,8 +517,8 @@ class TestEmailEnrollmentSummary(TestCase):
             {'sectionId': 2, 'loginId': 'user2', 'role': 'teacher', 'error': 'Another error'}
         ]
 
-    @patch('backend.ccm.background_tasks.enroll_um_users_task.send_email')
-    def test_email_enrollment_summary_calls_send_email(self, mock_send_email):
+    @patch('backend.ccm.background_tasks.enroll_um_users_task.enqueue_email')
+    def test_email_enrollment_summary_queues_email(self, mock_send_email):
         req_user_email = 'testuser@example.com'
         course_id = 123
         failed_enrollments = self.get_sample_failed_enrollments()
@@ -498,4 +536,72 @@ class TestEmailEnrollmentSummary(TestCase):
         self.assertEqual(kwargs['to_email'], req_user_email)
         self.assertIn(str(course_id), kwargs['subject'])
         self.assertIn('failures', kwargs['body'])
-        self.assertIsNotNone(kwargs['attachment'])
\ No newline at end of file
+        self.assertIsNotNone(kwargs['attachment'])
+
+class TestEnrollmentResults(SimpleTestCase):
+    def test_counts_and_spools_failures(self):
+        from canvasapi.exceptions import ResourceDoesNotExist
+        from backend.ccm.background_tasks.enrollment_results import EnrollmentResults
+        users = [enroll_um_users_task.EnrollmentUser(loginId=f'user{i}', role='student', sectionId=i) for i in range(50)]
+        # A tiny spool so the failures are written to disk
+        with EnrollmentResults(max_memory=64) as results:
+            for index, user in enumerate(users):
+                results.add(user, ResourceDoesNotExist('Not found') if index % 5 == 0 else {'id': index, 'user': {'name': 'x' * 1000}})
+
+            self.assertEqual((results.succeeded, results.failed, results.total), (40, 10, 50))
+            self.assertEqual(list(results.failures)[1], {'sectionId': 5, 'loginId': 'user5', 'role': 'student', 'category': 'not_found', 'error': 'Not found'})
+            self.assertEqual(len(list(results.failures)), 10)
+            self.assertEqual(results.describe(), '10/50 enrollments failed: 10 x User or section not found in Canvas (e.g. user0, user5, user10: Not found)')
+
+    def test_summary_groups_failures_by_category(self):
+        from canvasapi.exceptions import BadRequest, RateLimitExceeded, ResourceDoesNotExist
+        from backend.ccm.background_tasks.enrollment_results import EnrollmentResults
+        errors = [ResourceDoesNotExist('Not found')] * 3000 + [RateLimitExceeded('Rate limit exceeded')] * 2 + [BadRequest('Invalid role')]
+        with EnrollmentResults() as results:
+            for index, error in enumerate(errors):
+                results.add(enroll_um_users_task.EnrollmentUser(loginId=f'user{index}', role='student', sectionId=1), error)
+
+            self.assertEqual(
+                [(label, count, len(samples)) for label, count, samples in results.summary.categories()],
+                [('User or section not found in Canvas', 3000, 3), ('Canvas rate limit exceeded', 2, 2), ('Rejected by Canvas as invalid', 1, 1)]
+            )
+            self.assertEqual(results.failed, 3003)
+
+    def test_unauthorized_insufficient_scopes(self):
+        from canvasapi.exceptions import Unauthorized
+        from backend.ccm.background_tasks.enrollment_results import EnrollmentResults
+        user = enroll_um_users_task.EnrollmentUser(loginId='user', role='student', sectionId=1)
+        with EnrollmentResults() as results:
+            results.add(user, Unauthorized('Invalid access token'))
+            self.assertIsNone(results.unauthorized_error)
+            error = Unauthorized('Insufficient scopes on access token')
+            results.add(user, error)
+            self.assertIs(results.unauthorized_error, error)
+
+    def test_gather_enrollments_reports_each_result(self):
+        import threading
+        import time
+        from backend.ccm.canvas_api.constants import MAX_CONCURRENCY
+        running = []
+        lock = threading.Lock()
+        max_running = [0]
+
+        def fake_enroll_user(canvas_api, section_id, login_id, role):
+            with lock:
+                running.append(login_id)
+                max_running[0] = max(max_running[0], len(running))
+            time.sleep(0.001)
+            with lock:
+                running.remove(login_id)
+            if section_id % 2:
+                raise Exception('failed')
+            return {'id': section_id}
+
+        users = [enroll_um_users_task.EnrollmentUser(loginId=f'USER{i}', role='Student', sectionId=i) for i in range(40)]
+        results = []
+        with patch('backend.ccm.background_tasks.enroll_um_users_task.enroll_user', side_effect=fake_enroll_user):
+            enroll_um_users_task.gather_enrollments(users, MagicMock(), lambda user, result: results.append((user, result)))
+
+        self.assertEqual(sorted(user.sectionId for user, _ in results), list(range(40)))
+        self.assertTrue(all(isinstance(result, Exception) == bool(user.sectionId % 2) for user, result in results))
+        self.assertLessEqual(max_running[0], MAX_CONCURRENCY)
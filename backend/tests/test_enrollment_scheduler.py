@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django_q.models import Schedule
+from rest_framework.test import APITestCase
+
+from backend.ccm.background_tasks.enrollment_scheduler import (
+    CHUNK_DISPATCH_TIMEOUT, QueuedJob, fair_chunk_order, get_queue_position, schedule_enrollment_chunks
+)
+from backend.ccm.models import EnrollmentJob, EnrollmentJobChunk
+
+T0 = datetime(2026, 1, 5, 9, 0, tzinfo=dt_timezone.utc)
+
+
+def queued_job(job_id, user_id, course_id, waiting_chunks, created_minute=0, last_dispatched_minute=None):
+    return QueuedJob(
+        id=job_id, user_id=user_id, course_id=course_id, waiting_chunks=waiting_chunks,
+        created_at=T0 + timedelta(minutes=created_minute),
+        last_dispatched_at=T0 + timedelta(minutes=last_dispatched_minute) if last_dispatched_minute is not None else None,
+    )
+
+
+class FairChunkOrderTests(SimpleTestCase):
+
+    def test_users_take_turns(self):
+        # User 1 uploaded two large files before user 2 uploaded a small one
+        jobs = [queued_job(1, 1, 100, 3), queued_job(2, 1, 100, 3, created_minute=1), queued_job(3, 2, 200, 2, created_minute=2)]
+
+        self.assertEqual(fair_chunk_order(jobs), [1, 3, 1, 3, 1, 2, 2, 2])
+
+    def test_courses_of_a_user_take_turns(self):
+        jobs = [queued_job(1, 1, 100, 2), queued_job(2, 1, 100, 1, created_minute=1), queued_job(3, 1, 300, 2, created_minute=2)]
+
+        self.assertEqual(fair_chunk_order(jobs), [1, 3, 1, 3, 2])
+
+    def test_least_recently_served_first(self):
+        jobs = [queued_job(1, 1, 100, 2, last_dispatched_minute=10), queued_job(2, 2, 200, 2, last_dispatched_minute=5), queued_job(3, 3, 300, 1, created_minute=20)]
+
+        self.assertEqual(fair_chunk_order(jobs), [3, 2, 1, 2, 1])
+
+    def test_user_slots(self):
+        jobs = [queued_job(1, 1, 100, 5), queued_job(2, 2, 200, 5, created_minute=1)]
+
+        self.assertEqual(fair_chunk_order(jobs, {1: 1, 2: 2}), [1, 2, 2])
+        self.assertEqual(fair_chunk_order(jobs, {1: 0, 2: 0}), [])
+
+    def test_skips_jobs_without_waiting_chunks(self):
+        self.assertEqual(fair_chunk_order([queued_job(1, 1, 100, 0), queued_job(2, 2, 200, 1)]), [2])
+
+
+@override_settings(ENROLLMENT_MAX_RUNNING_CHUNKS=3, ENROLLMENT_MAX_RUNNING_CHUNKS_PER_USER=2)
+@patch('backend.ccm.background_tasks.enrollment_scheduler.async_task')
+class ScheduleEnrollmentChunksTests(TestCase):
+
+    def setUp(self):
+        self.busy_user = User.objects.create_user(username='busy')
+        self.other_user = User.objects.create_user(username='other')
+        self.big_jobs = [self.create_job(self.busy_user, 100, chunks=4), self.create_job(self.busy_user, 100, chunks=4)]
+        self.small_job = self.create_job(self.other_user, 200, chunks=1)
+
+    def create_job(self, user, course_id, chunks):
+        job = EnrollmentJob.objects.create(user=user, course_id=course_id, total_rows=chunks)
+        for index in range(chunks):
+            EnrollmentJobChunk.objects.create(job=job, index=index, rows=[{'loginId': f'user{index}', 'role': 'student', 'sectionId': 1}])
+        return job
+
+    def dispatched_job_ids(self, mock_async_task):
+        return [EnrollmentJobChunk.objects.get(pk=call.kwargs['task']['chunk_id']).job_id for call in mock_async_task.call_args_list]
+
+    def test_caps_running_chunks(self, mock_async_task):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(schedule_enrollment_chunks(), 3)
+
+        self.assertEqual(self.dispatched_job_ids(mock_async_task), [self.big_jobs[0].id, self.small_job.id, self.big_jobs[0].id])
+        self.assertIsNotNone(self.small_job.chunks.get().dispatched_at)
+        self.big_jobs[0].refresh_from_db()
+        self.assertEqual(self.big_jobs[0].status, EnrollmentJob.Status.RUNNING)
+        # Every slot is taken until a chunk finishes
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(schedule_enrollment_chunks(), 0)
+
+    def test_finished_chunk_frees_a_slot_for_the_user(self, mock_async_task):
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_enrollment_chunks()
+        self.small_job.chunks.update(processed_at=timezone.now())
+        EnrollmentJob.objects.filter(pk=self.small_job.pk).update(status=EnrollmentJob.Status.FINISHED)
+        mock_async_task.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(schedule_enrollment_chunks(), 0)
+        # The busy user is at the per user cap, their third chunk waits for one of the two running ones
+        self.big_jobs[0].chunks.filter(index=0).update(processed_at=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(schedule_enrollment_chunks(), 1)
+        # Jobs of the same course run oldest first
+        self.assertEqual(self.dispatched_job_ids(mock_async_task), [self.big_jobs[0].id])
+
+    def test_lost_chunk_is_dispatched_again(self, mock_async_task):
+        EnrollmentJobChunk.objects.filter(job=self.small_job).update(dispatched_at=timezone.now() - CHUNK_DISPATCH_TIMEOUT - timedelta(minutes=1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_enrollment_chunks()
+
+        self.assertIn(self.small_job.id, self.dispatched_job_ids(mock_async_task))
+
+    def test_lost_chunk_is_dispatched_again_by_the_schedule(self, mock_async_task):
+        # The only job's chunk was lost with its worker, no other job or chunk will call the scheduler
+        EnrollmentJob.objects.exclude(pk=self.small_job.pk).delete()
+        EnrollmentJob.objects.filter(pk=self.small_job.pk).update(status=EnrollmentJob.Status.RUNNING)
+        self.small_job.chunks.update(dispatched_at=timezone.now() - CHUNK_DISPATCH_TIMEOUT - timedelta(minutes=1))
+        schedule = Schedule.objects.get(name='schedule-enrollment-chunks')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(import_string(schedule.func)(), 1)
+
+        self.assertEqual(schedule.schedule_type, Schedule.MINUTES)
+        self.assertEqual(self.dispatched_job_ids(mock_async_task), [self.small_job.id])
+        self.assertGreater(self.small_job.chunks.get().dispatched_at, timezone.now() - CHUNK_DISPATCH_TIMEOUT)
+
+    def test_queue_position(self, mock_async_task):
+        self.assertEqual(get_queue_position(self.big_jobs[0]), 1)
+        self.assertEqual(get_queue_position(self.small_job), 2)
+        self.assertEqual(get_queue_position(self.big_jobs[1]), 6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_enrollment_chunks()
+
+        self.assertIsNone(get_queue_position(self.small_job))
+        self.assertEqual(get_queue_position(self.big_jobs[0]), 1)
+
+
+class EnrollmentJobStatusViewTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.job = EnrollmentJob.objects.create(user=self.user, course_id=123, total_rows=2)
+        EnrollmentJobChunk.objects.create(job=self.job, index=0, rows=[], processed_at=timezone.now())
+        EnrollmentJobChunk.objects.create(job=self.job, index=1, rows=[])
+        self.client.force_login(self.user)
+
+    def test_status(self):
+        response = self.client.get(reverse('enrollmentJobStatus', kwargs={'course_id': 123, 'job_id': self.job.id}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'job_id': self.job.id, 'status': 'pending', 'total_rows': 2,
+            'chunks_total': 2, 'chunks_processed': 1, 'queue_position': 1,
+        })
+
+    def test_other_users_job(self):
+        self.client.force_login(User.objects.create_user(username='someone'))
+
+        response = self.client.get(reverse('enrollmentJobStatus', kwargs={'course_id': 123, 'job_id': self.job.id}))
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,230 @@
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APITestCase
+from canvasapi.exceptions import CanvasException
+from canvas_oauth.models import CanvasOAuth2Token
+
+from backend.ccm.background_tasks import enroll_um_users_task
+from backend.ccm.canvas_api.enrollment_csv import iter_enrollment_csv_chunks, store_enrollment_csv
+from backend.ccm.models import EnrollmentJob, EnrollmentJobChunk
+from backend.ccm.task_queues import BULK_QUEUE
+
+
+def gathered(*batches):
+    """ side_effect for gather_enrollments, passing each call's users and the results of the next batch to on_result. """
+    batches = iter(batches)
+
+    def gather(enrollment_users, canvas_api, on_result):
+        for user, result in zip(enrollment_users, next(batches)):
+            on_result(user, result)
+    return gather
+
+
+def csv_upload(content: str, name: str = 'enrollments.csv') -> SimpleUploadedFile:
+    return SimpleUploadedFile(name, content.encode('utf-8'), content_type='text/csv')
+
+
+class EnrollmentCsvChunksTests(SimpleTestCase):
+
+    def test_chunks_rows_by_header_name(self):
+        upload = csv_upload('﻿section_id,LOGIN_ID,Role\n1,user1,student\n\n2,user2,ta\n3,user3,teacher\n')
+
+        chunks = list(iter_enrollment_csv_chunks(upload, chunk_size=2))
+
+        self.assertEqual(chunks, [
+            ([2, 4], [{'loginId': 'user1', 'role': 'student', 'sectionId': '1'}, {'loginId': 'user2', 'role': 'ta', 'sectionId': '2'}]),
+            ([5], [{'loginId': 'user3', 'role': 'teacher', 'sectionId': '3'}]),
+        ])
+
+    def test_missing_column(self):
+        with self.assertRaises(serializers.ValidationError) as ctx:
+            list(iter_enrollment_csv_chunks(csv_upload('LOGIN_ID,ROLE\nuser1,student\n')))
+        self.assertIn('SECTION_ID', str(ctx.exception.detail))
+
+
+class StoreEnrollmentCsvTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.job = EnrollmentJob.objects.create(user=self.user, course_id=123)
+
+    def test_stores_validated_chunks(self):
+        upload = csv_upload('LOGIN_ID,ROLE,SECTION_ID\nuser1,student,1\nuser2,ta,1\nuser1,student,2\n')
+
+        total_rows = store_enrollment_csv(self.job, upload, chunk_size=2)
+
+        self.assertEqual(total_rows, 3)
+        chunks = list(self.job.chunks.order_by('index'))
+        self.assertEqual([len(chunk.rows) for chunk in chunks], [2, 1])
+        self.assertEqual(chunks[1].rows, [{'sectionId': 2, 'loginId': 'user1', 'role': 'student'}])
+
+    def test_reports_invalid_rows_with_line_numbers(self):
+        # the duplicate is in a different chunk than the first occurrence
+        upload = csv_upload('LOGIN_ID,ROLE,SECTION_ID\nuser1,student,1\nuser2,student,1\nUSER1,ta,1\nuser3,ta,1\nuser4,ta,abc\n')
+
+        with self.assertRaises(serializers.ValidationError) as ctx:
+            store_enrollment_csv(self.job, upload, chunk_size=2)
+
+        errors = ctx.exception.detail['file']
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(str(errors[0]['error']), "Login ID 'USER1' is listed more than once.")
+        self.assertEqual(str(errors[0]['line']), '4')
+        self.assertEqual(str(errors[1]['line']), '6')
+        self.assertIn('sectionId', errors[1])
+
+    def test_reports_duplicate_of_a_row_in_a_chunk_with_field_errors(self):
+        upload = csv_upload('LOGIN_ID,ROLE,SECTION_ID\nuser1,student,1\nuser2,student,abc\nuser3,ta,1\nUSER1,ta,1\n')
+
+        with self.assertRaises(serializers.ValidationError) as ctx:
+            store_enrollment_csv(self.job, upload, chunk_size=2)
+
+        errors = ctx.exception.detail['file']
+        self.assertEqual([str(error['line']) for error in errors], ['3', '5'])
+        self.assertIn('sectionId', errors[0])
+        self.assertEqual(str(errors[1]['error']), "Login ID 'USER1' is listed more than once.")
+
+    def test_reports_invalid_roles_with_line_numbers(self):
+        upload = csv_upload('LOGIN_ID,ROLE,SECTION_ID\nuser1,student,1\n\nuser2,janitor,1\nuser3,ta,1\nuser4,dean,2\n')
+
+        with self.assertRaises(serializers.ValidationError) as ctx:
+            store_enrollment_csv(self.job, upload, chunk_size=2)
+
+        errors = ctx.exception.detail['file']
+        self.assertEqual([str(error['line']) for error in errors], ['4', '6'])
+        self.assertTrue(str(errors[0]['error']).startswith("Role 'janitor' is not allowed."))
+        self.assertEqual(str(errors[1]['loginId']), 'user4')
+
+
+class MultiSectionEnrollmentUploadViewTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_login(self.user)
+        self.url = reverse('multipleSectionEnrollmentsUpload', kwargs={'course_id': 123})
+
+    @patch('backend.ccm.background_tasks.enrollment_scheduler.async_task')
+    def test_upload_creates_job_and_task(self, mock_async_task):
+        mock_async_task.return_value = 'mock-task-id'
+        upload = csv_upload('LOGIN_ID,ROLE,SECTION_ID\nuser1,student,1\nguest@example.com,observer,2\n')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        job = EnrollmentJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual(response.data['status'], EnrollmentJob.Status.RUNNING)
+        self.assertEqual(response.data['chunks_total'], 1)
+        self.assertIsNone(response.data['queue_position'])
+        self.assertEqual(job.total_rows, 2)
+        self.assertEqual(job.course_id, 123)
+        self.assertTrue(job.canvas_callback_url)
+        args, kwargs = mock_async_task.call_args
+        self.assertEqual(args[0], 'backend.ccm.background_tasks.enroll_um_users_task.enroll_um_users_chunk')
+        self.assertEqual(kwargs['task']['chunk_id'], job.chunks.get().id)
+        self.assertEqual(kwargs['cluster'], BULK_QUEUE)
+
+    @patch('backend.ccm.background_tasks.enrollment_scheduler.async_task')
+    def test_invalid_upload_stores_nothing(self, mock_async_task):
+        upload = csv_upload('LOGIN_ID,ROLE,SECTION_ID\nuser1,student,1\nuser2,principal,1\n')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("Role 'principal' is not allowed", response.data['errors'][0]['message'])
+        self.assertFalse(EnrollmentJob.objects.exists())
+        self.assertFalse(EnrollmentJobChunk.objects.exists())
+        mock_async_task.assert_not_called()
+
+    def test_missing_file(self):
+        response = self.client.post(self.url, {}, format='multipart')
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('file', response.data['errors'][0]['message'])
+
+
+@patch('backend.ccm.background_tasks.enroll_um_users_task.schedule_enrollment_chunks')
+class EnrollUmUsersChunkTaskTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='happyuser', password='testpass', email='HappyUser@umich.edu')
+        CanvasOAuth2Token.objects.create(
+            user=self.user,
+            access_token='happy_access_token',
+            refresh_token='happy_refresh_token',
+            expires=timezone.now() + timezone.timedelta(days=1)
+        )
+        self.job = EnrollmentJob.objects.create(user=self.user, course_id=99, total_rows=3, canvas_callback_url='http://callback/')
+        self.chunks = [
+            EnrollmentJobChunk.objects.create(job=self.job, index=0, rows=[
+                {'loginId': 'student1', 'role': 'student', 'sectionId': 1},
+                {'loginId': 'student2', 'role': 'student', 'sectionId': 1},
+            ]),
+            EnrollmentJobChunk.objects.create(job=self.job, index=1, rows=[
+                {'loginId': 'student3', 'role': 'ta', 'sectionId': 2},
+            ]),
+        ]
+
+    def record_emailed_failures(self, **kwargs):
+        # The spooled failures are closed once the summary is sent, so they're read while it's sent
+        self.emailed_failures = list(kwargs['failed_enrollments'])
+
+    @patch('backend.ccm.background_tasks.enroll_um_users_task.email_enrollment_summary')
+    @patch('backend.ccm.background_tasks.enroll_um_users_task.gather_enrollments')
+    @patch('backend.ccm.background_tasks.enroll_um_users_task.course_manager')
+    def test_last_chunk_finishes_job(self, mock_course_manager, mock_gather_enrollments, mock_email_summary, mock_schedule):
+        mock_gather_enrollments.side_effect = gathered(
+            [{'id': 1}, CanvasException('API error')],
+            [{'id': 3}],
+        )
+
+        mock_email_summary.side_effect = self.record_emailed_failures
+        enroll_um_users_task.enroll_um_users_chunk({'chunk_id': self.chunks[0].id})
+        mock_email_summary.assert_not_called()
+        enroll_um_users_task.enroll_um_users_chunk({'chunk_id': self.chunks[1].id})
+
+        self.assertEqual(mock_gather_enrollments.call_count, 2)
+        self.assertEqual([user.loginId for user in mock_gather_enrollments.call_args_list[1].args[0]], ['student3'])
+        self.assertEqual(mock_schedule.call_count, 2)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, EnrollmentJob.Status.FINISHED)
+        self.assertFalse(self.job.chunks.filter(processed_at__isnull=True).exists())
+        mock_email_summary.assert_called_once()
+        kwargs = mock_email_summary.call_args.kwargs
+        self.assertEqual(self.emailed_failures, [{'sectionId': 1, 'loginId': 'student2', 'role': 'student', 'category': 'other', 'error': 'API error'}])
+        self.assertEqual(kwargs['failure_summary'].counts, {'other': 1})
+        self.assertEqual(
+            (kwargs['req_user_email'], kwargs['course_id'], kwargs['total_enrollment_count'], kwargs['report_user'], kwargs['site_url']),
+            ('happyuser@umich.edu', 99, 3, self.job.user, self.job.canvas_callback_url)
+        )
+
+    @patch('backend.ccm.background_tasks.enroll_um_users_task.email_enrollment_summary')
+    @patch('backend.ccm.background_tasks.enroll_um_users_task.gather_enrollments')
+    @patch('backend.ccm.background_tasks.enroll_um_users_task.course_manager')
+    def test_rerun_skips_processed_chunk(self, mock_course_manager, mock_gather_enrollments, mock_email_summary, mock_schedule):
+        self.job.chunks.update(processed_at=timezone.now())
+        mock_email_summary.side_effect = self.record_emailed_failures
+
+        enroll_um_users_task.enroll_um_users_chunk({'chunk_id': self.chunks[1].id})
+        enroll_um_users_task.enroll_um_users_chunk({'chunk_id': self.chunks[1].id})
+
+        mock_gather_enrollments.assert_not_called()
+        mock_email_summary.assert_called_once()
+        self.assertEqual(self.emailed_failures, [])
+
+    @patch('backend.ccm.background_tasks.enroll_um_users_task.email_enrollment_summary')
+    @patch('backend.ccm.background_tasks.enroll_um_users_task.gather_enrollments')
+    @patch('backend.ccm.background_tasks.enroll_um_users_task.course_manager')
+    def test_chunk_error_still_schedules(self, mock_course_manager, mock_gather_enrollments, mock_email_summary, mock_schedule):
+        mock_gather_enrollments.side_effect = RuntimeError('worker crashed')
+
+        with self.assertRaises(RuntimeError):
+            enroll_um_users_task.enroll_um_users_chunk({'chunk_id': self.chunks[0].id})
+
+        mock_schedule.assert_called_once()
+        self.chunks[0].refresh_from_db()
+        self.assertIsNone(self.chunks[0].processed_at)
@@ -1,6 +1,6 @@
 from django.test import SimpleTestCase
 from backend.ccm.canvas_api.exceptions import CanvasErrorHandler, HTTPAPIError
-from canvasapi.exceptions import (BadRequest, Unauthorized, InvalidAccessToken, Forbidden)
+from canvasapi.exceptions import (BadRequest, Unauthorized, InvalidAccessToken, Forbidden, RateLimitExceeded, ResourceDoesNotExist)
 from backend.ccm.canvas_api.exceptions import CanvasAccessTokenException
 
 class TestCanvasHTTPError(SimpleTestCase):
@@ -126,4 +126,14 @@ class TestCanvasHTTPError(SimpleTestCase):
         with self.assertRaises(CanvasAccessTokenException):
             error.handle_canvas_api_exceptions(error_data)
 
-
+    def test_classify_error(self):
+        self.assertEqual(CanvasErrorHandler.classify_error(ResourceDoesNotExist("Not found")), 'not_found')
+        self.assertEqual(CanvasErrorHandler.classify_error(BadRequest("Invalid role")), 'invalid_request')
+        self.assertEqual(CanvasErrorHandler.classify_error(Forbidden("Forbidden error")), 'not_authorized')
+        self.assertEqual(CanvasErrorHandler.classify_error(RateLimitExceeded("Rate limit exceeded")), 'rate_limited')
+        self.assertEqual(
+            CanvasErrorHandler.classify_error(HTTPAPIError(failed_input="input_1", original_exception=ResourceDoesNotExist("Not found"))),
+            'not_found'
+        )
+        self.assertEqual(CanvasErrorHandler.classify_error(TimeoutError("Read timed out")), 'canvas_unavailable')
+        self.assertEqual(CanvasErrorHandler.classify_error(Exception("Something else")), 'other')
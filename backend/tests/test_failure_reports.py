@@ -0,0 +1,95 @@
+import csv
+import io
+from datetime import timedelta
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from backend.ccm.background_tasks import enroll_um_users_task
+from backend.ccm.failure_reports import (
+    STREAM_CHUNK_SIZE, failure_report_token, get_failure_report_storage, iter_failure_report, store_failure_report
+)
+from backend.ccm.models import FailureReport
+
+IN_MEMORY_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'failure_reports': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+}
+
+
+def failures(count: int) -> list[dict]:
+    return [
+        {'sectionId': 1, 'loginId': f'user{index}', 'role': 'student', 'error': 'The specified resource does not exist.'}
+        for index in range(count)
+    ]
+
+
+@override_settings(STORAGES=IN_MEMORY_STORAGES, FAILURE_REPORT_ATTACHMENT_MAX_ROWS=10)
+class FailureReportTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='instructor', email='instructor@example.com')
+
+    def test_stored_gzipped_and_streamed_back(self):
+        report = store_failure_report(self.user, 123, iter(failures(1000)))
+
+        content = b''.join(iter_failure_report(report, chunk_size=1024)).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(report.rows, 1000)
+        self.assertEqual(len(rows), 1000)
+        self.assertEqual(rows[0], {
+            'sectionId': '1', 'LoginId': 'user0', 'role': 'student', 'ErrorCategory': 'User or section not found in Canvas',
+            'ReasonForFailure': 'The specified resource does not exist.'
+        })
+        self.assertLess(report.compressed_size, len(content) / 5)
+        self.assertTrue(get_failure_report_storage().exists(report.storage_name))
+
+    @patch('backend.ccm.background_tasks.enroll_um_users_task.enqueue_email')
+    def test_large_report_linked_from_email(self, mock_enqueue_email):
+        enroll_um_users_task.email_enrollment_summary(
+            'instructor@example.com', 123, failures(11), 20, report_user=self.user, site_url='https://ccm.example.com/oauth/oauth-callback'
+        )
+
+        kwargs = mock_enqueue_email.call_args.kwargs
+        report = FailureReport.objects.get()
+        link = 'https://ccm.example.com' + reverse('enrollmentFailureReport', kwargs={'course_id': 123, 'token': failure_report_token(report)})
+        self.assertIsNone(kwargs['attachment'])
+        self.assertIn(f"<a href='{link}'>", kwargs['body'])
+
+    @patch('backend.ccm.background_tasks.enroll_um_users_task.enqueue_email')
+    def test_small_report_attached(self, mock_enqueue_email):
+        enroll_um_users_task.email_enrollment_summary(
+            'instructor@example.com', 123, failures(10), 20, report_user=self.user, site_url='https://ccm.example.com/'
+        )
+
+        self.assertEqual(mock_enqueue_email.call_args.kwargs['attachment'][0], 'course_123_failures.csv')
+        self.assertFalse(FailureReport.objects.exists())
+
+    async def test_download(self):
+        report = await sync_to_async(store_failure_report)(self.user, 123, failures(3))
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse('enrollmentFailureReport', kwargs={'course_id': 123, 'token': failure_report_token(report)}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="course_123_failures.csv"')
+        content = b''.join([chunk async for chunk in response])
+        self.assertEqual(content.decode().splitlines()[1], '1,user0,student,User or section not found in Canvas,The specified resource does not exist.')
+
+    async def test_download_streamed_in_chunks(self):
+        report = await sync_to_async(store_failure_report)(self.user, 123, failures(2000))
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse('enrollmentFailureReport', kwargs={'course_id': 123, 'token': failure_report_token(report)}))
+
+        # An async iterator is sent chunk by chunk by the ASGI handler, a sync one would be read whole first
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response]
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= STREAM_CHUNK_SIZE for chunk in chunks))
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(b''.join(chunks).decode())))), 2000)
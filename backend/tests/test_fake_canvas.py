@@ -0,0 +1,115 @@
+import warnings
+from django.test import override_settings, SimpleTestCase, TestCase
+from django.contrib.auth.models import User
+from canvasapi import Canvas
+from canvasapi.course import Course
+from canvasapi.exceptions import CanvasException, Forbidden, ResourceDoesNotExist
+
+from backend.ccm.load_testing.fake_canvas import FakeCanvasConfig, FakeCanvasServer
+from backend.ccm.load_testing.runner import LoadTestRunner, percentile
+
+
+class FakeCanvasServerTests(SimpleTestCase):
+
+    def canvas(self, server):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return Canvas(server.base_url, 'fake-token')
+
+    def test_paginates_sections_with_link_header(self):
+        with FakeCanvasServer(FakeCanvasConfig(sections_per_course=25)) as server:
+            canvas = self.canvas(server)
+            course = Course(canvas._Canvas__requester, {'id': 1001})
+            sections = list(course.get_sections(include=['total_students'], per_page=10))
+
+            self.assertEqual(len(sections), 25)
+            self.assertEqual(server.stats()['list_course_sections'], 3)
+            self.assertEqual(sections[0].course_id, 1001)
+
+    def test_crosslist_moves_section_and_records_original_course(self):
+        with FakeCanvasServer() as server:
+            canvas = self.canvas(server)
+            course = Course(canvas._Canvas__requester, {'id': 1001})
+            section = list(course.get_sections())[0]
+
+            merged = section.cross_list_section(1002)
+
+            self.assertEqual(merged.course_id, 1002)
+            self.assertEqual(merged.nonxlist_course_id, 1001)
+
+    def test_missing_login_returns_not_found(self):
+        with FakeCanvasServer() as server:
+            canvas = self.canvas(server)
+            self.assertEqual(canvas.get_user('guest+example.com', 'sis_login_id').login_id, 'guest+example.com')
+            with self.assertRaises(ResourceDoesNotExist):
+                canvas.get_user('missing-user', 'sis_login_id')
+
+    def test_injected_errors(self):
+        with FakeCanvasServer(FakeCanvasConfig(error_rate=1.0, error_routes=frozenset({'get_course'}))) as server:
+            canvas = self.canvas(server)
+            with self.assertRaises(CanvasException):
+                canvas.get_course(1001)
+            # Other routes are not affected
+            self.assertEqual(len(list(canvas.get_accounts())), 3)
+
+    def test_rate_limit_exhaustion(self):
+        config = FakeCanvasConfig(rate_limit_capacity=1, rate_limit_refill_per_second=0)
+        with FakeCanvasServer(config) as server:
+            canvas = self.canvas(server)
+            canvas.get_course(1001)
+            with self.assertRaises(Forbidden):
+                canvas.get_course(1001)
+
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 95), 95.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([], 99), 0.0)
+
+
+class LoadTestRunnerTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='loadtester', password='testpass', email='loadtester@umich.edu')
+
+    def test_course_scenario_reports_canvas_calls_per_operation(self):
+        with FakeCanvasServer() as server:
+            runner = LoadTestRunner(server, user=self.user)
+            result = runner.run('course', iterations=3).to_dict()
+
+        self.assertEqual(result['errors'], 0)
+        self.assertEqual(result['iterations'], 3)
+        self.assertEqual(result['canvas_calls_per_op'], 1.0)
+        self.assertEqual(result['canvas_calls']['get_course'], 3)
+        self.assertGreater(result['p99_ms'], 0)
+
+    def test_enroll_task_scenario(self):
+        with FakeCanvasServer() as server:
+            runner = LoadTestRunner(server, user=self.user, enrollment_rows=5)
+            result = runner.run('enroll_task', iterations=1, warmup=0).to_dict()
+
+        self.assertEqual(result['errors'], 0)
+        self.assertEqual(result['canvas_calls']['create_section_enrollment'], 5)
+
+    def test_admin_sections_stream_scenario(self):
+        with FakeCanvasServer(FakeCanvasConfig(courses_per_account=3)) as server:
+            runner = LoadTestRunner(server, user=self.user)
+            result = runner.run('admin_sections_stream', iterations=2).to_dict()
+            course_count = len(server.data.courses)
+
+        self.assertEqual(result['errors'], 0)
+        # root account search, one sections call per course
+        self.assertEqual(result['canvas_calls']['list_course_sections'], 2 * course_count)
+
+    def test_counts_database_queries_per_operation(self):
+        with FakeCanvasServer() as server:
+            with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db'):
+                db_sessions = LoadTestRunner(server, user=self.user).run('course', iterations=3).to_dict()
+            with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cache'):
+                cache_sessions = LoadTestRunner(server, user=self.user).run('course', iterations=3).to_dict()
+
+        self.assertGreater(db_sessions['db_queries_per_op'], 0)
+        # no session SELECT per request
+        self.assertEqual(db_sessions['db_queries_per_op'] - cache_sessions['db_queries_per_op'], 1)
+
@@ -0,0 +1,57 @@
+from django.contrib.flatpages.models import FlatPage
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase
+
+from backend.ccm import flatpages_cache
+
+FOOTER_TEMPLATE = Template(
+    "{% load flatpage_tags %}{% render_cached_flatpage '/footer/' current_year as footer_html %}{{ footer_html }}"
+)
+
+
+class RenderCachedFlatpageTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        flatpages_cache._rendered_fragments.clear()
+        self.footer = FlatPage.objects.get(url='/footer/')
+        self.footer.content = '<p>&copy; {{ current_year }} Regents, updated {{current_year}}</p>'
+        self.footer.save()
+
+    def test_replaces_current_year(self):
+        rendered = FOOTER_TEMPLATE.render(Context({'current_year': 2031}))
+        self.assertEqual(rendered, '<p>&copy; 2031 Regents, updated 2031</p>')
+
+    def test_warm_render_makes_no_queries(self):
+        FOOTER_TEMPLATE.render(Context({'current_year': 2031}))
+
+        with self.assertNumQueries(0):
+            rendered = FOOTER_TEMPLATE.render(Context({'current_year': 2031}))
+        self.assertEqual(rendered, '<p>&copy; 2031 Regents, updated 2031</p>')
+
+    def test_fragment_built_once_per_year(self):
+        page = flatpages_cache.get_cached_flatpage('/footer/')
+
+        first = flatpages_cache.render_flatpage_fragment(page, 2031)
+        self.assertIs(flatpages_cache.render_flatpage_fragment(page, 2031), first)
+        self.assertEqual(flatpages_cache.render_flatpage_fragment(page, 2032), '<p>&copy; 2032 Regents, updated 2032</p>')
+
+    def test_save_invalidates_rendered_fragment(self):
+        FOOTER_TEMPLATE.render(Context({'current_year': 2031}))
+        self.footer.content = '<p>New footer {{ current_year }}</p>'
+        self.footer.save()
+
+        self.assertEqual(FOOTER_TEMPLATE.render(Context({'current_year': 2031})), '<p>New footer 2031</p>')
+
+    def test_missing_page_renders_nothing(self):
+        template = Template("{% load flatpage_tags %}{% render_cached_flatpage '/missing/' as html %}[{{ html }}]")
+        self.assertEqual(template.render(Context()), '[]')
+
+    def test_banner_content_is_not_escaped(self):
+        banner = FlatPage.objects.get(url='/banner/')
+        banner.content = '<strong>Maintenance {{ current_year }}</strong>'
+        banner.save()
+        template = Template("{% load flatpage_tags %}{% render_cached_flatpage '/banner/' as html %}{{ html }}")
+
+        self.assertEqual(template.render(Context()), '<strong>Maintenance {{ current_year }}</strong>')
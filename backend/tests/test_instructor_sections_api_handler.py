@@ -1,3 +1,5 @@
+import json
+import threading
 
 from unittest.mock import patch, MagicMock
 from django.test import RequestFactory
@@ -157,4 +159,69 @@ class CanvasInstructorSectionsAPIHandlerTests(APITestCase):
         }
         print(response.data)
         self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
-        self.assertEqual(response.data, expected_dict)
\ No newline at end of file
+        self.assertEqual(response.data, expected_dict)
+
+    @patch.object(CanvasCredentialManager, 'get_canvasapi_instance')
+    async def test_get_instructor_sections_ndjson_stream(self, mock_get_canvasapi_instance):
+        mock_canvas = mock_get_canvasapi_instance.return_value
+        section_1 = {'id': 111, 'name': 'Section 1', 'course_id': 1, 'nonxlist_course_id': None, 'total_students': 10}
+        mock_canvas.get_courses.return_value = [
+            make_mock_course({'id': 1, 'name': 'Course 1', 'enrollment_term_id': self.term_id}, sections=[section_1]),
+            make_mock_course({'id': 2, 'name': 'Course 2', 'enrollment_term_id': self.term_id}, sections=[]),
+        ]
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(f'{self.url}?term_id={self.term_id}&stream=ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) async for line in response]
+        resp_by_course_id = {c['id']: c for c in lines}
+        self.assertEqual(set(resp_by_course_id), {1, 2})
+        self.assertEqual(resp_by_course_id[1]['sections'][0]['id'], section_1['id'])
+        self.assertEqual(resp_by_course_id[2]['sections'], [])
+
+    @patch.object(CanvasCredentialManager, 'get_canvasapi_instance')
+    async def test_get_instructor_sections_ndjson_stream_error_line(self, mock_get_canvasapi_instance):
+        mock_canvas = mock_get_canvasapi_instance.return_value
+        mock_canvas.get_courses.return_value = [
+            make_mock_course({'id': 1, 'name': 'Course 1', 'enrollment_term_id': self.term_id}, sections=[]),
+            make_mock_course({'id': 2, 'name': 'Course 2', 'enrollment_term_id': self.term_id}, raise_exception=CanvasException('Canvas API error')),
+        ]
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(f'{self.url}?term_id={self.term_id}&stream=ndjson')
+
+        lines = [json.loads(line) async for line in response]
+        self.assertEqual(lines[0]['id'], 1)
+        self.assertEqual(lines[-1], {'error': {
+            "statusCode": 500,
+            "errors": [{"canvasStatusCode": 500, "message": "Canvas API error", "failedInput": "course id 2"}]
+        }})
+
+    @patch.object(CanvasCredentialManager, 'get_canvasapi_instance')
+    async def test_get_instructor_sections_ndjson_stream_sends_lines_before_all_fetched(self, mock_get_canvasapi_instance):
+        slow_course_fetched = threading.Event()
+        release_slow_course = threading.Event()
+
+        def slow_sections(*args, **kwargs):
+            release_slow_course.wait(2)
+            slow_course_fetched.set()
+            return []
+        slow_course = make_mock_course({'id': 2, 'name': 'Course 2', 'enrollment_term_id': self.term_id})
+        slow_course.get_sections.side_effect = slow_sections
+        mock_get_canvasapi_instance.return_value.get_courses.return_value = [
+            make_mock_course({'id': 1, 'name': 'Course 1', 'enrollment_term_id': self.term_id}, sections=[]),
+            slow_course,
+        ]
+        await self.async_client.aforce_login(self.user)
+
+        # Iterated the way the ASGI handler sends the response body
+        response = await self.async_client.get(f'{self.url}?term_id={self.term_id}&stream=ndjson')
+        lines = aiter(response)
+        first_line = await anext(lines)
+
+        self.assertFalse(slow_course_fetched.is_set())
+        self.assertEqual(json.loads(first_line)['id'], 1)
+        release_slow_course.set()
+        self.assertEqual([json.loads(line)['id'] async for line in lines], [2])
@@ -1,9 +1,15 @@
-from django.test import SimpleTestCase, RequestFactory
+from django.core.cache import cache
+from django.test import SimpleTestCase, RequestFactory, TestCase
 from django.contrib.auth.models import User
 from django.contrib.auth import get_user_model
 from unittest.mock import patch, MagicMock
+from lti_tool.views import LtiLaunchBaseView
+from backend.ccm import lti_config, lti_keyset
 from backend.ccm.lti_config import CCMLTILaunchView, LTILaunchError, LTINotAllowedRolesError
+import ast
+import inspect
 import json
+import textwrap
 
 class LTILaunchTests(SimpleTestCase):
 
@@ -18,22 +24,20 @@ class LTILaunchTests(SimpleTestCase):
         with self.assertRaises(LTILaunchError):
             view.validate_custom_lti_launch_data(self.lti_launch_data)
 
-    @patch('backend.ccm.lti_config.User')
-    @patch('random.sample', return_value=list('1234455'))
-    def test_login_user_from_lti_user_does_not_exist(self, mock_random_sample, mock_user):
+    @patch('backend.ccm.lti_config.cache')
+    @patch('backend.ccm.lti_config.CCMLTILaunchView.upsert_lti_user')
+    def test_login_user_from_lti_user_does_not_exist(self, mock_upsert, mock_cache):
         view = CCMLTILaunchView()
 
-        # Mock the User object and its methods
-        mock_user.DoesNotExist = User.DoesNotExist
-        mock_user.objects.get.side_effect = User.DoesNotExist
-        mock_user.objects.create_user.return_value = MagicMock(username='jdoea', email='jdoea@umich.edu', password='1234455',
-                                                               first_name='Johns', last_name='Does')
+        mock_cache.get.return_value = None
+        created_user = MagicMock(pk=7, username='jdoea', email='jdoea@umich.edu', first_name='Johns', last_name='Does')
+        mock_upsert.return_value = created_user
 
         user_obj = view.login_user_from_lti(self.lti_launch_data)
 
-        # Assert that the created user has the same email and password
-        created_user = mock_user.objects.create_user.return_value
         self.assertEqual(created_user, user_obj)
+        mock_cache.set.assert_called_once()
+        self.assertEqual(mock_cache.set.call_args.args[1], 7)
 
     @patch('backend.ccm.lti_config.ccm_user_login')
     def test_login_user_store_session(self, mock_ccm_user_login):
@@ -151,3 +155,71 @@ class LTILaunchTests(SimpleTestCase):
         
 
             
+
+
+class LTILaunchViewPostTests(SimpleTestCase):
+
+    @staticmethod
+    def statements(method) -> list:
+        function = ast.parse(textwrap.dedent(inspect.getsource(method))).body[0]
+        body = function.body
+        if isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant):
+            body = body[1:]
+        return [ast.dump(statement) for statement in body]
+
+    def test_post_matches_upstream_post(self):
+        # Fails when an upgrade of django-lti changes LtiLaunchBaseView.post, which CCMLTILaunchView.post copies
+        self.assertEqual(self.statements(CCMLTILaunchView.post), self.statements(LtiLaunchBaseView.post))
+
+    def test_post_validates_launch_with_cached_keyset(self):
+        self.assertIs(lti_config.get_launch_from_request, lti_keyset.get_launch_from_request)
+
+
+class LTILaunchUserTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        with open('backend/tests/test_fixtures/lti_launch.json') as f:
+            self.lti_launch_data = json.load(f)
+        self.login_id = self.lti_launch_data[CCMLTILaunchView.LTI_CUSTOM_PARAMS_URL]['login_id']
+
+    def test_new_user_gets_unusable_password(self):
+        user_obj = CCMLTILaunchView().login_user_from_lti(self.lti_launch_data)
+
+        user_obj.refresh_from_db()
+        self.assertEqual(user_obj.username, self.login_id)
+        self.assertEqual(user_obj.email, self.lti_launch_data['email'])
+        self.assertFalse(user_obj.has_usable_password())
+
+    def test_existing_user_is_updated_from_launch(self):
+        existing = User.objects.create_user(username=self.login_id, email='old@umich.edu', password='testpass')
+
+        user_obj = CCMLTILaunchView().login_user_from_lti(self.lti_launch_data)
+
+        existing.refresh_from_db()
+        self.assertEqual(user_obj.pk, existing.pk)
+        self.assertEqual(existing.email, self.lti_launch_data['email'])
+        self.assertTrue(existing.check_password('testpass'))
+
+    def test_relaunch_reads_cached_user_by_pk(self):
+        existing = User.objects.create_user(username=self.login_id, password='testpass')
+        CCMLTILaunchView().login_user_from_lti(self.lti_launch_data)
+
+        with self.assertNumQueries(1):
+            user_obj = CCMLTILaunchView().login_user_from_lti(self.lti_launch_data)
+        self.assertEqual(user_obj.pk, existing.pk)
+
+    def test_user_change_applies_at_relaunch(self):
+        user_obj = CCMLTILaunchView().login_user_from_lti(self.lti_launch_data)
+        User.objects.filter(pk=user_obj.pk).update(is_staff=True, is_active=False)
+
+        relaunched = CCMLTILaunchView().login_user_from_lti(self.lti_launch_data)
+        self.assertTrue(relaunched.is_staff)
+        self.assertFalse(relaunched.is_active)
+
+    def test_deleted_user_is_created_again_at_relaunch(self):
+        user_obj = CCMLTILaunchView().login_user_from_lti(self.lti_launch_data)
+        User.objects.filter(pk=user_obj.pk).delete()
+
+        relaunched = CCMLTILaunchView().login_user_from_lti(self.lti_launch_data)
+        self.assertTrue(User.objects.filter(pk=relaunched.pk).exists())
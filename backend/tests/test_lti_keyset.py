@@ -0,0 +1,101 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase
+from pylti1p3.exception import LtiException
+
+from backend.ccm import lti_keyset
+from backend.ccm.load_testing.fake_canvas import FakeCanvasServer
+from backend.ccm.lti_keyset import CCMMessageLaunch, get_platform_public_key, keyset_max_age
+
+
+class KeysetMaxAgeTests(SimpleTestCase):
+
+    def test_cache_control(self):
+        self.assertEqual(keyset_max_age('public, max-age=600'), 600)
+        self.assertEqual(keyset_max_age('max-age="30"'), 30)
+        self.assertEqual(keyset_max_age('no-store'), 0)
+        self.assertEqual(keyset_max_age('max-age=600, no-cache'), 0)
+        self.assertEqual(keyset_max_age(''), lti_keyset.JWKS_DEFAULT_MAX_AGE)
+        self.assertEqual(keyset_max_age('max-age=999999999'), lti_keyset.JWKS_MAX_AGE_LIMIT)
+
+
+class PlatformPublicKeyTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakeCanvasServer().start()
+        cls.kid = cls.server.rotate_lti_key()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        lti_keyset._keysets.clear()
+        self.server.reset_stats()
+
+    def keyset_fetches(self) -> int:
+        return self.server.stats().get('get_lti_jwks', 0)
+
+    def test_keyset_fetched_once(self):
+        key = get_platform_public_key(self.server.lti_keyset_url, self.kid, 'RS256')
+
+        self.assertIs(get_platform_public_key(self.server.lti_keyset_url, self.kid, 'RS256'), key)
+        self.assertEqual(self.keyset_fetches(), 1)
+
+    def test_shared_cache_used_by_other_processes(self):
+        get_platform_public_key(self.server.lti_keyset_url, self.kid, 'RS256')
+        # A process that hasn't seen the keyset yet
+        lti_keyset._keysets.clear()
+
+        get_platform_public_key(self.server.lti_keyset_url, self.kid, 'RS256')
+
+        self.assertEqual(self.keyset_fetches(), 1)
+
+    def test_missing_kid_refreshes_keyset(self):
+        get_platform_public_key(self.server.lti_keyset_url, self.kid, 'RS256')
+        new_kid = self.server.rotate_lti_key()
+
+        with patch.object(lti_keyset, 'JWKS_MIN_REFRESH_INTERVAL', 0):
+            get_platform_public_key(self.server.lti_keyset_url, new_kid, 'RS256')
+
+        self.assertEqual(self.keyset_fetches(), 2)
+
+    def test_unknown_kid_refresh_is_rate_limited(self):
+        get_platform_public_key(self.server.lti_keyset_url, self.kid, 'RS256')
+
+        for _ in range(3):
+            with self.assertRaisesMessage(LtiException, 'Unable to find public key'):
+                get_platform_public_key(self.server.lti_keyset_url, 'unknown-kid', 'RS256')
+
+        self.assertEqual(self.keyset_fetches(), 1)
+
+    def test_message_launch_verifies_signature_with_cached_key(self):
+        id_token = self.server.sign_lti_id_token({'iss': 'https://canvas.instructure.com', 'nonce': 'abc'})
+        registration = MagicMock()
+        registration.get_key_set.return_value = None
+        registration.get_key_set_url.return_value = self.server.lti_keyset_url
+
+        for _ in range(2):
+            request = RequestFactory().post('/launch/', {'id_token': id_token})
+            request.session = {}
+            launch = CCMMessageLaunch(request, MagicMock())
+            launch._registration = registration
+            launch.validate_jwt_format().validate_jwt_signature()
+
+        self.assertEqual(self.keyset_fetches(), 1)
+
+    def test_message_launch_rejects_bad_signature(self):
+        id_token = self.server.sign_lti_id_token({'iss': 'https://canvas.instructure.com'})
+        header, body, signature = id_token.split('.')
+        request = RequestFactory().post('/launch/', {'id_token': f"{header}.{body}.{signature[::-1]}"})
+        request.session = {}
+        launch = CCMMessageLaunch(request, MagicMock())
+        launch._registration = MagicMock(**{'get_key_set.return_value': None, 'get_key_set_url.return_value': self.server.lti_keyset_url})
+
+        with self.assertRaises(LtiException):
+            launch.validate_jwt_format().validate_jwt_signature()
@@ -0,0 +1,44 @@
+from io import StringIO
+
+from django.contrib.sessions.backends.cache import SessionStore as CacheSessionStore
+from django.contrib.sessions.backends.db import SessionStore as DbSessionStore
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+CACHE_ENGINE = 'django.contrib.sessions.backends.cache'
+
+
+class MigrateSessionsCommandTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.session = DbSessionStore()
+        self.session['course'] = {'id': 40001, 'roles': ['TeacherEnrollment']}
+        self.session.create()
+        expired = DbSessionStore()
+        expired['course'] = {'id': 1}
+        expired.set_expiry(-1)
+        expired.create()
+
+    @override_settings(SESSION_ENGINE=CACHE_ENGINE)
+    def test_copies_active_sessions_to_cache(self):
+        out = StringIO()
+        call_command('migrate_sessions', stdout=out)
+
+        self.assertIn('Copied 1 sessions', out.getvalue())
+        migrated = CacheSessionStore(session_key=self.session.session_key)
+        self.assertEqual(migrated['course'], {'id': 40001, 'roles': ['TeacherEnrollment']})
+
+    @override_settings(SESSION_ENGINE=CACHE_ENGINE)
+    def test_dry_run_copies_nothing(self):
+        out = StringIO()
+        call_command('migrate_sessions', '--dry-run', stdout=out)
+
+        self.assertIn('Would copy 1 sessions', out.getvalue())
+        self.assertFalse(CacheSessionStore().exists(self.session.session_key))
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_database_engine_has_nothing_to_migrate(self):
+        with self.assertRaises(CommandError):
+            call_command('migrate_sessions')
@@ -0,0 +1,81 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from backend.ccm.canvas_api.renderers import ORJSONParser, ORJSONRenderer
+
+
+def sample_payload():
+    return {
+        'statusCode': 500,
+        'errors': [{'canvasStatusCode': 404, 'message': ErrorDetail('Not found', code='not_found'), 'failedInput': 'course id 1'}],
+        'courses': ReturnList([
+            ReturnDict({'id': 1, 'name': 'Ünïcödé  course', 'enrollment_term_id': 2, 'sections': [
+                {'id': 11, 'name': 'Section 1', 'course_id': 1, 'nonxlist_course_id': None, 'total_students': 0},
+            ]}, serializer=None),
+        ], serializer=None),
+        'created': datetime.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+        'naive': datetime.datetime(2025, 1, 2, 3, 4, 5),
+        'date': datetime.date(2025, 1, 2),
+        'duration': datetime.timedelta(minutes=90),
+        'decimal': Decimal('1.50'),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'float': 0.1,
+        'flag': True,
+        1: 'int key',
+        'tuple': (1, 2),
+    }
+
+
+class ORJSONRendererTests(SimpleTestCase):
+
+    def assertSameOutput(self, data, accepted_media_type=None, renderer_context=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, accepted_media_type, renderer_context),
+            JSONRenderer().render(data, accepted_media_type, renderer_context),
+        )
+
+    def test_same_output_as_drf_renderer(self):
+        self.assertSameOutput(sample_payload())
+        self.assertSameOutput([])
+        self.assertSameOutput(None)
+
+    def test_indented_output(self):
+        self.assertSameOutput(sample_payload(), accepted_media_type='application/json; indent=4')
+        self.assertSameOutput(sample_payload(), renderer_context={'indent': 2})
+
+    def test_falls_back_for_big_integers(self):
+        self.assertSameOutput({'id': 2 ** 70})
+
+    def test_non_finite_floats_written_as_null(self):
+        # DRF's renderer raises for them with STRICT_JSON, orjson writes null
+        data = {'nan': float('nan'), 'inf': float('inf'), '-inf': float('-inf')}
+        self.assertEqual(ORJSONRenderer().render(data), b'{"nan":null,"inf":null,"-inf":null}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+
+
+class ORJSONParserTests(SimpleTestCase):
+
+    def parse_both(self, body: bytes):
+        return ORJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body))
+
+    def test_same_result_as_drf_parser(self):
+        body = b'{"enrollments": [{"sectionId": 1, "loginId": "user1\\u2028", "role": "student"}], "big": 123456789012345678901234567890}'
+        parsed, expected = self.parse_both(body)
+        self.assertEqual(parsed, expected)
+
+    def test_same_parse_error(self):
+        body = b'{"enrollments": [}'
+        with self.assertRaises(ParseError) as orjson_error:
+            ORJSONParser().parse(io.BytesIO(body))
+        with self.assertRaises(ParseError) as drf_error:
+            JSONParser().parse(io.BytesIO(body))
+        self.assertEqual(str(orjson_error.exception), str(drf_error.exception))
@@ -0,0 +1,107 @@
+from collections import deque
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django_q.brokers import Broker
+from django_q.brokers.orm import ORM
+from django_q.models import OrmQ
+from django_q.signing import SignedPackage
+
+from backend.ccm.task_brokers import get_task_broker, move_queued_tasks
+
+
+class MemoryBroker(Broker):
+    """ Broker keeping its queue in a list, standing in for Redis. """
+
+    def __init__(self, list_key: str = 'test'):
+        self.queue: deque = deque()
+        super().__init__(list_key=list_key)
+
+    def enqueue(self, task):
+        self.queue.append(task)
+        return len(self.queue)
+
+    def dequeue(self):
+        if self.queue:
+            return [(None, self.queue.popleft())]
+
+    def acknowledge(self, task_id):
+        pass
+
+    def queue_size(self):
+        return len(self.queue)
+
+    def purge_queue(self):
+        self.queue.clear()
+
+    def ping(self):
+        return True
+
+    def info(self):
+        return 'Memory'
+
+
+class MoveQueuedTasksTests(TestCase):
+
+    def setUp(self):
+        self.orm = ORM(list_key='ccm-test')
+        self.payloads = [SignedPackage.dumps({'id': i}) for i in range(3)]
+        for payload in self.payloads:
+            self.orm.enqueue(payload)
+
+    def test_moves_orm_tasks_unchanged(self):
+        target = MemoryBroker()
+
+        moved = move_queued_tasks(self.orm, target)
+
+        self.assertEqual(moved, 3)
+        self.assertEqual(list(target.queue), self.payloads)
+        self.assertFalse(OrmQ.objects.filter(key='ccm-test').exists())
+
+    def test_moves_into_orm(self):
+        source = MemoryBroker()
+        source.enqueue(SignedPackage.dumps({'id': 'memory'}))
+
+        self.assertEqual(move_queued_tasks(source, self.orm), 1)
+        self.assertEqual(self.orm.queue_size(), 4)
+
+    def test_unknown_broker_type(self):
+        with self.assertRaises(ValueError):
+            get_task_broker('sqs')
+
+
+class MigrateTaskQueueCommandTests(TestCase):
+
+    def setUp(self):
+        self.orm = get_task_broker('orm')
+        self.orm.enqueue(SignedPackage.dumps({'id': 1}))
+
+    def test_same_broker(self):
+        with self.assertRaises(CommandError):
+            call_command('migrate_task_queue', '--from', 'orm', '--to', 'orm')
+
+    def test_dry_run_moves_nothing(self):
+        out = StringIO()
+        call_command('migrate_task_queue', '--from', 'orm', '--to', 'redis', '--dry-run', stdout=out)
+
+        self.assertIn('1 tasks waiting', out.getvalue())
+        self.assertEqual(self.orm.queue_size(), 1)
+
+    def test_moves_tasks(self):
+        target = MemoryBroker()
+        brokers = {'orm': self.orm, 'redis': target}
+        out = StringIO()
+        with patch('backend.ccm.management.commands.migrate_task_queue.get_task_broker',
+                   side_effect=lambda broker_type, **kwargs: brokers[broker_type]):
+            call_command('migrate_task_queue', '--from', 'orm', '--to', 'redis', stdout=out)
+
+        self.assertIn('Moved 1 queued tasks', out.getvalue())
+        self.assertEqual(target.queue_size(), 1)
+        self.assertEqual(self.orm.queue_size(), 0)
+
+    def test_unreachable_target(self):
+        with self.assertRaises(CommandError):
+            call_command('migrate_task_queue', '--from', 'orm', '--to', 'redis', '--redis-url', 'redis://127.0.0.1:1/0')
+        self.assertEqual(self.orm.queue_size(), 1)
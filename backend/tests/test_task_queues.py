@@ -0,0 +1,64 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from django_q.signals import pre_execute
+
+from backend.ccm.canvas_api.canvas_create_user_handler import CanvasCreateUserHandler
+from backend.ccm.task_queues import (
+    BULK_QUEUE, INTERACTIVE_QUEUE, MAX_WAIT_SAMPLES, get_queue_wait_stats, record_task_wait
+)
+
+
+class TaskQueueTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_invitation_emails_go_to_interactive_queue(self):
+        with patch('backend.ccm.background_tasks.email_outbox.async_task', return_value='task-id') as mock_async_task:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertTrue(CanvasCreateUserHandler().is_external_users_invitation_success(['guest@example.com']))
+
+        self.assertEqual(mock_async_task.call_args.kwargs['cluster'], INTERACTIVE_QUEUE)
+
+    def test_wait_stats(self):
+        now = timezone.now()
+        for wait in (1, 2, 3, 4):
+            record_task_wait({'name': 'task', 'started': now - timedelta(seconds=wait)}, INTERACTIVE_QUEUE, now=now)
+
+        stats = get_queue_wait_stats(INTERACTIVE_QUEUE)
+
+        self.assertEqual(stats['samples'], 4)
+        self.assertEqual(stats['wait_p50_s'], 2.0)
+        self.assertEqual(stats['wait_max_s'], 4.0)
+        self.assertEqual(get_queue_wait_stats(BULK_QUEUE)['samples'], 0)
+
+    def test_keeps_recent_samples(self):
+        now = timezone.now()
+        for _ in range(MAX_WAIT_SAMPLES + 5):
+            record_task_wait({'name': 'task', 'started': now}, BULK_QUEUE, now=now)
+
+        self.assertEqual(get_queue_wait_stats(BULK_QUEUE)['samples'], MAX_WAIT_SAMPLES)
+
+    def test_worker_pickup_records_wait(self):
+        task = {'name': 'invite', 'cluster': INTERACTIVE_QUEUE, 'started': timezone.now() - timedelta(seconds=2)}
+
+        pre_execute.send(sender='django_q', func=None, task=task)
+
+        stats = get_queue_wait_stats(INTERACTIVE_QUEUE)
+        self.assertEqual(stats['samples'], 1)
+        self.assertGreaterEqual(stats['wait_max_s'], 2.0)
+
+    def test_stats_command(self):
+        record_task_wait({'name': 'task', 'started': timezone.now()}, BULK_QUEUE)
+        out = StringIO()
+
+        call_command('task_queue_stats', stdout=out)
+
+        self.assertIn(f"{INTERACTIVE_QUEUE:<16} queued=0 samples=0", out.getvalue())
+        self.assertIn(f"{BULK_QUEUE:<16} queued=0 samples=1", out.getvalue())
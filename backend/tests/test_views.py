@@ -1,3 +1,5 @@
+from django.contrib.flatpages.models import FlatPage
+from django.core.cache import cache
 from django.test import TestCase
 from unittest.mock import patch
 from django.contrib.auth.models import User
@@ -65,3 +67,43 @@ class TestViews(TestCase):
         response = self.client.get(reverse('redirect_oauth_view'))
         self.assertEqual(response.url, '/accounts/login/?next=/redirectOAuth')
 
+
+@mock.patch('webpack_loader.loader.WebpackLoader.get_bundle', return_value={})
+class TestHomeViewCaching(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.login(username='testuser', password='12345')
+
+    def test_warm_home_view_only_loads_user(self, mock_get_bundle):
+        self.client.get(reverse('home'))
+
+        # The authenticated user, the session comes from the cache and there are no flatpage, user globals or Canvas token queries
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, 'The Regents of the University of Michigan')
+
+    def test_flatpage_save_invalidates_cache(self, mock_get_bundle):
+        self.client.get(reverse('home'))
+        footer = FlatPage.objects.get(url='/footer/')
+        footer.content = '<p>Updated footer {{ current_year }}</p>'
+        footer.save()
+
+        response = self.client.get(reverse('home'))
+
+        self.assertContains(response, f'Updated footer {timezone.now().year}')
+
+    def test_canvas_token_changes_invalidate_has_canvas_token(self, mock_get_bundle):
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.context['ccm_globals']['user']['hasCanvasToken'])
+
+        CanvasOAuth2Token.objects.create(
+            user=self.user, access_token='access-token', refresh_token='refresh-token',
+            expires=timezone.now() + timezone.timedelta(days=1)
+        )
+        response = self.client.get(reverse('home'))
+        self.assertTrue(response.context['ccm_globals']['user']['hasCanvasToken'])
+
+        CanvasOAuth2Token.objects.filter(user=self.user).delete()
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.context['ccm_globals']['user']['hasCanvasToken'])
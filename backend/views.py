@@ -6,8 +6,8 @@ from django.urls import reverse
 from backend import settings
 
 from canvas_oauth.oauth import get_oauth_token, handle_missing_token
-from canvas_oauth.models import CanvasOAuth2Token
 from canvas_oauth.exceptions import InvalidOAuthReturnError
+from backend.ccm.canvas_api.canvas_token_cache import delete_canvas_oauth_token
 from django.urls import reverse
 
 
@@ -23,6 +23,6 @@ def redirect_oauth_view(request: HttpRequest) -> HttpResponse:
         get_oauth_token(request)
     except InvalidOAuthReturnError:
         logger.error(f"InvalidOAuthReturnError for user: {request.user}. Remove invalid refresh_token and prompt for reauthentication.")
-        CanvasOAuth2Token.objects.filter(user=request.user).delete()
+        delete_canvas_oauth_token(request.user)
         return handle_missing_token(request)
     return redirect(reverse('home'))
\ No newline at end of file
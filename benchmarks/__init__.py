@@ -0,0 +1,17 @@
+import importlib
+
+# Modules that register benchmarks, imported after Django is set up
+BENCHMARK_MODULES = [
+    'benchmarks.bench_serializers',
+    'benchmarks.bench_enrollment',
+    'benchmarks.bench_renderers',
+    'benchmarks.bench_lti',
+    'benchmarks.bench_tasks',
+    'benchmarks.bench_views',
+    'benchmarks.bench_email',
+]
+
+
+def load_benchmarks() -> None:
+    for module in BENCHMARK_MODULES:
+        importlib.import_module(module)
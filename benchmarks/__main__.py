@@ -0,0 +1,76 @@
+"""
+Benchmark runner for CCM hot paths.
+
+    python -m benchmarks run --output benchmarks/baselines/current.json
+    python -m benchmarks compare benchmarks/baselines/main.json benchmarks/baselines/current.json --threshold 0.1
+
+`run` needs the Django settings (and the database for the end-to-end view benchmarks, skip those with --no-db).
+`compare` only reads the JSON files and exits with status 1 when any benchmark regressed past the threshold.
+"""
+import argparse
+import json
+import os
+import sys
+
+from benchmarks.core import DEFAULT_REGRESSION_THRESHOLD, compare_results
+
+
+def run(args: argparse.Namespace) -> int:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+
+    from benchmarks import load_benchmarks
+    from benchmarks.core import run_benchmarks
+
+    load_benchmarks()
+    results = run_benchmarks(pattern=args.filter, rounds=args.rounds, include_db=not args.no_db)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows = compare_results(baseline, current, args.threshold)
+    for row in rows:
+        ratio = f"{row['ratio']:.2f}x" if row['ratio'] is not None else '-'
+        print(f"{row['name']:<60} {ratio:>8} {row['status']}")
+
+    regressions = [row['name'] for row in rows if row['status'] == 'regression']
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='CCM benchmark suite')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmarks')
+    run_parser.add_argument('--filter', default='*', help='fnmatch pattern on benchmark names, e.g. "serializer.*"')
+    run_parser.add_argument('--rounds', type=int, help='Override the number of timed rounds per benchmark')
+    run_parser.add_argument('--output', help='Write the results as JSON to this path')
+    run_parser.add_argument('--no-db', action='store_true', help='Skip benchmarks that need the database')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser('compare', help='Compare two result files and flag regressions')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                                help='Allowed slowdown as a fraction of the baseline median (default 0.10)')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,22 @@
+from backend.ccm.background_tasks.send_email_non_umich_user_task import email_body, external_user_email_subject
+from backend.ccm.canvas_api.email_users import build_bulk_emails, build_email
+from benchmarks.core import benchmark
+
+RECIPIENTS = [f'guest{i}@example.com' for i in range(1000)]
+
+
+@benchmark('email.invitations_1000.per_recipient')
+def per_recipient_invitations():
+    def run():
+        body = email_body()
+        for to_email in RECIPIENTS:
+            build_email(to_email, external_user_email_subject, body).message().as_bytes(linesep='\r\n')
+    return run
+
+
+@benchmark('email.invitations_1000.prebuilt')
+def prebuilt_invitations():
+    def run():
+        for message in build_bulk_emails(RECIPIENTS, external_user_email_subject, email_body()):
+            message.message().as_bytes(linesep='\r\n')
+    return run
@@ -0,0 +1,83 @@
+from django.test import override_settings
+from rest_framework import serializers
+
+from backend.ccm.background_tasks.enroll_um_users_task import EnrollmentUser, email_enrollment_summary, handle_enrollment_results
+from backend.ccm.background_tasks.enrollment_results import EnrollmentResults
+from backend.ccm.canvas_api.canvasapi_serializer import (
+    EnrollmentValidationMixin, MultiSectionEnrollRequestSerializer, SectionUsersSerializer, SingleSectionEnrollRequestSerializer
+)
+from benchmarks.core import benchmark
+from benchmarks.fixtures import enrollment_results, enrollment_users, multi_section_enrollments
+
+LOCMEM_EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class NestedSingleSectionEnrollRequestSerializer(serializers.Serializer, EnrollmentValidationMixin):
+    """ The nested serializer (one SectionUsersSerializer run per row) that EnrollmentRowsField replaced, for comparison. """
+    users = SectionUsersSerializer(many=True)
+
+    def validate(self, data):
+        self.validate_enrollment_rows(data.get('users', []))
+        return data
+
+
+@benchmark('serializer.single_section_enroll.5000_rows')
+def single_section_enroll_validation():
+    payload = {'users': enrollment_users(5000)}
+    return lambda: SingleSectionEnrollRequestSerializer(data=payload).is_valid(raise_exception=True)
+
+
+@benchmark('serializer.single_section_enroll.nested_5000_rows')
+def nested_single_section_enroll_validation():
+    payload = {'users': enrollment_users(5000)}
+    return lambda: NestedSingleSectionEnrollRequestSerializer(data=payload).is_valid(raise_exception=True)
+
+
+@benchmark('serializer.multi_section_enroll.5000_rows')
+def multi_section_enroll_validation():
+    payload = {'enrollments': multi_section_enrollments(5000)}
+    return lambda: MultiSectionEnrollRequestSerializer(data=payload).is_valid(raise_exception=True)
+
+
+@benchmark('enrollment.handle_enrollment_results.5000_rows', requires_db=True)
+def handle_results():
+    params = [EnrollmentUser(**row) for row in multi_section_enrollments(5000)]
+    results = enrollment_results([row.__dict__ for row in params])
+
+    def run():
+        # Results are fed one at a time, as gather_enrollments passes them on completion
+        with EnrollmentResults() as aggregated:
+            for user, result in zip(params, results):
+                aggregated.add(user, result)
+            handle_enrollment_results(params, aggregated, None, 'benchmark', 'benchmark@umich.edu', 1)
+
+    with override_settings(EMAIL_BACKEND=LOCMEM_EMAIL_BACKEND):
+        yield run
+
+
+@benchmark('enrollment.failure_csv_email.5000_rows', requires_db=True)
+def failure_csv_email():
+    failed = [
+        {'sectionId': row['sectionId'], 'loginId': row['loginId'], 'role': row['role'], 'error': 'The specified resource does not exist.'}
+        for row in multi_section_enrollments(5000)
+    ]
+    with override_settings(EMAIL_BACKEND=LOCMEM_EMAIL_BACKEND):
+        yield lambda: email_enrollment_summary('benchmark@umich.edu', 1, failed, len(failed))
+
+
+@benchmark('enrollment.failure_report_link_email.5000_rows', requires_db=True)
+def failure_report_link_email():
+    from django.contrib.auth.models import User
+
+    failed = [
+        {'sectionId': row['sectionId'], 'loginId': row['loginId'], 'role': row['role'], 'error': 'The specified resource does not exist.'}
+        for row in multi_section_enrollments(5000)
+    ]
+    user, _ = User.objects.get_or_create(username='benchmark')
+    storages = {
+        'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        'failure_reports': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+    }
+    with override_settings(EMAIL_BACKEND=LOCMEM_EMAIL_BACKEND, STORAGES=storages):
+        yield lambda: email_enrollment_summary('benchmark@umich.edu', 1, failed, len(failed), report_user=user, site_url='https://ccm.example.com/')
@@ -0,0 +1,99 @@
+import itertools
+import json
+import secrets
+from pathlib import Path
+
+from unittest.mock import MagicMock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory
+from pylti1p3.contrib.django import DjangoMessageLaunch
+
+from backend.ccm import lti_keyset
+from backend.ccm.load_testing.fake_canvas import FakeCanvasServer
+from backend.ccm.lti_config import CCMLTILaunchView, lti_user_cache_key
+from benchmarks.core import benchmark
+
+LAUNCH_DATA_PATH = Path(__file__).resolve().parent.parent / 'backend' / 'tests' / 'test_fixtures' / 'lti_launch.json'
+BENCH_USERNAME_PREFIX = 'bench-lti-'
+# Launches verified per timed call in the launch signature benchmarks
+SIGNATURE_LAUNCHES = 50
+
+
+def launch_data(login_id: str) -> dict:
+    data = json.loads(LAUNCH_DATA_PATH.read_text())
+    data[CCMLTILaunchView.LTI_CUSTOM_PARAMS_URL]['login_id'] = login_id
+    return data
+
+
+def delete_bench_users() -> None:
+    for username in User.objects.filter(username__startswith=BENCH_USERNAME_PREFIX).values_list('username', flat=True):
+        cache.delete(lti_user_cache_key(username))
+    User.objects.filter(username__startswith=BENCH_USERNAME_PREFIX).delete()
+
+
+@benchmark('lti.login_user.cold', requires_db=True)
+def login_new_user():
+    """ First launch of a user: the user upsert. """
+    view = CCMLTILaunchView()
+    launches = (launch_data(f'{BENCH_USERNAME_PREFIX}{i}') for i in itertools.count())
+    yield lambda: view.login_user_from_lti(next(launches))
+    delete_bench_users()
+
+
+@benchmark('lti.login_user.cold_hashed_password', requires_db=True)
+def create_user_with_hashed_password():
+    """ What a first launch used to cost, creating the user with a hashed random password. """
+    counter = itertools.count()
+    yield lambda: User.objects.create_user(username=f'{BENCH_USERNAME_PREFIX}hashed-{next(counter)}', password=secrets.token_urlsafe(24))
+    delete_bench_users()
+
+
+@benchmark('lti.login_user.uncached', requires_db=True)
+def login_existing_user():
+    """ Launch of an existing user whose pk isn't in the cache anymore: the user upsert. """
+    view = CCMLTILaunchView()
+    data = launch_data(f'{BENCH_USERNAME_PREFIX}existing')
+    view.login_user_from_lti(data)
+
+    def launch():
+        cache.delete(lti_user_cache_key(f'{BENCH_USERNAME_PREFIX}existing'))
+        view.login_user_from_lti(data)
+    yield launch
+    delete_bench_users()
+
+
+@benchmark('lti.login_user.warm', requires_db=True)
+def login_cached_user():
+    """ Relaunch of a recently launched user: the user read by its cached pk. """
+    view = CCMLTILaunchView()
+    data = launch_data(f'{BENCH_USERNAME_PREFIX}warm')
+    yield lambda: view.login_user_from_lti(data)
+    delete_bench_users()
+
+
+def launch_signature_benchmark(launch_class: type):
+    """ Verify SIGNATURE_LAUNCHES launch id_tokens signed by the fake Canvas, the keyset served over local HTTP. """
+    def setup():
+        with FakeCanvasServer() as server:
+            cache.clear()
+            lti_keyset._keysets.clear()
+            id_token = server.sign_lti_id_token({'iss': 'https://canvas.instructure.com', 'nonce': 'bench'})
+            registration = MagicMock()
+            registration.get_key_set.return_value = None
+            registration.get_key_set_url.return_value = server.lti_keyset_url
+            request = RequestFactory().post('/launch/', {'id_token': id_token})
+            request.session = {}
+
+            def launches():
+                for _ in range(SIGNATURE_LAUNCHES):
+                    launch = launch_class(request, MagicMock())
+                    launch._registration = registration
+                    launch.validate_jwt_format().validate_jwt_signature()
+            yield launches
+    return setup
+
+
+benchmark('lti.launch_signature.pylti1p3', rounds=3)(launch_signature_benchmark(DjangoMessageLaunch))
+benchmark('lti.launch_signature.cached_keyset', rounds=3)(launch_signature_benchmark(lti_keyset.CCMMessageLaunch))
@@ -0,0 +1,39 @@
+import io
+import json
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from backend.ccm.canvas_api.renderers import ORJSONParser, ORJSONRenderer
+from benchmarks.core import benchmark
+from benchmarks.fixtures import multi_section_enrollments
+
+
+def admin_sections_payload(course_count: int = 400, sections_per_course: int = 8) -> list[dict]:
+    """ The admin sections response at MAX_SEARCH_COURSES. """
+    return [
+        {
+            'id': course_id,
+            'name': f'SUBJ {course_id} 001 FA 2025 Course Title',
+            'enrollment_term_id': 1,
+            'sections': [
+                {'id': course_id * 100 + index, 'name': f'SUBJ {course_id} {index:03d} FA 2025', 'course_id': course_id,
+                 'nonxlist_course_id': None, 'total_students': index * 7}
+                for index in range(sections_per_course)
+            ],
+        }
+        for course_id in range(1000, 1000 + course_count)
+    ]
+
+
+for _name, _renderer in [('drf', JSONRenderer), ('orjson', ORJSONRenderer)]:
+    benchmark(f'renderer.admin_sections_400_courses.{_name}')(
+        lambda renderer=_renderer: (lambda data=admin_sections_payload(), r=renderer(): r.render(data))
+    )
+
+for _name, _parser in [('drf', JSONParser), ('orjson', ORJSONParser)]:
+    benchmark(f'parser.multi_section_enroll_5000_rows.{_name}')(
+        lambda parser=_parser: (
+            lambda body=json.dumps({'enrollments': multi_section_enrollments(5000)}).encode(), p=parser(): p.parse(io.BytesIO(body))
+        )
+    )
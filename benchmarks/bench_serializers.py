@@ -0,0 +1,24 @@
+from backend.ccm.canvas_api.canvasapi_serializer import CanvasObjectROSerializer, CrosslistSectionsSerializer
+from backend.ccm.canvas_api.enroll_users import process_login_id
+from benchmarks.core import benchmark
+from benchmarks.fixtures import canvas_sections, enrollment_users
+
+SECTION_FIELDS = {'id', 'name', 'course_id', 'nonxlist_course_id', 'total_students'}
+
+
+@benchmark('serializer.canvas_object_ro.sections_5000')
+def canvas_object_ro_sections():
+    sections = canvas_sections(5000)
+    return lambda: CanvasObjectROSerializer(sections, allowed_fields=SECTION_FIELDS, many=True).data
+
+
+@benchmark('serializer.crosslist_sections.5000_ids')
+def crosslist_sections_validation():
+    payload = {'sectionIds': list(range(1, 5001))}
+    return lambda: CrosslistSectionsSerializer(data=payload).is_valid()
+
+
+@benchmark('enrollment.process_login_id.5000')
+def process_login_ids():
+    login_ids = [user['loginId'] for user in enrollment_users(5000)]
+    return lambda: [process_login_id(login_id) for login_id in login_ids]
@@ -0,0 +1,21 @@
+from backend.ccm.load_testing.broker_probe import PROBE_LIST_KEY, BrokerPusher
+from backend.ccm.task_brokers import get_task_broker
+from benchmarks.core import BenchmarkSkipped, benchmark
+
+
+def broker_pickup_benchmark(broker_type: str):
+    """ Enqueue one task and wait for a qcluster style pusher to pick it up. """
+    def setup():
+        broker = get_task_broker(broker_type, list_key=PROBE_LIST_KEY)
+        try:
+            broker.ping()
+        except Exception as e:
+            raise BenchmarkSkipped(f"the {broker_type} broker isn't reachable: {e}")
+        broker.purge_queue()
+        with BrokerPusher(broker) as pusher:
+            yield pusher.time_pickup
+    return setup
+
+
+benchmark('tasks.broker_pickup.orm', rounds=20, requires_db=True)(broker_pickup_benchmark('orm'))
+benchmark('tasks.broker_pickup.redis', rounds=20)(broker_pickup_benchmark('redis'))
@@ -0,0 +1,20 @@
+from backend.ccm.load_testing.fake_canvas import FakeCanvasConfig, FakeCanvasServer
+from backend.ccm.load_testing.runner import LoadTestRunner
+from benchmarks.core import benchmark
+
+# No simulated latency, so the numbers measure CCM overhead (routing, auth, serialization, rendering) around Canvas
+VIEW_CANVAS_CONFIG = FakeCanvasConfig(courses_per_account=40, sections_per_course=8, rate_limit_capacity=10**9)
+
+
+def view_benchmark(scenario: str, **runner_kwargs):
+    def setup():
+        with FakeCanvasServer(VIEW_CANVAS_CONFIG) as server:
+            runner = LoadTestRunner(server, **runner_kwargs)
+            yield lambda: runner.run(scenario, iterations=1, warmup=0)
+    return setup
+
+
+for _scenario in ['course', 'course_sections', 'instructor_sections', 'admin_sections', 'admin_sections_stream', 'merge_sections']:
+    benchmark(f'views.{_scenario}', requires_db=True)(view_benchmark(_scenario))
+
+benchmark('views.enroll_task.500_rows', requires_db=True, rounds=3)(view_benchmark('enroll_task', enrollment_rows=500))
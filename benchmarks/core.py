@@ -0,0 +1,112 @@
+import fnmatch
+import inspect
+import platform
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+# Fraction a benchmark median may grow over its baseline before it is reported as a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+
+class BenchmarkSkipped(Exception):
+    """ Raised by a benchmark setup when what it measures isn't available, e.g. a service that isn't running. """
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable
+    rounds: int
+    requires_db: bool
+
+
+REGISTRY: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, rounds: int = 5, requires_db: bool = False) -> Callable:
+    """
+    Register a benchmark. The decorated function does the setup and returns the callable to time, or yields it
+    when it needs teardown after the timed rounds (code after the `yield` runs once timing is done).
+    """
+    def decorator(setup: Callable) -> Callable:
+        if name in REGISTRY:
+            raise ValueError(f"Benchmark '{name}' is already registered")
+        REGISTRY[name] = Benchmark(name=name, setup=setup, rounds=rounds, requires_db=requires_db)
+        return setup
+    return decorator
+
+
+def time_benchmark(bench: Benchmark, rounds: Optional[int] = None) -> dict:
+    """ Run one warmup call and `rounds` timed calls, returning timing statistics in seconds. """
+    prepared = bench.setup()
+    is_generator = inspect.isgenerator(prepared)
+    func = next(prepared) if is_generator else prepared
+    try:
+        func()
+        timings = []
+        for _ in range(rounds or bench.rounds):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if is_generator:
+            # Resume the setup so the code after its `yield` runs
+            next(prepared, None)
+    return {
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'mean': statistics.fmean(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'rounds': len(timings),
+    }
+
+
+def run_benchmarks(pattern: str = '*', rounds: Optional[int] = None, include_db: bool = True, report: Callable = print) -> dict:
+    results = {}
+    for name, bench in sorted(REGISTRY.items()):
+        if not fnmatch.fnmatch(name, pattern) or (bench.requires_db and not include_db):
+            continue
+        try:
+            results[name] = time_benchmark(bench, rounds)
+        except BenchmarkSkipped as e:
+            report(f"{name:<60} skipped: {e}")
+            continue
+        report(f"{name:<60} median={results[name]['median'] * 1000:10.3f}ms min={results[name]['min'] * 1000:10.3f}ms")
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> list[dict]:
+    """
+    Compare benchmark medians. Each row has the ratio current/baseline and a status of
+    'regression', 'improvement', 'ok', 'new' or 'missing'.
+    """
+    baseline_results = baseline.get('results', {})
+    current_results = current.get('results', {})
+    rows = []
+    for name in sorted(set(baseline_results) | set(current_results)):
+        if name not in baseline_results:
+            rows.append({'name': name, 'status': 'new', 'ratio': None})
+            continue
+        if name not in current_results:
+            rows.append({'name': name, 'status': 'missing', 'ratio': None})
+            continue
+        base_median = baseline_results[name]['median']
+        ratio = current_results[name]['median'] / base_median if base_median else float('inf')
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 - threshold:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({'name': name, 'status': status, 'ratio': ratio})
+    return rows
@@ -0,0 +1,45 @@
+from canvasapi.exceptions import ResourceDoesNotExist
+from canvasapi.section import Section
+
+from backend.ccm.canvas_api.constants import MAX_ALLOWED_ENROLLMENTS
+
+ROLES = ['student', 'teacher', 'ta', 'observer', 'designer']
+
+
+def enrollment_users(count: int = MAX_ALLOWED_ENROLLMENTS) -> list[dict]:
+    """ Rows shaped like the single section enrollment payload, mixing uniqnames and guest emails. """
+    return [
+        {'loginId': f'guest{index}@example.com' if index % 4 == 0 else f'uniq{index}', 'role': ROLES[index % len(ROLES)]}
+        for index in range(count)
+    ]
+
+
+def multi_section_enrollments(count: int = MAX_ALLOWED_ENROLLMENTS) -> list[dict]:
+    return [dict(user, sectionId=1000 + index % 20) for index, user in enumerate(enrollment_users(count))]
+
+
+def canvas_sections(count: int) -> list[Section]:
+    return [
+        Section(None, {
+            'id': 100000 + index,
+            'name': f'Section {index}',
+            'course_id': 1000 + index // 10,
+            'nonxlist_course_id': None,
+            'total_students': index % 300,
+            'sis_section_id': f'SIS{index}',
+            'integration_id': None,
+            'start_at': None,
+            'end_at': None,
+            'restrict_enrollments_to_section_dates': None,
+        })
+        for index in range(count)
+    ]
+
+
+def enrollment_results(users: list[dict], failure_every: int = 2) -> list:
+    """ Results as gather_enrollments passes them on, in input order: serialized enrollments for successes, exceptions for failures. """
+    return [
+        ResourceDoesNotExist('The specified resource does not exist.') if index % failure_every == 0
+        else {'id': index, 'course_id': 1, 'course_section_id': user['sectionId'], 'user_id': index, 'type': 'StudentEnrollment'}
+        for index, user in enumerate(users)
+    ]
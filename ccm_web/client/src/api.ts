@@ -3,7 +3,7 @@ import {
   CanvasCourseBase, CanvasCourseSection, CanvasCourseSectionBase, CanvasEnrollment,
   CanvasUserCondensed, CourseWithSections
 } from './models/canvas.js'
-import { ExternalUserSuccess } from './models/externalUser.js'
+import { ExternalUserPending, ExternalUserSuccess } from './models/externalUser.js'
 import handleErrors, { CanvasError } from './utils/handleErrors.js'
 
 const jsonMimeType = 'application/json'
@@ -176,7 +176,9 @@ interface ExternalUser {
   givenName: string
 }
 
-export const createExternalUsers = async (newUsers: ExternalUser[]): Promise<ExternalUserSuccess[]> => {
+export const createExternalUsers = async (
+  newUsers: ExternalUser[]
+): Promise<Array<ExternalUserSuccess | ExternalUserPending>> => {
   const body = JSON.stringify({ users: newUsers })
   const request = getPost(body)
   const resp = await fetch('/api/admin/createExternalUsers', request)
@@ -22,7 +22,7 @@ import {
   CanvasCourseBase, CanvasCourseSection, CanvasCourseSectionWithCourseName, ClientEnrollmentType, injectCourseName
 } from '../models/canvas.js'
 import { AddNewExternalUserEnrollment, RowNumberedAddNewExternalUserEnrollment } from '../models/enrollment.js'
-import { ExternalUserSuccess, isExternalUserSuccess } from '../models/externalUser.js'
+import { ExternalUserResult, isExternalUserSuccess } from '../models/externalUser.js'
 import { createSectionRoles } from '../models/feature.js'
 import { AddNonUMUsersLeafProps, isAuthorizedForRoles } from '../models/FeatureUIData.js'
 import { CSVWorkflowStep, InvalidationType, RoleEnum } from '../models/models.js'
@@ -33,7 +33,9 @@ import {
 } from '../utils/enrollmentValidators.js'
 import FileParserWrapper, { CSVRecord } from '../utils/FileParserWrapper.js'
 import { getRowNumber } from '../utils/fileUtils.js'
-import { CanvasError, ErrorDescription, ExternalUserProcessError } from '../utils/handleErrors.js'
+import {
+  CanvasError, describePendingExternalUsers, ErrorDescription, ExternalUserProcessError
+} from '../utils/handleErrors.js'
 
 const PREFIX = 'MultipleUserEnrollmentWorkflow'
 
@@ -112,21 +114,23 @@ export default function MultipleUserEnrollmentWorkflow (props: MultipleUserEnrol
     clearAddExternalEnrollmentsError
   ] = usePromise(
     async (sectionId: number, enrollments: AddNewExternalUserEnrollment[]): Promise<ErrorDescription[]> => {
-      let successes: ExternalUserSuccess[]
+      let results: ExternalUserResult[]
       const errors: ErrorDescription[] = []
       try {
-        successes = await api.createExternalUsers(
+        results = await api.createExternalUsers(
           enrollments.map(e => ({ email: e.email, givenName: e.firstName, surname: e.lastName })),
         )
       } catch (error: unknown) {
         if (error instanceof ExternalUserProcessError) {
           errors.push(...error.describeErrors())
-          successes = error.data.filter(r => isExternalUserSuccess(r)) as ExternalUserSuccess[]
+          results = error.data
         } else {
           throw error
         }
       }
-      const allUsersToEnroll = successes.map(s => s.email)
+      // Users still being created can't be enrolled yet
+      errors.push(...describePendingExternalUsers(results))
+      const allUsersToEnroll = results.filter(r => isExternalUserSuccess(r)).map(s => s.email)
       const enrollmentsToAdd = enrollments.filter(e => allUsersToEnroll.includes(e.email))
 
       if (enrollmentsToAdd.length > 0) {
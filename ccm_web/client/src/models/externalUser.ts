@@ -25,6 +25,15 @@ interface ExternalUserSuccessCreatedAndInvited extends ExternalUserResultBase {
 
 export type ExternalUserSuccess = ExternalUserSuccessNotCreated | ExternalUserSuccessCreatedAndInvited
 
+// A user of a Canvas SIS import still running, who is invited once it's done
+export interface ExternalUserPending extends ExternalUserResultBase {
+  userCreated: 'pending'
+}
+
+export const isExternalUserPending = (v: unknown): v is ExternalUserPending => {
+  return isExternalUserResultBase(v) && hasKeys(v, ['userCreated']) && v.userCreated === 'pending'
+}
+
 export const isExternalUserSuccess = (v: unknown): v is ExternalUserSuccess => {
   return (
     isExternalUserResultBase(v) &&
@@ -64,7 +73,7 @@ export const isExternalUserFailure = (v: unknown): v is ExternalUserFailure => {
   )
 }
 
-export type ExternalUserResult = ExternalUserFailure | ExternalUserSuccess
+export type ExternalUserResult = ExternalUserFailure | ExternalUserSuccess | ExternalUserPending
 
 export interface ExternalUserAPIErrorData extends APIErrorData {
   data: ExternalUserResult[]
@@ -72,5 +81,5 @@ export interface ExternalUserAPIErrorData extends APIErrorData {
 
 export const isExternalUserAPIErrorData = (errorData: APIErrorData): errorData is ExternalUserAPIErrorData => {
   if (!(hasKeys(errorData, ['data']) && Array.isArray(errorData.data))) return false
-  return errorData.data.every(r => isExternalUserFailure(r) || isExternalUserSuccess(r))
+  return errorData.data.every(r => isExternalUserFailure(r) || isExternalUserSuccess(r) || isExternalUserPending(r))
 }
@@ -4,7 +4,9 @@ See https://github.com/tl-its-umich-edu/remote-office-hours-queue/blob/master/sr
 */
 
 import redirect from './redirect.js'
-import { ExternalUserResult, isExternalUserAPIErrorData, isExternalUserFailure } from '../models/externalUser.js'
+import {
+  ExternalUserResult, isExternalUserAPIErrorData, isExternalUserFailure, isExternalUserPending
+} from '../models/externalUser.js'
 import { APIErrorData, CanvasAPIErrorPayload, isCanvasAPIErrorData } from '../models/models.js'
 
 /*
@@ -122,6 +124,15 @@ class ExternalUserProcessError extends Error {
   }
 }
 
+const describePendingExternalUsers = (results: ExternalUserResult[]): ErrorDescription[] => {
+  return results.filter(isExternalUserPending).map(result => ({
+    input: result.email,
+    context: 'The new user is still being created in Canvas.',
+    errorText: 'They will be sent an email invitation once Canvas has created them, but were not added to the section.',
+    action: RecommendedAction.TryAgainOrContact
+  }))
+}
+
 const handleErrors = async (resp: Response): Promise<void> => {
   if (resp.ok) return
   const text = await resp.text()
@@ -152,4 +163,4 @@ const handleErrors = async (resp: Response): Promise<void> => {
   }
 }
 
-export { handleErrors as default, CanvasError, ExternalUserProcessError }
+export { handleErrors as default, CanvasError, describePendingExternalUsers, ExternalUserProcessError }
@@ -34,6 +34,9 @@ if [ -z "${DJANGO_SECRET_KEY}" ]; then
     echo "DJANGO_SECRET_KEY not set, using random value"
 fi
 
+# Clear the ready signal of a previous start, so the qworkers wait for this one
+rm -f /tmp/backend_ready
+
 echo "backend: Waiting for DB ${DB_HOST} at ${DB_PORT}"
 while ! nc -z "${DB_HOST}" "${DB_PORT}"; do
   sleep 2 # wait 2 seconds before check again
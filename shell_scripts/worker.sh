@@ -1,6 +1,11 @@
 #!/bin/bash
 
-echo "qworker is starting..."
+# Optional task queue to work, e.g. `worker.sh CCM_Interactive`, defaults to the bulk queue (Q_CLUSTER name)
+if [ -n "$1" ]; then
+    export Q_CLUSTER_NAME="$1"
+fi
+
+echo "qworker ${Q_CLUSTER_NAME:-default queue} is starting..."
 
 # Wait for backend to be ready since supervisor will spawn all the 3 processes backend, qworker, and frontend same time
 while [ ! -f /tmp/backend_ready ]; do
@@ -12,7 +17,6 @@ done
 echo "qworker: Backend is ready, starting qworker..."
 if [ "$RUN_QWORKER_DEV_MODE" = "true" ]; then
     echo 'qworker: Running in DEV mode'
-    rm /tmp/backend_ready
     watchfiles --filter python 'python manage.py qcluster' /code/backend
 else
     echo 'qworker: Running in PROD mode'